@@ -0,0 +1,250 @@
+"""
+Benchmark dos motores da automação da Central do Assinante contra o portal
+local (ixc_portal_local.py), sem acessar o portal real.
+
+Cada motor roda o mesmo lote de consultas (login + faturas em aberto) num
+processo novo, e o relatório mostra o tempo, as consultas por minuto, o
+pico de memória do processo e dos processos filhos (o Chrome e o
+chromedriver, no Selenium) e quantas consultas trouxeram exatamente as
+faturas em aberto que o portal tem. Um motor que não consegue rodar (sem
+Chrome instalado, por exemplo) entra no relatório com o erro.
+
+Uso:
+  python ixc_benchmark.py                                # 20 assinantes, http, auto e selenium
+  python ixc_benchmark.py --assinantes 100 --trabalhadores 4 --latencia 80
+  python ixc_benchmark.py --motores http --js            # faturas por JavaScript: o HTTP recusa
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import threading
+import time
+
+from ixc_http import MOTORES
+from ixc_portal_local import PortalLocal, gerar_assinantes
+
+ASSINANTES_PADRAO = 20
+TRABALHADORES_PADRAO = 2
+LATENCIA_PADRAO = 50
+
+
+def _rss_pico_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for linha in f:
+                if linha.startswith('VmHWM:'):
+                    return int(linha.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def _rss_descendentes_mb():
+    """RSS somado dos processos abaixo deste (Linux; 0 em outros sistemas)."""
+    pais, rss = {}, {}
+    try:
+        pids = [p for p in os.listdir('/proc') if p.isdigit()]
+    except OSError:
+        return 0.0
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/status') as f:
+                for linha in f:
+                    if linha.startswith('PPid:'):
+                        pais[int(pid)] = int(linha.split()[1])
+                    elif linha.startswith('VmRSS:'):
+                        rss[int(pid)] = int(linha.split()[1]) / 1024
+        except OSError:
+            continue
+    descendentes, fila = set(), [os.getpid()]
+    while fila:
+        pai = fila.pop()
+        for pid, ppid in pais.items():
+            if ppid == pai and pid not in descendentes:
+                descendentes.add(pid)
+                fila.append(pid)
+    return sum(rss.get(pid, 0.0) for pid in descendentes)
+
+
+class _AmostraFilhos(threading.Thread):
+    """Pico do RSS dos processos filhos, amostrado a cada `intervalo` s."""
+
+    def __init__(self, intervalo=0.25):
+        super().__init__(daemon=True)
+        self.intervalo = intervalo
+        self.pico = 0.0
+        self.parar = threading.Event()
+
+    def run(self):
+        while not self.parar.wait(self.intervalo):
+            self.pico = max(self.pico, _rss_descendentes_mb())
+
+
+def _medir(motor, base_url, credenciais, trabalhadores):
+    """Roda num processo novo: o lote inteiro por um motor."""
+    from ixc_http import ConexoesHttp
+    from ixc_lote import consulta_portal, executar_lote
+
+    opcoes = {'base_url': base_url, 'conexoes': ConexoesHttp(por_host=trabalhadores)}
+    pool = None
+    amostra = _AmostraFilhos()
+    amostra.start()
+    inicio = time.perf_counter()
+    try:
+        if motor != 'http':
+            from ixc_pool import PoolNavegadores
+            pool = PoolNavegadores(
+                tamanho=trabalhadores, headless=True, url_aquecimento=f"{base_url}/login", aquecer=motor == 'selenium'
+            )
+            opcoes['pool'] = pool
+            if motor == 'selenium':
+                # o tempo de subir o Chrome fica fora da medida, como num serviço já aquecido
+                pool.devolver(pool.obter())
+                inicio = time.perf_counter()
+        saida = io.StringIO()
+        # as mensagens de cada consulta não entram no relatório
+        with contextlib.redirect_stdout(io.StringIO()):
+            contagem = executar_lote(
+                iter(credenciais), saida, consulta_portal(motor, **opcoes),
+                trabalhadores=trabalhadores, taxa=0, tentativas=1,
+            )
+        segundos = time.perf_counter() - inicio
+    except Exception as e:
+        return {'erro': f"{type(e).__name__}: {e}"}
+    finally:
+        amostra.parar.set()
+        if pool is not None:
+            pool.fechar()
+        opcoes['conexoes'].fechar()
+    return {
+        'segundos': segundos,
+        'contagem': contagem,
+        'resultados': [json.loads(linha) for linha in saida.getvalue().splitlines()],
+        'rss_pico_mb': _rss_pico_mb(),
+        'rss_filhos_pico_mb': amostra.pico,
+    }
+
+
+def _em_processo_novo(*args):
+    contexto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as executor:
+        return executor.submit(_medir, *args).result()
+
+
+def _esperado(assinantes):
+    return {
+        cpf: sorted((f['id'], f['valor'], f['vencimento']) for f in a['faturas'] if f['status'] != 'paga')
+        for cpf, a in assinantes.items()
+    }
+
+
+def executar(motores, assinantes, trabalhadores, latencia, js=False):
+    esperado = _esperado(assinantes)
+    credenciais = [(i, cpf, a['senha']) for i, (cpf, a) in enumerate(assinantes.items(), 1)]
+    resultados = []
+    for motor in motores:
+        # portal novo por motor: sessões e contadores não passam de um para o outro
+        with PortalLocal(assinantes, js=js, latencia=latencia / 1000) as portal:
+            medida = _em_processo_novo(motor, portal.base_url, credenciais, trabalhadores)
+            requisicoes = portal.requisicoes
+
+        if 'erro' in medida:
+            resultados.append({'motor': motor, 'erro': medida['erro']})
+            print(f"{motor:>9}  ✗ {medida['erro']}")
+            continue
+
+        corretas = sum(
+            1 for r in medida['resultados']
+            if r['status'] == 'ok'
+            and sorted((f['id'], f['valor'], f['vencimento']) for f in r['faturas']) == esperado[r['cpf']]
+        )
+        por_motor = {}
+        for r in medida['resultados']:
+            if 'motor' in r:
+                por_motor[r['motor']] = por_motor.get(r['motor'], 0) + 1
+        resultado = {
+            'motor': motor,
+            'consultas': len(credenciais),
+            'segundos': round(medida['segundos'], 3),
+            'ms_por_consulta': round(medida['segundos'] * 1000 / len(credenciais), 1),
+            'consultas_por_min': round(len(credenciais) / medida['segundos'] * 60, 1),
+            'corretas': corretas,
+            'contagem': medida['contagem'],
+            'respondidas_por': por_motor,
+            'requisicoes_portal': requisicoes,
+            'rss_pico_mb': round(medida['rss_pico_mb'], 1),
+            'rss_filhos_pico_mb': round(medida['rss_filhos_pico_mb'], 1),
+        }
+        resultados.append(resultado)
+        print(
+            f"{motor:>9} {resultado['segundos']:>9.2f} {resultado['ms_por_consulta']:>10.1f} "
+            f"{resultado['consultas_por_min']:>10.1f} {corretas:>5}/{len(credenciais):<5} "
+            f"{resultado['rss_pico_mb']:>9.0f} {resultado['rss_filhos_pico_mb']:>11.0f}"
+        )
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark dos motores da automação IXC contra o portal local.")
+    parser.add_argument("--motores", default=','.join(MOTORES), help=f"padrão: {','.join(MOTORES)}")
+    parser.add_argument(
+        "--assinantes",
+        type=int,
+        default=ASSINANTES_PADRAO,
+        help=f"consultas por motor (padrão: {ASSINANTES_PADRAO})",
+    )
+    parser.add_argument(
+        "--trabalhadores",
+        type=int,
+        default=TRABALHADORES_PADRAO,
+        help=f"consultas em paralelo (padrão: {TRABALHADORES_PADRAO})",
+    )
+    parser.add_argument(
+        "--latencia",
+        type=float,
+        default=LATENCIA_PADRAO,
+        help=f"atraso de cada resposta do portal, em ms (padrão: {LATENCIA_PADRAO:g})",
+    )
+    parser.add_argument("--js", action="store_true", help="portal com as faturas carregadas por JavaScript")
+    parser.add_argument("-o", "--saida", default="benchmark_ixc.json", help="relatório JSON")
+    args = parser.parse_args()
+
+    motores = args.motores.split(',')
+    desconhecidos = set(motores) - set(MOTORES)
+    if desconhecidos:
+        parser.error(f"motor desconhecido: {', '.join(sorted(desconhecidos))}")
+
+    print(
+        f"{'motor':>9} {'tempo (s)':>9} {'ms/consulta':>10} {'por min':>10} {'corretas':>11} "
+        f"{'RSS (MB)':>9} {'filhos (MB)':>11}"
+    )
+    resultados = executar(motores, gerar_assinantes(args.assinantes), args.trabalhadores, args.latencia, args.js)
+
+    relatorio = {
+        'gerado_em': datetime.datetime.now().isoformat(timespec='seconds'),
+        'parametros': {
+            'assinantes': args.assinantes,
+            'trabalhadores': args.trabalhadores,
+            'latencia_ms': args.latencia,
+            'js': args.js,
+        },
+        'ambiente': {
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'resultados': resultados,
+    }
+    with open(args.saida, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, indent=2, ensure_ascii=False)
+    print(f"\n📁 Relatório: {args.saida}")
@@ -0,0 +1,120 @@
+"""
+Cache das faturas em aberto por CPF, para o serviço (ixc_servico.py).
+
+No WhatsApp o mesmo assinante pergunta da fatura várias vezes em poucos
+minutos, e cada pergunta repetia login e leitura no portal. Aqui o
+resultado fica guardado por `ttl` segundos e a próxima pergunta responde
+da memória. O desbloqueio de confiança bem-sucedido apaga o CPF do cache
+(invalidar), e o cache tem um limite de memória: passando dele, saem os
+CPFs consultados há mais tempo (LRU).
+
+Cada entrada fica presa à senha que a consultou (um HMAC com chave do
+processo, a senha não é guardada): outra senha para o mesmo CPF não recebe
+o resultado e vai ao portal.
+
+Uma consulta que já estava no portal quando o CPF foi invalidado não pode
+guardar o que leu antes do desbloqueio: quem consulta pega a geração do CPF
+antes (geracao) e a passa ao guardar, que não grava se ela mudou.
+"""
+
+from collections import OrderedDict
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+
+TTL_PADRAO = 300
+MAX_MB_PADRAO = 16
+# invalidações lembradas para comparar gerações; as mais antigas são esquecidas
+MAX_INVALIDACOES = 10_000
+
+
+class CacheFaturas:
+    def __init__(self, ttl=TTL_PADRAO, max_mb=MAX_MB_PADRAO):
+        self.ttl = ttl
+        self.max_bytes = max_mb * 1024 * 1024
+        self.chave_processo = os.urandom(32)
+        self.itens = OrderedDict()   # cpf -> (chave, expira, tamanho, resultado); o fim é o mais recente
+        self.bytes = 0
+        self.ultima_geracao = 0
+        self.invalidacoes = OrderedDict()   # cpf -> geração da última invalidação
+        self.piso_geracao = 0               # geração da invalidação mais nova já esquecida
+        self.lock = threading.Lock()
+        self.estatisticas = {'acertos': 0, 'faltas': 0, 'expirados': 0, 'invalidados': 0, 'descartados_lru': 0,
+                             'obsoletos': 0}
+
+    def chave(self, cpf, senha):
+        """Identifica (cpf, senha) sem guardar a senha."""
+        return hmac.new(self.chave_processo, f"{cpf}:{senha}".encode('utf-8'), hashlib.sha256).hexdigest()
+
+    def obter(self, cpf, senha):
+        """O resultado guardado do CPF, se ainda vale e foi desta senha; senão None."""
+        chave = self.chave(cpf, senha)
+        with self.lock:
+            item = self.itens.get(cpf)
+            if item is None:
+                self.estatisticas['faltas'] += 1
+                return None
+            chave_item, expira, _, resultado = item
+            if expira <= time.monotonic():
+                self._remover(cpf)
+                self.estatisticas['expirados'] += 1
+                self.estatisticas['faltas'] += 1
+                return None
+            if not hmac.compare_digest(chave, chave_item):
+                self.estatisticas['faltas'] += 1
+                return None
+            self.itens.move_to_end(cpf)
+            self.estatisticas['acertos'] += 1
+            return resultado
+
+    def geracao(self, cpf):
+        """Muda a cada invalidar(cpf); pegue antes de consultar e passe ao guardar."""
+        with self.lock:
+            return self._geracao(cpf)
+
+    def _geracao(self, cpf):
+        # um CPF esquecido vale o piso: na dúvida, a consulta antiga não grava
+        return self.invalidacoes.get(cpf, self.piso_geracao)
+
+    def guardar(self, cpf, senha, resultado, geracao=None):
+        if self.ttl <= 0:
+            return
+        tamanho = len(json.dumps(resultado, ensure_ascii=False)) + len(cpf) + 200
+        if tamanho > self.max_bytes:
+            return
+        with self.lock:
+            if geracao is not None and geracao != self._geracao(cpf):
+                # invalidado enquanto a consulta estava no portal: o resultado é de antes
+                self.estatisticas['obsoletos'] += 1
+                return
+            self._remover(cpf)
+            self.itens[cpf] = (self.chave(cpf, senha), time.monotonic() + self.ttl, tamanho, resultado)
+            self.bytes += tamanho
+            while self.bytes > self.max_bytes:
+                self._remover(next(iter(self.itens)))
+                self.estatisticas['descartados_lru'] += 1
+
+    def invalidar(self, cpf):
+        """Tira o CPF do cache (depois do desbloqueio, por exemplo)."""
+        with self.lock:
+            self.ultima_geracao += 1
+            self.invalidacoes[cpf] = self.ultima_geracao
+            self.invalidacoes.move_to_end(cpf)
+            if len(self.invalidacoes) > MAX_INVALIDACOES:
+                _, self.piso_geracao = self.invalidacoes.popitem(last=False)
+            if self._remover(cpf):
+                self.estatisticas['invalidados'] += 1
+
+    def _remover(self, cpf):
+        item = self.itens.pop(cpf, None)
+        if item is None:
+            return False
+        self.bytes -= item[2]
+        return True
+
+    def resumo(self):
+        with self.lock:
+            return {'cpfs': len(self.itens), 'kb': round(self.bytes / 1024, 1), **self.estatisticas}
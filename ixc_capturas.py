@@ -0,0 +1,217 @@
+"""
+Capturas de tela da automação da Central do Assinante só quando servem.
+
+Antes, cada etapa gravava um PNG em /tmp/ixc_screenshots, com ou sem erro,
+de forma síncrona e sem nunca apagar nada: sob carga, isso atrasava as
+consultas e enchia o disco. Agora:
+
+- as capturas de cada consulta ficam num anel em memória (as últimas
+  TAMANHO_ANEL_PADRAO), ainda como o base64 que o Chrome devolve;
+- só vão para o disco quando uma etapa falha (as do anel, que mostram o
+  caminho até a falha, e a da própria falha) ou no modo debug
+  (IXC_CAPTURAS_DEBUG=1), quando todas são gravadas;
+- decodificar, comprimir e gravar é feito numa thread em segundo plano
+  (WebP com o Pillow instalado; sem ele, o PNG recomprimido sem perdas);
+- a pasta tem limite de tamanho e de idade: as capturas mais antigas são
+  apagadas primeiro.
+
+Uso:
+    gravador = GravadorCapturas('/tmp/ixc_screenshots', max_mb=100, max_dias=3)
+    automacao = CentralAssinanteAutomacao(cpf, senha, capturas=gravador)
+"""
+
+from collections import deque
+from datetime import datetime
+import atexit
+import base64
+import io
+import os
+import queue
+import secrets
+import struct
+import threading
+import time
+import zlib
+
+DIRETORIO_PADRAO = "/tmp/ixc_screenshots"
+TAMANHO_ANEL_PADRAO = 4
+MAX_MB_PADRAO = 200
+MAX_DIAS_PADRAO = 7
+QUALIDADE_WEBP = 70
+DEBUG_PADRAO = os.environ.get("IXC_CAPTURAS_DEBUG") == "1"
+
+EXTENSOES = ('.png', '.webp')
+ASSINATURA_PNG = b'\x89PNG\r\n\x1a\n'
+
+
+def recomprimir_png(png):
+    """
+    O mesmo PNG com os dados de imagem recomprimidos no nível máximo do
+    zlib (o Chrome usa um nível rápido). Sem perdas; se não ficar menor,
+    ou se não for um PNG, devolve o original.
+    """
+    if not png.startswith(ASSINATURA_PNG):
+        return png
+    pedacos, idat, posicao = [], [], len(ASSINATURA_PNG)
+    while posicao + 8 <= len(png):
+        tamanho, tipo = struct.unpack('>I4s', png[posicao:posicao + 8])
+        dados = png[posicao + 8:posicao + 8 + tamanho]
+        posicao += 12 + tamanho
+        if tipo == b'IDAT':
+            if not idat:
+                pedacos.append((b'IDAT', None))   # lugar do IDAT único
+            idat.append(dados)
+        else:
+            pedacos.append((tipo, dados))
+    if not idat:
+        return png
+    try:
+        comprimido = zlib.compress(zlib.decompress(b''.join(idat)), 9)
+    except zlib.error:
+        return png
+
+    saida = [ASSINATURA_PNG]
+    for tipo, dados in pedacos:
+        dados = comprimido if dados is None else dados
+        saida.append(struct.pack('>I4s', len(dados), tipo) + dados + struct.pack('>I', zlib.crc32(tipo + dados)))
+    novo = b''.join(saida)
+    return novo if len(novo) < len(png) else png
+
+
+def _codificar(png):
+    """(bytes, extensão) da captura já comprimida."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return recomprimir_png(png), '.png'
+    saida = io.BytesIO()
+    Image.open(io.BytesIO(png)).save(saida, 'WEBP', quality=QUALIDADE_WEBP)
+    return saida.getvalue(), '.webp'
+
+
+class GravadorCapturas:
+    """
+    Grava capturas em segundo plano e mantém a pasta dentro dos limites.
+    Um gravador serve a todas as consultas do processo (inclusive em
+    threads, no ixc_lote.py).
+    """
+
+    def __init__(self, diretorio=DIRETORIO_PADRAO, max_mb=MAX_MB_PADRAO, max_dias=MAX_DIAS_PADRAO, debug=DEBUG_PADRAO):
+        self.diretorio = diretorio
+        self.max_bytes = max_mb * 1024 * 1024 if max_mb else None
+        self.max_idade = max_dias * 86400 if max_dias else None
+        self.debug = debug
+        self.fila = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.estatisticas = {'gravadas': 0, 'bytes': 0, 'apagadas': 0, 'erros': 0}
+
+    def salvar(self, capturas):
+        """Enfileira [(nome do arquivo sem extensão, png em base64)] para gravar."""
+        with self.lock:
+            if self.thread is None:
+                os.makedirs(self.diretorio, exist_ok=True)
+                self.thread = threading.Thread(target=self._gravar, daemon=True)
+                self.thread.start()
+                atexit.register(self.esperar)
+        for captura in capturas:
+            self.fila.put(captura)
+        # a retenção roda depois de cada lote de capturas
+        self.fila.put(None)
+
+    def esperar(self):
+        """Espera as capturas enfileiradas serem gravadas."""
+        if self.thread is not None:
+            self.fila.join()
+
+    def _gravar(self):
+        while True:
+            captura = self.fila.get()
+            try:
+                if captura is None:
+                    self.aplicar_retencao()
+                    continue
+                nome, conteudo = captura
+                dados, extensao = _codificar(base64.b64decode(conteudo))
+                with open(os.path.join(self.diretorio, nome + extensao), 'wb') as f:
+                    f.write(dados)
+                self.estatisticas['gravadas'] += 1
+                self.estatisticas['bytes'] += len(dados)
+            except Exception as e:
+                self.estatisticas['erros'] += 1
+                print(f"   ✗ Captura não gravada: {e}")
+            finally:
+                self.fila.task_done()
+
+    def aplicar_retencao(self):
+        """Apaga as capturas mais velhas que max_dias e, depois, as mais antigas até caber em max_mb."""
+        try:
+            with os.scandir(self.diretorio) as entradas:
+                arquivos = [
+                    (e.stat().st_mtime, e.stat().st_size, e.path)
+                    for e in entradas if e.is_file() and e.name.endswith(EXTENSOES)
+                ]
+        except OSError:
+            return
+        arquivos.sort()
+        limite_idade = time.time() - self.max_idade if self.max_idade else None
+        total = sum(tamanho for _, tamanho, _ in arquivos)
+        for mtime, tamanho, caminho in arquivos:
+            velho = limite_idade is not None and mtime < limite_idade
+            grande = self.max_bytes is not None and total > self.max_bytes
+            if not (velho or grande):
+                break
+            try:
+                os.remove(caminho)
+            except OSError:
+                continue
+            total -= tamanho
+            self.estatisticas['apagadas'] += 1
+
+
+class AnelCapturas:
+    """As últimas capturas de uma consulta, em memória."""
+
+    def __init__(self, gravador, tamanho=TAMANHO_ANEL_PADRAO):
+        self.gravador = gravador
+        self.anel = deque(maxlen=tamanho)
+        self.consulta = secrets.token_hex(3)   # agrupa os arquivos de uma mesma consulta
+        self.ordem = 0
+
+    def _capturar(self, driver, nome):
+        self.ordem += 1
+        momento = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return f"{momento}_{self.consulta}_{self.ordem:02d}_{nome}", driver.get_screenshot_as_base64()
+
+    def registrar(self, driver, nome):
+        """Captura de uma etapa normal: vai para o anel (ou direto para o disco, no debug)."""
+        if self.gravador.debug:
+            self.gravador.salvar([self._capturar(driver, nome)])
+        elif self.anel.maxlen:
+            self.anel.append(self._capturar(driver, nome))
+
+    def falha(self, driver, nome):
+        """Captura da falha; ela e as do anel vão para o disco. Retorna quantas."""
+        capturas = list(self.anel)
+        self.anel.clear()
+        try:
+            capturas.append(self._capturar(driver, nome))
+        except Exception:
+            # o navegador pode ser justamente o que falhou: grava o que já tinha
+            pass
+        if capturas:
+            self.gravador.salvar(capturas)
+        return len(capturas)
+
+
+_gravador_padrao = None
+_lock_padrao = threading.Lock()
+
+
+def gravador_padrao():
+    """O gravador compartilhado das automações criadas sem `capturas`."""
+    global _gravador_padrao
+    with _lock_padrao:
+        if _gravador_padrao is None:
+            _gravador_padrao = GravadorCapturas()
+        return _gravador_padrao
@@ -0,0 +1,704 @@
+"""
+Motor HTTP da automação da Central do Assinante: login e faturas em aberto
+sem navegador, só com a biblioteca padrão.
+
+Um Chrome custa centenas de MB e alguns segundos por assinante para ler
+umas poucas linhas de fatura. Aqui o login é o próprio formulário da página
+enviado por POST (com os campos ocultos e os cookies), e as faturas são
+lidas do HTML com a mesma regra do EXTRAIR_FATURAS_JS. As conexões ficam
+abertas (keep-alive) e são reaproveitadas entre consultas.
+
+Quando a página não dá para ler assim (formulário montado por JavaScript,
+faturas carregadas depois por XHR, certificado que só o Chrome aceita), o
+motor levanta PaginaNaoSuportada. CentralAssinanteHibrida tenta o HTTP e,
+nesses casos, passa para o Selenium (CentralAssinanteAutomacao) com a
+sessão já aberta. O desbloqueio de confiança é sempre pelo navegador: ele
+depende do JavaScript do portal.
+
+Uso:
+    automacao = criar_automacao('auto', cpf, senha)   # 'auto', 'http' ou 'selenium'
+    if automacao.fazer_login():
+        faturas = automacao.buscar_faturas_em_aberto()
+    automacao.encerrar()
+"""
+
+from html.parser import HTMLParser
+from http.cookiejar import Cookie, CookieJar, eff_request_host
+from urllib.parse import urlencode, urljoin, urlsplit
+from urllib.request import Request
+import gzip
+import http.client
+import queue
+import re
+import ssl
+import threading
+import time
+import zlib
+
+from ixccentralassinante import (
+    BASE_URL,
+    CentralAssinanteAutomacao,
+    MedicaoTempos,
+    SELETOR_ERRO_LOGIN,
+    faturas_em_aberto,
+)
+from ixc_metricas import metricas_padrao
+
+MOTORES = ('auto', 'http', 'selenium')
+TIMEOUT_PADRAO = 15
+CONEXOES_POR_HOST = 4
+MAX_REDIRECIONAMENTOS = 10
+# Podem ser reenviados se a conexão cair depois do envio (um POST de login não)
+METODOS_IDEMPOTENTES = ('GET', 'HEAD')
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+# Classes das mensagens de erro do login (as mesmas de SELETOR_ERRO_LOGIN)
+CLASSES_ERRO_LOGIN = {s.strip().lstrip('.') for s in SELETOR_ERRO_LOGIN.split(',')}
+
+# Página que diz com todas as letras que não há fatura: sem isso, uma página
+# sem nenhuma fatura no HTML pode ser uma que as carrega por JavaScript
+SEM_FATURAS = re.compile(
+    r'nenhuma fatura|n[ãa]o (?:h[áa]|possui|existem?) faturas?|sem faturas|n[ãa]o h[áa] d[ée]bitos', re.I
+)
+
+RE_VALOR = re.compile(r'R\$\s*(-?[\d.]+,\d{2})')
+RE_DATA = re.compile(r'(\d{2})/(\d{2})/(\d{4})')
+RE_VENCIMENTO = re.compile(r'venc\w*\.?\s*:?\s*(?:em\s*)?(\d{2})/(\d{2})/(\d{4})', re.I)
+
+VAZIOS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+# Não aparecem na tela (com JavaScript ligado, o <noscript> também não)
+OCULTOS = {'script', 'style', 'template', 'noscript', 'head', 'title'}
+# Juntam o texto sem espaço, como no innerText
+EM_LINHA = {'a', 'abbr', 'b', 'em', 'font', 'i', 'label', 'small', 'span', 'strong', 'sub', 'sup', 'u'}
+
+
+class PaginaNaoSuportada(Exception):
+    """A página não dá para ler sem navegador; use o motor Selenium."""
+
+
+# --- conexões ---
+
+class ConexoesHttp:
+    """
+    Conexões keep-alive por host, reaproveitadas entre requisições e entre
+    consultas (inclusive de threads diferentes). Não guardam cookies: a
+    sessão de cada assinante fica no CookieJar de SessaoHttp. Cada
+    requisição é um span 'http' nas métricas.
+    """
+
+    def __init__(self, por_host=CONEXOES_POR_HOST, timeout=TIMEOUT_PADRAO, contexto_ssl=None, metricas=None):
+        self.por_host = por_host
+        self.timeout = timeout
+        self.contexto_ssl = contexto_ssl or ssl.create_default_context()
+        self.metricas = metricas if metricas is not None else metricas_padrao()
+        self.livres = {}
+        self.lock = threading.Lock()
+        self.estatisticas = {'abertas': 0, 'reaproveitadas': 0}
+
+    def _obter(self, esquema, host):
+        with self.lock:
+            livres = self.livres.setdefault((esquema, host), queue.LifoQueue())
+        try:
+            conexao = livres.get_nowait()
+            with self.lock:
+                self.estatisticas['reaproveitadas'] += 1
+            return conexao, True
+        except queue.Empty:
+            pass
+        with self.lock:
+            self.estatisticas['abertas'] += 1
+        if esquema == 'https':
+            return http.client.HTTPSConnection(host, timeout=self.timeout, context=self.contexto_ssl), False
+        return http.client.HTTPConnection(host, timeout=self.timeout), False
+
+    def _devolver(self, esquema, host, conexao):
+        livres = self.livres[(esquema, host)]
+        if livres.qsize() < self.por_host:
+            livres.put(conexao)
+        else:
+            conexao.close()
+
+    def requisitar(self, metodo, url, corpo=None, cabecalhos=None):
+        """(resposta, corpo em bytes). A resposta já foi lida por inteiro."""
+        partes = urlsplit(url)
+        caminho = (partes.path or '/') + (f"?{partes.query}" if partes.query else '')
+        with self.metricas.medir('http', metodo=metodo) as span:
+            while True:
+                conexao, reaproveitada = self._obter(partes.scheme, partes.netloc)
+                enviada = False
+                try:
+                    conexao.request(metodo, caminho, body=corpo, headers=cabecalhos or {})
+                    enviada = True
+                    resposta = conexao.getresponse()
+                    dados = resposta.read()
+                except (http.client.RemoteDisconnected, http.client.CannotSendRequest, ConnectionResetError, BrokenPipeError):
+                    conexao.close()
+                    # o servidor fechou a conexão parada: tenta de novo numa nova,
+                    # mas depois do envio só se repetir não tiver efeito
+                    if reaproveitada and (not enviada or metodo in METODOS_IDEMPOTENTES):
+                        span.tentativas += 1
+                        continue
+                    raise
+                except Exception:
+                    conexao.close()
+                    raise
+                if resposta.will_close:
+                    conexao.close()
+                else:
+                    self._devolver(partes.scheme, partes.netloc, conexao)
+                if resposta.status >= 400:
+                    span.resultado = str(resposta.status)
+                return resposta, dados
+
+    def fechar(self):
+        with self.lock:
+            filas, self.livres = list(self.livres.values()), {}
+        for livres in filas:
+            while not livres.empty():
+                livres.get_nowait().close()
+
+
+class SessaoHttp:
+    """Os cookies de um assinante, sobre um ConexoesHttp compartilhado."""
+
+    def __init__(self, conexoes):
+        self.conexoes = conexoes
+        self.cookies = CookieJar()
+        self.requisicoes = 0
+
+    def abrir(self, url, campos=None):
+        """
+        GET (ou POST com `campos`) seguindo redirecionamentos. Retorna
+        (url final, html).
+        """
+        metodo = 'POST' if campos is not None else 'GET'
+        corpo = urlencode(campos).encode('utf-8') if campos is not None else None
+        for _ in range(MAX_REDIRECIONAMENTOS):
+            pedido = Request(url, method=metodo)
+            self.cookies.add_cookie_header(pedido)
+            cabecalhos = {
+                'User-Agent': USER_AGENT,
+                'Accept': 'text/html,application/xhtml+xml,*/*;q=0.8',
+                'Accept-Encoding': 'gzip, deflate',
+                'Accept-Language': 'pt-BR,pt;q=0.9',
+            }
+            if pedido.has_header('Cookie'):
+                cabecalhos['Cookie'] = pedido.get_header('Cookie')
+            if corpo is not None:
+                cabecalhos['Content-Type'] = 'application/x-www-form-urlencoded'
+
+            resposta, dados = self.conexoes.requisitar(metodo, url, corpo, cabecalhos)
+            self.requisicoes += 1
+            self.cookies.extract_cookies(resposta, pedido)
+
+            destino = resposta.getheader('Location')
+            if resposta.status in (301, 302, 303, 307, 308) and destino:
+                url = urljoin(url, destino)
+                if resposta.status in (301, 302, 303):
+                    metodo, corpo = 'GET', None
+                continue
+            return url, _decodificar(resposta, dados)
+        raise PaginaNaoSuportada(f"redirecionamentos demais a partir de {url}")
+
+    def para_sessao(self):
+        """Os cookies no formato do Selenium (get_cookies), para SessoesCpf."""
+        cookies = []
+        for c in self.cookies:
+            cookie = {'name': c.name, 'value': c.value, 'path': c.path, 'secure': bool(c.secure),
+                      'httpOnly': c.has_nonstandard_attr('HttpOnly')}
+            if c.domain_specified:
+                cookie['domain'] = c.domain
+            if c.expires:
+                cookie['expiry'] = c.expires
+            cookies.append(cookie)
+        return cookies
+
+    def restaurar(self, cookies, url):
+        """Carrega cookies no formato do Selenium como se tivessem vindo de `url`."""
+        _, host = eff_request_host(Request(url))
+        for c in cookies:
+            dominio = c.get('domain') or host
+            self.cookies.set_cookie(Cookie(
+                0, c['name'], c['value'], None, False,
+                dominio, bool(c.get('domain')), dominio.startswith('.'),
+                c.get('path') or '/', True, bool(c.get('secure')), c.get('expiry'),
+                c.get('expiry') is None, None, None, {'HttpOnly': None} if c.get('httpOnly') else {},
+            ))
+
+
+def _decodificar(resposta, dados):
+    codificacao = (resposta.getheader('Content-Encoding') or '').lower()
+    if codificacao == 'gzip':
+        dados = gzip.decompress(dados)
+    elif codificacao == 'deflate':
+        dados = zlib.decompress(dados)
+    charset = resposta.headers.get_content_charset() or 'utf-8'
+    try:
+        return dados.decode(charset, errors='replace')
+    except LookupError:
+        return dados.decode('utf-8', errors='replace')
+
+
+# --- HTML ---
+
+class No:
+    __slots__ = ('tag', 'attrs', 'pai', 'filhos')
+
+    def __init__(self, tag, attrs, pai):
+        self.tag = tag
+        self.attrs = attrs
+        self.pai = pai
+        self.filhos = []
+
+    def classes(self):
+        return set((self.attrs.get('class') or '').split())
+
+    def oculto(self):
+        estilo = (self.attrs.get('style') or '').replace(' ', '').lower()
+        return (
+            self.tag in OCULTOS
+            or 'hidden' in self.attrs
+            or 'display:none' in estilo
+            or (self.tag == 'input' and (self.attrs.get('type') or '').lower() == 'hidden')
+        )
+
+    def visivel(self):
+        no = self
+        while no is not None:
+            if no.oculto():
+                return False
+            no = no.pai
+        return True
+
+    def elementos(self):
+        """Os descendentes (em ordem do documento)."""
+        for filho in self.filhos:
+            if isinstance(filho, No):
+                yield filho
+                yield from filho.elementos()
+
+    def textos(self):
+        """(nó pai, texto) de cada trecho de texto visível."""
+        for filho in self.filhos:
+            if isinstance(filho, No):
+                if not filho.oculto():
+                    yield from filho.textos()
+            else:
+                yield self, filho
+
+    def texto(self):
+        """Como o innerText: sem o que não aparece na tela, espaços juntados."""
+        return re.sub(r'\s+', ' ', ''.join(self._partes())).strip()
+
+    def _partes(self):
+        for filho in self.filhos:
+            if isinstance(filho, str):
+                yield filho
+            elif not filho.oculto():
+                separar = filho.tag not in EM_LINHA
+                if separar:
+                    yield ' '
+                yield from filho._partes()
+                if separar:
+                    yield ' '
+
+    def contem(self, outro):
+        no = outro.pai
+        while no is not None:
+            if no is self:
+                return True
+            no = no.pai
+        return False
+
+    def ancestral(self, tag):
+        no = self.pai
+        while no is not None and no.tag != tag:
+            no = no.pai
+        return no
+
+
+class _Arvore(HTMLParser):
+    """Monta a árvore de No de um HTML (tolerante a tags não fechadas)."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.raiz = No('#documento', {}, None)
+        self.atual = self.raiz
+
+    def handle_starttag(self, tag, attrs):
+        # <tr>/<td>/<li>/<p> sem fechamento explícito fecham o irmão anterior
+        if tag in ('tr', 'td', 'th', 'li', 'p', 'option'):
+            irmaos = {'tr': ('tr',), 'td': ('td', 'th'), 'th': ('td', 'th')}.get(tag, (tag,))
+            if self.atual.tag in irmaos:
+                self.atual = self.atual.pai
+        no = No(tag, {k: (v if v is not None else '') for k, v in attrs}, self.atual)
+        self.atual.filhos.append(no)
+        if tag not in VAZIOS:
+            self.atual = no
+
+    def handle_startendtag(self, tag, attrs):
+        self.atual.filhos.append(No(tag, {k: (v if v is not None else '') for k, v in attrs}, self.atual))
+
+    def handle_endtag(self, tag):
+        no = self.atual
+        while no is not None and no.tag != tag:
+            no = no.pai
+        if no is not None and no.pai is not None:
+            self.atual = no.pai
+
+    def handle_data(self, dados):
+        self.atual.filhos.append(dados)
+
+
+def analisar_html(html):
+    arvore = _Arvore()
+    arvore.feed(html)
+    arvore.close()
+    return arvore.raiz
+
+
+# --- faturas (a mesma regra do EXTRAIR_FATURAS_JS) ---
+
+def _valor(texto):
+    m = RE_VALOR.search(texto)
+    return float(m.group(1).replace('.', '').replace(',', '.')) if m else None
+
+
+def _vencimento(texto):
+    m = RE_VENCIMENTO.search(texto)
+    if m:
+        return f"{m.group(3)}-{m.group(2)}-{m.group(1)}"
+    # sem rótulo: a data mais recente (emissão vem antes do vencimento)
+    datas = sorted(f"{a}-{m}-{d}" for d, m, a in RE_DATA.findall(texto))
+    return datas[-1] if datas else None
+
+
+def _situacao(texto):
+    s = texto.lower()
+    if re.search(r'vencid|atrasad|em atraso', s):
+        return 'vencida'
+    if re.search(r'\bpag[ao]\b|quitad|liquidad|baixad', s):
+        return 'paga'
+    if re.search(r'aberto|a vencer|pendente|aguardando', s):
+        return 'em_aberto'
+    return None
+
+
+def _identificador(el, texto):
+    for no in [el, *el.elementos()]:
+        for atributo in ('data-id-fatura', 'data-fatura', 'data-boleto', 'data-id'):
+            if no.attrs.get(atributo):
+                return no.attrs[atributo]
+        if no.tag == 'a':
+            m = re.search(r'(?:fatura|boleto|titulo|id)[/=_-]?(\d{3,})', no.attrs.get('href') or '', re.I)
+            if m:
+                return m.group(1)
+    m = re.search(r'(?:fatura|boleto|t[íi]tulo|documento|n[º°o]\.?|#)\s*:?\s*(\d{3,})', texto, re.I)
+    return m.group(1) if m else None
+
+
+def _cabecalhos(tr, cache):
+    tabela = tr.ancestral('table')
+    if tabela is None:
+        return []
+    if id(tabela) not in cache:
+        thead = next((n for n in tabela.elementos() if n.tag == 'thead'), None)
+        ths = [n for n in thead.elementos() if n.tag == 'th'] if thead is not None else []
+        if not ths:
+            primeira = next((n for n in tabela.elementos() if n.tag == 'tr'), None)
+            ths = [n for n in primeira.filhos if isinstance(n, No) and n.tag == 'th'] if primeira is not None else []
+        cache[id(tabela)] = [th.texto().lower() for th in ths]
+    return cache[id(tabela)]
+
+
+def _registro(el, cache):
+    texto = el.texto()
+    fatura = {'id': _identificador(el, texto), 'valor': _valor(texto), 'vencimento': _vencimento(texto),
+              'status': _situacao(texto), 'texto': texto}
+    # numa tabela com cabeçalho, cada campo vem da sua coluna
+    if el.tag == 'tr':
+        celulas = [n for n in el.filhos if isinstance(n, No) and n.tag in ('td', 'th')]
+        for nome, celula in zip(_cabecalhos(el, cache), celulas):
+            celula = celula.texto()
+            if 'venc' in nome and RE_DATA.search(celula):
+                fatura['vencimento'] = _vencimento(celula)
+            elif re.search(r'valor|total', nome) and fatura['valor'] is None and _valor('R$ ' + celula.replace('R$', '')) is not None:
+                fatura['valor'] = _valor('R$ ' + celula.replace('R$', ''))
+            elif re.search(r'situa|status', nome) and celula:
+                # situação desconhecida fica None: o vencimento decide
+                fatura['status'] = _situacao(celula)
+            elif re.search(r'fatura|n[º°o]|c[óo]d|documento', nome) and re.fullmatch(r'\d{3,}', celula) and not fatura['id']:
+                fatura['id'] = celula
+    return fatura
+
+
+def extrair_faturas(raiz):
+    """Os registros de fatura do HTML, como o EXTRAIR_FATURAS_JS no navegador."""
+    corpo = next((n for n in raiz.elementos() if n.tag == 'body'), raiz)
+    candidatos = []
+    vistos = set()
+
+    def adicionar(el):
+        if id(el) not in vistos and el.visivel():
+            vistos.add(id(el))
+            candidatos.append(el)
+
+    for pai, trecho in corpo.textos():
+        if 'R$' not in trecho:
+            continue
+        el, nivel = pai, 0
+        while el is not None and el is not corpo and el.tag != '#documento' and nivel < 8:
+            if el.tag == 'tr':
+                adicionar(el)
+                break
+            texto = el.texto()
+            if len(texto) > 600:
+                break
+            if RE_DATA.search(texto):
+                adicionar(el)
+                break
+            el, nivel = el.pai, nivel + 1
+
+    # sem nenhum "R$": linhas de tabela com data e menção a vencimento/fatura
+    if not candidatos:
+        for tr in corpo.elementos():
+            if tr.tag == 'tr':
+                texto = tr.texto()
+                if RE_DATA.search(texto) and re.search(r'venc|fatura', texto, re.I):
+                    adicionar(tr)
+
+    # um card que contém outra fatura já encontrada é só o contêiner delas
+    cache = {}
+    return [
+        _registro(el, cache) for el in candidatos
+        if not any(outro is not el and el.contem(outro) for outro in candidatos)
+    ]
+
+
+def formulario_login(raiz):
+    """
+    (action, método, campos, nome do campo de login, nome do campo de senha)
+    do formulário com campo de senha, ou None.
+    """
+    for form in (n for n in raiz.elementos() if n.tag == 'form'):
+        entradas = [n for n in form.elementos() if n.tag in ('input', 'select', 'textarea')]
+        senha = next((n for n in entradas if (n.attrs.get('type') or '').lower() == 'password' and n.attrs.get('name')), None)
+        if senha is None:
+            continue
+        campos, login, primeiro_texto = {}, None, None
+        for n in entradas:
+            nome, tipo = n.attrs.get('name'), (n.attrs.get('type') or 'text').lower()
+            if not nome or tipo in ('submit', 'button', 'image', 'reset', 'file'):
+                continue
+            if tipo in ('checkbox', 'radio') and 'checked' not in n.attrs:
+                continue
+            campos[nome] = n.attrs.get('value', '')
+            if tipo in ('text', 'tel', 'email', 'number') and n is not senha:
+                primeiro_texto = primeiro_texto or nome
+                # os mesmos candidatos de SELETORES_LOGIN
+                if nome == 'login' or n.attrs.get('id') == 'login' or n.attrs.get('placeholder') in ('Login', 'CPF'):
+                    login = login or nome
+        login = login or primeiro_texto
+        if login is None:
+            continue
+        return form.attrs.get('action'), (form.attrs.get('method') or 'get').upper(), campos, login, senha.attrs['name']
+    return None
+
+
+def tem_erro_login(raiz):
+    return any(el.classes() & CLASSES_ERRO_LOGIN and el.visivel() and el.texto() for el in raiz.elementos())
+
+
+# --- motores ---
+
+class CentralAssinanteHttp(MedicaoTempos):
+    """
+    Login e faturas em aberto por HTTP, com a mesma interface de
+    CentralAssinanteAutomacao. Levanta PaginaNaoSuportada quando a página
+    precisa de navegador.
+    """
+    motor = 'http'
+
+    def __init__(self, cpf, senha, conexoes=None, sessoes=None, base_url=None, metricas=None, **_):
+        self.cpf = cpf
+        self.senha = senha
+        self.base_url = (base_url or BASE_URL).rstrip('/')
+        self.login_url = f"{self.base_url}/login"
+        self.sessoes = sessoes
+        self.metricas = metricas if metricas is not None else metricas_padrao()
+        self.proprias_conexoes = conexoes is None
+        self.conexoes = conexoes if conexoes is not None else ConexoesHttp(metricas=self.metricas)
+        self.sessao = SessaoHttp(self.conexoes)
+        self.motivo_falha_login = None
+        self.tempos = {}
+        self.pagina = None   # (url, html) da página depois do login
+
+    def restaurar_sessao(self):
+        cookies = self.sessoes.obter(self.cpf, self.senha) if self.sessoes is not None else None
+        if not cookies:
+            return False
+        self.sessao.restaurar(cookies, self.base_url)
+        url, html = self.sessao.abrir(self.base_url)
+        if "login" in url.lower():
+            print("   → Sessão guardada expirou no portal; fazendo login...")
+            self.sessoes.invalidar(self.cpf)
+            self.sessao.cookies.clear()
+            return False
+        print("   ✓ Sessão anterior reaproveitada (login dispensado)")
+        self.pagina = (url, html)
+        return True
+
+    def fazer_login(self):
+        print(f"\nLogin (HTTP): {self.login_url}")
+        try:
+            if self.restaurar_sessao():
+                return True
+
+            url, html = self.sessao.abrir(self.login_url)
+            formulario = formulario_login(analisar_html(html))
+            if formulario is None:
+                raise PaginaNaoSuportada("formulário de login não está no HTML")
+            acao, metodo, campos, campo_login, campo_senha = formulario
+            if metodo != 'POST':
+                raise PaginaNaoSuportada(f"formulário de login por {metodo}")
+            campos[campo_login] = self.cpf
+            campos[campo_senha] = self.senha
+
+            url, html = self.sessao.abrir(urljoin(url, acao or url), campos)
+            if "login" not in url.lower():
+                print("   ✓ Login realizado com SUCESSO!")
+                if self.sessoes is not None:
+                    self.sessoes.guardar(self.cpf, self.senha, self.sessao.para_sessao())
+                self.pagina = (url, html)
+                return True
+            # voltou para o login: a senha já foi enviada e recusada, com ou sem
+            # mensagem na tela; o navegador não a envia de novo
+            if tem_erro_login(analisar_html(html)):
+                print("   ✗ Erro: Login falhou. Verifique CPF e senha.")
+            else:
+                print("   ✗ Erro: Login falhou (o portal voltou para o login sem mensagem). Verifique CPF e senha.")
+            self.motivo_falha_login = 'credenciais'
+            return False
+        except PaginaNaoSuportada:
+            raise
+        except ssl.SSLCertVerificationError as e:
+            # o Chrome da automação ignora erros de certificado; aqui não
+            raise PaginaNaoSuportada(f"certificado do portal: {e}") from e
+        except Exception as e:
+            print(f"   ✗ Erro ao fazer login: {e}")
+            self.motivo_falha_login = 'excecao'
+            return False
+
+    def buscar_faturas_em_aberto(self):
+        inicio = time.perf_counter()
+        url, html = self.pagina or self.sessao.abrir(self.base_url)
+        self.pagina = None
+        if "login" in url.lower():
+            raise PaginaNaoSuportada("sessão perdida: o portal voltou para o login")
+
+        registros = extrair_faturas(analisar_html(html))
+        if not registros and not SEM_FATURAS.search(html):
+            raise PaginaNaoSuportada("nenhuma fatura no HTML e nenhum aviso de que não há faturas")
+        faturas = faturas_em_aberto(registros)
+        print(f"   → Página lida em {(time.perf_counter() - inicio) * 1000:.0f} ms ({len(faturas)} fatura(s) em aberto)")
+        return faturas
+
+    def realizar_desbloqueio_confianca(self):
+        raise PaginaNaoSuportada("o desbloqueio de confiança depende do JavaScript do portal")
+
+    def encerrar(self):
+        if self.proprias_conexoes:
+            self.conexoes.fechar()
+
+
+class CentralAssinanteHibrida(MedicaoTempos):
+    """
+    Tenta cada etapa por HTTP e passa para o Selenium na primeira que não
+    der. `motor` diz qual está em uso ('http' ou 'selenium'). O Selenium
+    recebe os cookies do HTTP e não repete o login.
+    """
+
+    def __init__(self, cpf, senha, conexoes=None, sessoes=None, base_url=None, headless=True, pool=None, seletores=None,
+                 capturas=None, metricas=None):
+        self.cpf = cpf
+        self.senha = senha
+        self.sessoes = sessoes
+        self.http = CentralAssinanteHttp(
+            cpf, senha, conexoes=conexoes, sessoes=sessoes, base_url=base_url, metricas=metricas
+        )
+        self.metricas = self.http.metricas
+        self.opcoes_selenium = {
+            'headless': headless, 'pool': pool, 'seletores': seletores, 'base_url': base_url, 'capturas': capturas,
+            'metricas': self.metricas,
+        }
+        self.selenium = None
+        self.motor = 'http'
+        self.tempos = self.http.tempos
+
+    @property
+    def motivo_falha_login(self):
+        return (self.selenium or self.http).motivo_falha_login
+
+    def _para_selenium(self, motivo):
+        from ixc_pool import SessoesCpf
+
+        print(f"   → Caminho HTTP não serve ({motivo}); usando o navegador")
+        sessoes = self.sessoes
+        cookies = self.http.sessao.para_sessao()
+        if cookies:
+            # a sessão aberta por HTTP vale no navegador: o login não se repete
+            sessoes = sessoes if sessoes is not None else SessoesCpf()
+            sessoes.guardar(self.cpf, self.senha, cookies)
+        self.selenium = CentralAssinanteAutomacao(self.cpf, self.senha, sessoes=sessoes, **self.opcoes_selenium)
+        # a subida do navegador ('navegador') entra nos tempos desta consulta
+        self.tempos.update(self.selenium.tempos)
+        self.selenium.tempos = self.tempos
+        self.motor = 'selenium'
+        return self.selenium
+
+    def fazer_login(self):
+        if self.selenium is None:
+            try:
+                return self.http.fazer_login()
+            except PaginaNaoSuportada as e:
+                self._para_selenium(e)
+        return self.selenium.fazer_login()
+
+    def buscar_faturas_em_aberto(self):
+        if self.selenium is None:
+            try:
+                return self.http.buscar_faturas_em_aberto()
+            except PaginaNaoSuportada as e:
+                if not self._para_selenium(e).fazer_login():
+                    return []
+        return self.selenium.buscar_faturas_em_aberto()
+
+    def realizar_desbloqueio_confianca(self):
+        if self.selenium is None:
+            try:
+                return self.http.realizar_desbloqueio_confianca()
+            except PaginaNaoSuportada as e:
+                if not self._para_selenium(e).fazer_login():
+                    return False
+        return self.selenium.realizar_desbloqueio_confianca()
+
+    def encerrar(self):
+        self.http.encerrar()
+        if self.selenium is not None:
+            self.selenium.encerrar()
+
+
+def criar_automacao(motor, cpf, senha, **opcoes):
+    """
+    A automação de um assinante pelo motor escolhido: 'http' (só HTTP),
+    'selenium' (só navegador) ou 'auto' (HTTP com o navegador de reserva).
+    Opções que um motor não usa são ignoradas.
+    """
+    if motor == 'http':
+        return CentralAssinanteHttp(cpf, senha, **opcoes)
+    if motor == 'selenium':
+        opcoes.pop('conexoes', None)
+        return CentralAssinanteAutomacao(cpf, senha, **opcoes)
+    if motor == 'auto':
+        return CentralAssinanteHibrida(cpf, senha, **opcoes)
+    raise ValueError(f"motor desconhecido: {motor} (use {', '.join(MOTORES)})")
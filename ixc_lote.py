@@ -0,0 +1,320 @@
+"""
+Consulta de faturas em lote na Central do Assinante, sem interação.
+
+Lê as credenciais de um arquivo (ou da entrada padrão, com "-"), uma por
+linha, e roda login -> faturas em aberto -> (opcional) desbloqueio de
+confiança em até --trabalhadores consultas ao mesmo tempo. Pelo motor
+'auto' (padrão), login e faturas vão por HTTP e o Chrome headless só sobe
+para as páginas que o HTTP não lê e para o desbloqueio (ixc_http.py). O
+início das consultas respeita um limite por host do portal (--taxa), as
+falhas transitórias são tentadas de novo com espera crescente, e cada
+resultado sai como uma linha JSON assim que termina. Com --log-json, os
+tempos de cada etapa, espera e seletor saem num log JSON à parte, que o
+ixc_metricas.py resume e compara entre execuções.
+
+Formato das credenciais (linhas vazias e começadas por # são ignoradas):
+  12345678901;senha
+  12345678901,senha
+  {"cpf": "123.456.789-01", "senha": "senha"}
+
+Uso:
+  python ixc_lote.py cobranca.csv -o resultados.jsonl
+  cat cobranca.csv | python ixc_lote.py - --trabalhadores 4 --taxa 2 --desbloquear
+  python ixc_lote.py cobranca.csv --motor selenium
+  python ixc_lote.py cobranca.csv --log-json tempos.jsonl --metricas ixc.prom
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+import argparse
+import contextlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+
+from ixc_http import MOTORES, criar_automacao
+from ixc_metricas import LOG_PADRAO as LOG_METRICAS, Metricas, metricas_padrao
+from ixccentralassinante import BASE_URL
+from ixc_capturas import (
+    DEBUG_PADRAO as DEBUG_CAPTURAS,
+    DIRETORIO_PADRAO as DIRETORIO_CAPTURAS,
+    MAX_MB_PADRAO as MAX_MB_CAPTURAS,
+    GravadorCapturas,
+)
+from ixc_seletores import CAMINHO_PADRAO as CAMINHO_SELETORES, CacheSeletores
+
+TRABALHADORES_PADRAO = 2
+TAXA_PADRAO = 1.0
+TENTATIVAS_PADRAO = 3
+ESPERA_BASE = 2.0
+
+# Falhas de login que valem nova tentativa. 'credenciais' (senha recusada
+# pelo portal) e 'sem_resposta' (voltou para o login sem mensagem: a senha
+# pode ter sido recusada) não são repetidas, para não bloquear o acesso do
+# assinante
+FALHAS_TRANSITORIAS = ('pagina', 'excecao')
+
+
+class FalhaTransitoria(Exception):
+    pass
+
+
+class LimiteTaxa:
+    """
+    No máximo `por_segundo` inícios de consulta por host: cada início
+    reserva o próximo horário livre do host e dorme até ele.
+    """
+
+    def __init__(self, por_segundo):
+        self.intervalo = 1 / por_segundo if por_segundo else 0
+        self.lock = threading.Lock()
+        self.proximo = {}
+
+    def aguardar(self, host):
+        with self.lock:
+            agora = time.monotonic()
+            inicio = max(agora, self.proximo.get(host, agora))
+            self.proximo[host] = inicio + self.intervalo
+        if inicio > agora:
+            time.sleep(inicio - agora)
+
+
+def ler_credenciais(linhas):
+    """(número da linha, cpf só com dígitos, senha) de cada linha útil."""
+    for numero, linha in enumerate(linhas, 1):
+        linha = linha.strip()
+        if not linha or linha.startswith('#'):
+            continue
+        if linha.startswith('{'):
+            try:
+                dados = json.loads(linha)
+            except ValueError:
+                dados = {}
+            cpf, senha = str(dados.get('cpf', '')), str(dados.get('senha', ''))
+        else:
+            partes = re.split(r'[;\t,]', linha, maxsplit=1)
+            cpf, senha = partes[0], partes[1] if len(partes) > 1 else ''
+        yield numero, ''.join(filter(str.isdigit, cpf)), senha
+
+
+def consulta_portal(motor='auto', **opcoes):
+    """
+    Consulta de um assinante pelo motor escolhido (ver ixc_http.criar_automacao);
+    `opcoes` vão para a automação (pool, sessoes, seletores, conexoes, base_url,
+    metricas).
+    """
+    def consultar(cpf, senha, desbloquear):
+        automacao = criar_automacao(motor, cpf, senha, **opcoes)
+        try:
+            with automacao.medir_etapa('login') as etapa:
+                logado = automacao.fazer_login()
+                if not logado:
+                    etapa.resultado = automacao.motivo_falha_login or 'falhou'
+            if not logado:
+                if automacao.motivo_falha_login in FALHAS_TRANSITORIAS:
+                    raise FalhaTransitoria(f"login: {automacao.motivo_falha_login}")
+                return {'status': 'login_recusado'}
+
+            with automacao.medir_etapa('faturas'):
+                faturas = automacao.buscar_faturas_em_aberto()
+            resultado = {'status': 'ok', 'faturas': faturas, 'motor': automacao.motor}
+            if desbloquear and faturas:
+                with automacao.medir_etapa('desbloqueio') as etapa:
+                    resultado['desbloqueio'] = automacao.realizar_desbloqueio_confianca()
+                    if not resultado['desbloqueio']:
+                        etapa.resultado = 'falhou'
+            return resultado
+        finally:
+            automacao.encerrar()
+    return consultar
+
+
+def _com_tentativas(consultar, limite, metricas, host, numero, cpf, senha, desbloquear, tentativas):
+    resultado = {'linha': numero, 'cpf': cpf}
+    inicio = time.perf_counter()
+    for tentativa in range(1, tentativas + 1):
+        limite.aguardar(host)
+        try:
+            resultado.update(consultar(cpf, senha, desbloquear))
+            resultado.pop('erro', None)
+            break
+        except Exception as e:
+            resultado.update(status='erro', erro=str(e) or type(e).__name__)
+            if tentativa < tentativas:
+                # espera crescente com variação, para as novas tentativas não chegarem juntas
+                time.sleep(ESPERA_BASE * 2 ** (tentativa - 1) * random.uniform(0.5, 1.5))
+    segundos = time.perf_counter() - inicio
+    metricas.registrar('consulta', segundos, resultado['status'], tentativa)
+    resultado['tentativas'] = tentativa
+    resultado['segundos'] = round(segundos, 2)
+    return resultado
+
+
+def executar_lote(credenciais, saida, consultar, trabalhadores=TRABALHADORES_PADRAO, taxa=TAXA_PADRAO,
+                  tentativas=TENTATIVAS_PADRAO, desbloquear=False, host=None, metricas=None):
+    """
+    Roda `consultar(cpf, senha, desbloquear)` para cada credencial em até
+    `trabalhadores` threads e grava cada resultado em `saida` como uma
+    linha JSON, na ordem em que terminam. As credenciais são lidas aos
+    poucos (no máximo 2 por trabalhador em espera), então uma entrada
+    padrão longa não é carregada inteira. Devolve a contagem por status.
+    Cada consulta, com as tentativas, é um span 'consulta' em `metricas`.
+    """
+    host = host or urlsplit(BASE_URL).hostname
+    metricas = metricas if metricas is not None else metricas_padrao()
+    limite = LimiteTaxa(taxa)
+    contagem = {}
+    lock = threading.Lock()
+
+    def gravar(resultado):
+        with lock:
+            contagem[resultado['status']] = contagem.get(resultado['status'], 0) + 1
+            saida.write(json.dumps(resultado, ensure_ascii=False) + '\n')
+            saida.flush()
+
+    with ThreadPoolExecutor(max_workers=trabalhadores) as executor:
+        pendentes = set()
+        for numero, cpf, senha in credenciais:
+            if len(cpf) != 11 or not senha:
+                gravar({'linha': numero, 'cpf': cpf, 'status': 'invalido', 'erro': 'CPF com 11 dígitos e senha são obrigatórios'})
+                continue
+            pendentes.add(executor.submit(
+                _com_tentativas, consultar, limite, metricas, host, numero, cpf, senha, desbloquear, tentativas
+            ))
+            if len(pendentes) >= 2 * trabalhadores:
+                feitos, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+                for futuro in feitos:
+                    gravar(futuro.result())
+        for futuro in pendentes:
+            gravar(futuro.result())
+    return contagem
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consulta faturas em aberto de vários assinantes, em paralelo.")
+    parser.add_argument("credenciais", help="arquivo com cpf;senha por linha, ou - para ler da entrada padrão")
+    parser.add_argument("-o", "--saida", default="-", help="arquivo JSONL dos resultados (padrão: saída padrão)")
+    parser.add_argument(
+        "--trabalhadores",
+        type=int,
+        default=TRABALHADORES_PADRAO,
+        help=f"navegadores em paralelo (padrão: {TRABALHADORES_PADRAO})",
+    )
+    parser.add_argument(
+        "--taxa",
+        type=float,
+        default=TAXA_PADRAO,
+        help=f"máximo de consultas iniciadas por segundo no portal (padrão: {TAXA_PADRAO:g}; 0 = sem limite)",
+    )
+    parser.add_argument(
+        "--tentativas",
+        type=int,
+        default=TENTATIVAS_PADRAO,
+        help=f"tentativas por assinante em falhas transitórias (padrão: {TENTATIVAS_PADRAO})",
+    )
+    parser.add_argument(
+        "--motor",
+        choices=MOTORES,
+        default='auto',
+        help="auto: HTTP com o Chrome de reserva (padrão); http: só HTTP; selenium: só Chrome",
+    )
+    parser.add_argument("--base-url", default=BASE_URL, help="endereço da Central do Assinante (padrão: o portal real)")
+    parser.add_argument("--desbloquear", action="store_true", help="faz o desbloqueio de confiança de quem tem fatura em aberto")
+    parser.add_argument("--sessoes", help="arquivo para guardar as sessões entre execuções (login reaproveitado)")
+    parser.add_argument(
+        "--seletores",
+        default=CAMINHO_SELETORES,
+        help=f"arquivo do ranking de seletores do portal (padrão: {CAMINHO_SELETORES})",
+    )
+    parser.add_argument(
+        "--capturas",
+        default=DIRETORIO_CAPTURAS,
+        help=f"pasta das capturas de tela das falhas (padrão: {DIRETORIO_CAPTURAS})",
+    )
+    parser.add_argument(
+        "--capturas-max-mb",
+        type=float,
+        default=MAX_MB_CAPTURAS,
+        help=f"tamanho máximo da pasta de capturas (padrão: {MAX_MB_CAPTURAS})",
+    )
+    parser.add_argument("--debug-capturas", action="store_true", help="grava as capturas de todas as etapas, não só das falhas")
+    parser.add_argument("--max-usos", type=int, default=50, help="consultas por navegador antes de reciclar (padrão: 50)")
+    parser.add_argument(
+        "--log-json",
+        default=LOG_METRICAS,
+        help="log JSON com o tempo de cada etapa, espera e seletor (resumo: python ixc_metricas.py ARQUIVO)",
+    )
+    parser.add_argument("--metricas", help="grava no fim as métricas no formato do Prometheus neste arquivo")
+    args = parser.parse_args()
+
+    from ixc_http import ConexoesHttp
+    from ixc_pool import PoolNavegadores, SessoesCpf
+
+    entrada = sys.stdin if args.credenciais == '-' else open(args.credenciais, encoding='utf-8')
+    saida = sys.stdout if args.saida == '-' else open(args.saida, 'a', encoding='utf-8')
+    # no motor 'auto' o Chrome só sobe se alguma consulta precisar dele
+    pool = None if args.motor == 'http' else PoolNavegadores(
+        tamanho=args.trabalhadores, headless=True, max_usos=args.max_usos,
+        url_aquecimento=f"{args.base_url.rstrip('/')}/login", aquecer=args.motor == 'selenium',
+    )
+    metricas = Metricas(log=args.log_json)
+    conexoes = ConexoesHttp(por_host=args.trabalhadores, metricas=metricas)
+    seletores = CacheSeletores(args.seletores)
+    capturas = GravadorCapturas(
+        args.capturas, max_mb=args.capturas_max_mb, debug=args.debug_capturas or DEBUG_CAPTURAS
+    )
+    inicio = time.perf_counter()
+    try:
+        # as mensagens da automação vão para stderr; stdout fica só com o JSONL
+        with contextlib.redirect_stdout(sys.stderr):
+            contagem = executar_lote(
+                ler_credenciais(entrada),
+                saida,
+                consulta_portal(
+                    args.motor,
+                    pool=pool,
+                    sessoes=SessoesCpf(args.sessoes) if args.sessoes else None,
+                    seletores=seletores,
+                    capturas=capturas,
+                    conexoes=conexoes,
+                    base_url=args.base_url,
+                    metricas=metricas,
+                ),
+                trabalhadores=args.trabalhadores,
+                taxa=args.taxa,
+                tentativas=args.tentativas,
+                desbloquear=args.desbloquear,
+                host=urlsplit(args.base_url).hostname,
+                metricas=metricas,
+            )
+    except KeyboardInterrupt:
+        print("\n✗ Lote interrompido.", file=sys.stderr)
+        sys.exit(130)
+    finally:
+        if pool is not None:
+            pool.fechar()
+        conexoes.fechar()
+        metricas.fechar()
+        if args.metricas:
+            metricas.salvar_prometheus(args.metricas)
+        if entrada is not sys.stdin:
+            entrada.close()
+        if saida is not sys.stdout:
+            saida.close()
+
+    segundos = time.perf_counter() - inicio
+    total = sum(contagem.values())
+    por_status = ', '.join(f"{status}: {n}" for status, n in sorted(contagem.items()))
+    print(
+        f"✔ {total} assinante(s) em {segundos:.1f} s ({total / segundos * 60:.1f}/min) — {por_status or 'nenhum'}",
+        file=sys.stderr,
+    )
+    seletores.imprimir_estatisticas(sys.stderr)
+    sys.exit(1 if contagem.get('erro') else 0)
+
+
+if __name__ == "__main__":
+    main()
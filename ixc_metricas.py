@@ -0,0 +1,319 @@
+"""
+Métricas e rastreamento da automação da Central do Assinante.
+
+Com só os banners do print() não dava para saber se a lentidão vinha da
+subida do Chrome, do login, da leitura das faturas ou das esperas do pop-up
+de desbloqueio. Agora cada trecho medido vira um span, com nome, rótulos
+(etapa, motor, seletor...), duração, resultado e tentativas, que:
+
+- entra num histograma de latência e nos contadores de resultado,
+  expostos no formato texto do Prometheus (GET /metricas no
+  ixc_servico.py; --metricas no ixc_lote.py grava o arquivo no fim);
+- sai como uma linha JSON no log estruturado, quando há um (--log-json,
+  ou IXC_METRICAS_LOG com um caminho, "-" para stderr).
+
+Spans:
+  etapa       navegador, login, faturas, desbloqueio, encerramento (motor)
+  espera      cada espera do Selenium (etapa, condicao; 'timeout' quando esgota)
+  seletor     cada procura de elemento (elemento, estrategia = o seletor que achou;
+              tentativas = a posição dele no ranking; 'trocou' se não foi o primeiro)
+  estrategia  as estratégias do desbloqueio de confiança
+  http        cada requisição do motor HTTP (tentativas > 1: a conexão reaproveitada caiu)
+  consulta    uma consulta do ixc_lote.py, com as tentativas
+  pedido      um pedido do ixc_servico.py (tipo, origem: portal, cache ou agrupado)
+  fila        quanto um pedido do ixc_servico.py esperou na fila
+
+Modo relatório, para comparar execuções antes e depois de uma mudança:
+  python ixc_lote.py cobranca.csv --log-json antes.jsonl
+  ... a mudança ...
+  python ixc_lote.py cobranca.csv --log-json depois.jsonl
+  python ixc_metricas.py antes.jsonl                      # resumo de uma execução
+  python ixc_metricas.py antes.jsonl depois.jsonl         # comparação
+  python ixc_metricas.py depois.jsonl -o base.json        # guarda o resumo para comparar depois
+"""
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+import time
+
+# Limites dos baldes do histograma, em segundos: de um seletor achado na
+# hora (ms) a um login lento no portal (dezenas de segundos)
+LIMITES_PADRAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+LOG_PADRAO = os.environ.get("IXC_METRICAS_LOG") or None
+PREFIXO = "ixc"
+
+# Resultados que contam como sucesso na taxa ('trocou': o elemento foi
+# achado, só que por um seletor que não era o preferido)
+SUCESSOS = ('ok', 'trocou')
+
+# Campos da linha do log que não são rótulos
+CAMPOS_LOG = ('ts', 'span', 'resultado', 'ms', 'tentativas')
+
+
+class Span:
+    """Um trecho em medição; o bloco medido pode mudar o resultado, as tentativas e os rótulos."""
+
+    def __init__(self, nome, rotulos):
+        self.nome = nome
+        self.rotulos = rotulos
+        self.resultado = 'ok'
+        self.tentativas = 1
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _rotulos_prometheus(pares):
+    return '{' + ','.join(f'{nome}="{_escapar(valor)}"' for nome, valor in pares) + '}'
+
+
+class Metricas:
+    """
+    Histogramas e contadores dos spans, em memória, e o log JSON opcional.
+    Uma instância serve a todas as consultas do processo (inclusive em threads).
+    """
+
+    def __init__(self, log=LOG_PADRAO, limites=LIMITES_PADRAO):
+        self.limites = tuple(limites)
+        self.log = log
+        self.arquivo_log = None
+        self.histogramas = {}        # (nome, rótulos) -> {'baldes': [...], 'soma': s}
+        self.resultados = {}         # (nome, rótulos, resultado) -> n
+        self.novas_tentativas = {}   # (nome, rótulos) -> tentativas além da primeira
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def medir(self, nome, /, **rotulos):
+        """Mede o bloco como um span `nome`; uma exceção que escapa vira o resultado 'excecao'."""
+        span = Span(nome, rotulos)
+        inicio = time.perf_counter()
+        try:
+            yield span
+        except BaseException:
+            if span.resultado == 'ok':
+                span.resultado = 'excecao'
+            raise
+        finally:
+            self.registrar(nome, time.perf_counter() - inicio, span.resultado, span.tentativas, **span.rotulos)
+
+    def registrar(self, nome, segundos, resultado='ok', tentativas=1, /, **rotulos):
+        """Um span já medido."""
+        chave = (nome, tuple(sorted((k, str(v)) for k, v in rotulos.items())))
+        with self.lock:
+            histograma = self.histogramas.get(chave)
+            if histograma is None:
+                histograma = self.histogramas[chave] = {'baldes': [0] * (len(self.limites) + 1), 'soma': 0.0}
+            histograma['baldes'][bisect_left(self.limites, segundos)] += 1
+            histograma['soma'] += segundos
+            self.resultados[chave + (resultado,)] = self.resultados.get(chave + (resultado,), 0) + 1
+            if tentativas > 1:
+                self.novas_tentativas[chave] = self.novas_tentativas.get(chave, 0) + tentativas - 1
+            if self.log:
+                self._escrever({
+                    'ts': datetime.now().isoformat(timespec='milliseconds'),
+                    'span': nome,
+                    **rotulos,
+                    'resultado': resultado,
+                    'ms': round(segundos * 1000, 1),
+                    'tentativas': tentativas,
+                })
+
+    def _escrever(self, registro):
+        # chamado com o lock: as linhas de threads diferentes não se misturam
+        try:
+            if self.arquivo_log is None:
+                self.arquivo_log = sys.stderr if self.log == '-' else open(self.log, 'a', encoding='utf-8')
+            self.arquivo_log.write(json.dumps(registro, ensure_ascii=False, default=str) + '\n')
+            self.arquivo_log.flush()
+        except OSError as e:
+            print(f"   → Log de métricas desligado ({e})", file=sys.stderr)
+            self.log = None
+
+    def prometheus(self, medidores=None):
+        """
+        Tudo no formato texto do Prometheus. `medidores` ({nome: valor})
+        entram como gauges (a fila do serviço, por exemplo).
+        """
+        with self.lock:
+            histogramas = {chave: (list(h['baldes']), h['soma']) for chave, h in self.histogramas.items()}
+            resultados = dict(self.resultados)
+            novas_tentativas = dict(self.novas_tentativas)
+
+        linhas = [
+            f"# HELP {PREFIXO}_duracao_segundos Duração dos trechos medidos da automação IXC.",
+            f"# TYPE {PREFIXO}_duracao_segundos histogram",
+        ]
+        for (nome, rotulos), (baldes, soma) in sorted(histogramas.items()):
+            pares = (('span', nome),) + rotulos
+            acumulado = 0
+            for limite, quantos in zip(self.limites + (math.inf,), baldes):
+                acumulado += quantos
+                le = '+Inf' if limite == math.inf else f"{limite:g}"
+                linhas.append(f"{PREFIXO}_duracao_segundos_bucket{_rotulos_prometheus(pares + (('le', le),))} {acumulado}")
+            linhas.append(f"{PREFIXO}_duracao_segundos_sum{_rotulos_prometheus(pares)} {soma:.6f}")
+            linhas.append(f"{PREFIXO}_duracao_segundos_count{_rotulos_prometheus(pares)} {acumulado}")
+
+        linhas += [
+            f"# HELP {PREFIXO}_resultados_total Trechos medidos por resultado (sucesso: {', '.join(SUCESSOS)}).",
+            f"# TYPE {PREFIXO}_resultados_total counter",
+        ]
+        for (nome, rotulos, resultado), quantos in sorted(resultados.items()):
+            pares = (('span', nome),) + rotulos + (('resultado', resultado),)
+            linhas.append(f"{PREFIXO}_resultados_total{_rotulos_prometheus(pares)} {quantos}")
+
+        linhas += [
+            f"# HELP {PREFIXO}_novas_tentativas_total Tentativas além da primeira.",
+            f"# TYPE {PREFIXO}_novas_tentativas_total counter",
+        ]
+        for (nome, rotulos), quantos in sorted(novas_tentativas.items()):
+            linhas.append(f"{PREFIXO}_novas_tentativas_total{_rotulos_prometheus((('span', nome),) + rotulos)} {quantos}")
+
+        for nome, valor in (medidores or {}).items():
+            linhas.append(f"# TYPE {PREFIXO}_{nome} gauge")
+            linhas.append(f"{PREFIXO}_{nome} {valor}")
+        return '\n'.join(linhas) + '\n'
+
+    def salvar_prometheus(self, caminho):
+        """Grava prometheus() de uma vez (para o coletor de arquivos de texto do node_exporter)."""
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        with open(temporario, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus())
+        os.replace(temporario, caminho)
+
+    def fechar(self):
+        with self.lock:
+            if self.arquivo_log not in (None, sys.stderr):
+                self.arquivo_log.close()
+            self.arquivo_log = None
+
+
+_metricas_padrao = None
+_lock_padrao = threading.Lock()
+
+
+def metricas_padrao():
+    """As métricas compartilhadas das automações criadas sem `metricas`."""
+    global _metricas_padrao
+    with _lock_padrao:
+        if _metricas_padrao is None:
+            _metricas_padrao = Metricas()
+        return _metricas_padrao
+
+
+# --- modo relatório ---
+
+def _percentil(ordenados, p):
+    # nearest-rank: um valor que de fato aconteceu
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+
+def _trecho(registro):
+    rotulos = ' '.join(f"{k}={v}" for k, v in sorted(registro.items()) if k not in CAMPOS_LOG)
+    return f"{registro['span']} {rotulos}".strip()
+
+
+def resumir(registros):
+    """{trecho: n, sucesso, p50_ms, p95_ms, max_ms, total_ms, novas_tentativas} a partir das linhas do log."""
+    por_trecho = {}
+    for registro in registros:
+        por_trecho.setdefault(_trecho(registro), []).append(registro)
+    resumo = {}
+    for trecho, lista in sorted(por_trecho.items()):
+        duracoes = sorted(r['ms'] for r in lista)
+        resumo[trecho] = {
+            'n': len(lista),
+            'sucesso': round(sum(r['resultado'] in SUCESSOS for r in lista) / len(lista), 4),
+            'p50_ms': _percentil(duracoes, 50),
+            'p95_ms': _percentil(duracoes, 95),
+            'max_ms': duracoes[-1],
+            'total_ms': round(sum(duracoes), 1),
+            'novas_tentativas': sum(r.get('tentativas', 1) - 1 for r in lista),
+        }
+    return resumo
+
+
+def carregar(caminho, span=None):
+    """O resumo de um log JSONL ou de um resumo gravado com -o; `span` filtra pelo nome."""
+    with open(caminho, encoding='utf-8') as f:
+        conteudo = f.read()
+    try:
+        dados = json.loads(conteudo)
+    except ValueError:
+        dados = None
+    if isinstance(dados, dict) and 'trechos' in dados:
+        resumo = dados['trechos']
+    else:
+        registros = [json.loads(linha) for linha in conteudo.splitlines() if linha.strip()]
+        resumo = resumir(registros)
+    if span:
+        resumo = {trecho: r for trecho, r in resumo.items() if trecho.split(' ', 1)[0] == span}
+    return resumo
+
+
+def imprimir_resumo(resumo):
+    print(f"{'trecho':<52} {'n':>6} {'sucesso':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'máx (ms)':>9} {'tentativas+':>11}")
+    for trecho, r in resumo.items():
+        print(
+            f"{trecho[:52]:<52} {r['n']:>6} {r['sucesso']:>8.1%} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} "
+            f"{r['max_ms']:>9.1f} {r['novas_tentativas']:>11}"
+        )
+
+
+def _variacao(antes, depois):
+    if not antes:
+        return '-'
+    return f"{(depois - antes) / antes:+.0%}"
+
+
+def imprimir_comparacao(antes, depois):
+    print(
+        f"{'trecho':<52} {'p50 antes':>9} {'depois':>9} {'Δ':>6} {'p95 antes':>9} {'depois':>9} {'Δ':>6} "
+        f"{'sucesso':>15}"
+    )
+    for trecho in sorted(set(antes) | set(depois)):
+        a, d = antes.get(trecho), depois.get(trecho)
+        if a is None or d is None:
+            # trecho que só aparece numa das execuções (etapa nova ou que deixou de existir)
+            so = 'só depois' if a is None else 'só antes'
+            print(f"{trecho[:52]:<52} {so:>9} (n={(a or d)['n']})")
+            continue
+        print(
+            f"{trecho[:52]:<52} {a['p50_ms']:>9.1f} {d['p50_ms']:>9.1f} {_variacao(a['p50_ms'], d['p50_ms']):>6} "
+            f"{a['p95_ms']:>9.1f} {d['p95_ms']:>9.1f} {_variacao(a['p95_ms'], d['p95_ms']):>6} "
+            f"{a['sucesso']:>6.1%} → {d['sucesso']:>6.1%}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Resumo de um log de métricas da automação IXC, ou comparação entre dois (antes e depois)."
+    )
+    parser.add_argument("logs", nargs='+', metavar="log", help="log JSONL (--log-json) ou resumo gravado com -o; dois para comparar")
+    parser.add_argument("--span", help="só os trechos deste span (etapa, seletor, espera, http...)")
+    parser.add_argument("-o", "--saida", help="grava o resumo do último log em JSON (serve de 'antes' numa próxima comparação)")
+    args = parser.parse_args()
+    if len(args.logs) > 2:
+        parser.error("no máximo dois logs: antes e depois")
+
+    resumos = [carregar(caminho, args.span) for caminho in args.logs]
+    if len(resumos) == 1:
+        imprimir_resumo(resumos[0])
+    else:
+        imprimir_comparacao(*resumos)
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump({'origem': args.logs[-1], 'trechos': resumos[-1]}, f, indent=1, ensure_ascii=False)
+        print(f"\n📁 Resumo: {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
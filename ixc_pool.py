@@ -0,0 +1,272 @@
+"""
+Pool de navegadores aquecidos e sessões reaproveitadas para a automação da
+Central do Assinante (ixccentralassinante.py).
+
+Subir o Chrome e fazer login é a maior parte do tempo de cada consulta. O
+pool mantém drivers headless já abertos na página de login (DNS, TLS e
+cache do portal prontos), entrega um por consulta e recebe de volta. Antes
+de entregar, o driver passa por uma verificação de saúde; depois de
+max_usos consultas (ou se travar) é fechado e trocado por um novo, para a
+memória do Chrome não crescer sem limite.
+
+As sessões (cookies) de cada CPF ficam guardadas até expirarem, e a próxima
+consulta do mesmo CPF pula o fazer_login.
+
+Uso:
+    pool = PoolNavegadores(tamanho=2)
+    sessoes = SessoesCpf('/var/lib/ixc/sessoes.json')   # sessão presa à senha do login
+    automacao = CentralAssinanteAutomacao(cpf, senha, pool=pool, sessoes=sessoes)
+    if automacao.fazer_login():
+        faturas = automacao.buscar_faturas_em_aberto()
+    automacao.encerrar()   # devolve o navegador ao pool
+    pool.fechar()
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from ixccentralassinante import LOGIN_URL, criar_driver
+
+TAMANHO_PADRAO = 2
+MAX_USOS_PADRAO = 50
+TIMEOUT_OBTER = 60
+# Espera antes de tentar de novo subir um Chrome que falhou, dobrando a cada falha (s)
+ESPERA_REINICIO = 1.0
+ESPERA_REINICIO_MAX = 60.0
+
+# Tempo que uma sessão guardada vale, se os próprios cookies não expirarem antes (s)
+VALIDADE_SESSAO_PADRAO = 20 * 60
+
+
+class SessoesCpf:
+    """
+    Cookies do último login de cada CPF, com validade. Com `caminho`, ficam
+    também num arquivo JSON (permissão 0600: são credenciais de sessão) e
+    sobrevivem a um reinício do processo.
+
+    A sessão fica presa à senha do login que a abriu (só um hash com sal é
+    guardado): quem pede pelo mesmo CPF com outra senha não a recebe, e o
+    login de verdade decide.
+    """
+
+    def __init__(self, caminho=None, validade=VALIDADE_SESSAO_PADRAO):
+        self.caminho = caminho
+        self.validade = validade
+        self.lock = threading.Lock()
+        self.sessoes = {}
+        if caminho and os.path.exists(caminho):
+            try:
+                with open(caminho, encoding='utf-8') as f:
+                    self.sessoes = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"   → Sessões guardadas ignoradas ({e})")
+
+    def _verificador(self, cpf, senha, sal):
+        return hashlib.pbkdf2_hmac('sha256', f"{cpf}:{senha}".encode('utf-8'), bytes.fromhex(sal), 10_000).hex()
+
+    def obter(self, cpf, senha):
+        """Cookies ainda válidos do CPF, se abertos com esta senha; senão None."""
+        with self.lock:
+            sessao = self.sessoes.get(cpf)
+            if sessao is None:
+                return None
+            if sessao['expira'] <= time.time():
+                del self.sessoes[cpf]
+                return None
+            verificador = sessao.get('verificador')
+        if verificador is None or not hmac.compare_digest(verificador, self._verificador(cpf, senha, sessao['sal'])):
+            return None
+        return sessao['cookies']
+
+    def guardar(self, cpf, senha, cookies):
+        expira = time.time() + self.validade
+        # Um cookie que expira antes encurta a validade da sessão inteira
+        for cookie in cookies:
+            if 'expiry' in cookie:
+                expira = min(expira, cookie['expiry'])
+        sal = os.urandom(16).hex()
+        verificador = self._verificador(cpf, senha, sal)
+        with self.lock:
+            self.sessoes[cpf] = {'expira': expira, 'cookies': cookies, 'sal': sal, 'verificador': verificador}
+            self._salvar()
+
+    def invalidar(self, cpf):
+        with self.lock:
+            if self.sessoes.pop(cpf, None) is not None:
+                self._salvar()
+
+    def _salvar(self):
+        if not self.caminho:
+            return
+        agora = time.time()
+        self.sessoes = {cpf: s for cpf, s in self.sessoes.items() if s['expira'] > agora}
+        temporario = f"{self.caminho}.{os.getpid()}.tmp"
+        fd = os.open(temporario, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self.sessoes, f)
+        os.replace(temporario, self.caminho)
+
+
+class PoolNavegadores:
+    """
+    Drivers do Chrome já abertos, entregues por obter() e recebidos por
+    devolver(). Os drivers novos sobem em segundo plano, então o primeiro
+    obter() só espera o Chrome que estiver mais perto de ficar pronto. Com
+    aquecer=False, nenhum Chrome sobe até o primeiro obter() (para quem só
+    usa o navegador de reserva, como o motor 'auto' de ixc_http.py).
+    """
+
+    def __init__(self, tamanho=TAMANHO_PADRAO, headless=True, max_usos=MAX_USOS_PADRAO, url_aquecimento=LOGIN_URL,
+                 aquecer=True):
+        self.tamanho = tamanho
+        self.headless = headless
+        self.max_usos = max_usos
+        self.url_aquecimento = url_aquecimento
+        self.livres = queue.Queue()
+        self.usos = {}
+        self.lock = threading.Lock()
+        self.fechado = False
+        self.estatisticas = {'iniciados': 0, 'reciclados': 0, 'doentes': 0, 'falhas_inicio': 0}
+        self.aquecido = False
+
+        if aquecer:
+            self._aquecer()
+
+    def _aquecer(self):
+        with self.lock:
+            if self.aquecido:
+                return
+            self.aquecido = True
+        for _ in range(self.tamanho):
+            self._repor()
+
+    def _repor(self, falhas=0, espera=0):
+        temporizador = threading.Timer(espera, self._iniciar, args=(falhas,))
+        temporizador.daemon = True
+        temporizador.start()
+
+    def _iniciar(self, falhas=0):
+        if self.fechado:
+            return
+        try:
+            driver = criar_driver(self.headless)
+        except Exception as e:
+            with self.lock:
+                self.estatisticas['falhas_inicio'] += 1
+                repor = not self.fechado
+            if repor:
+                # a vaga não fica perdida: tenta de novo, cada vez esperando mais
+                espera = min(ESPERA_REINICIO * 2 ** falhas, ESPERA_REINICIO_MAX)
+                print(f"   ✗ Pool: não foi possível subir o Chrome ({e}); nova tentativa em {espera:.0f} s")
+                self._repor(falhas + 1, espera)
+            return
+
+        if self.url_aquecimento:
+            try:
+                driver.get(self.url_aquecimento)
+            except Exception:
+                pass
+
+        with self.lock:
+            self.estatisticas['iniciados'] += 1
+            if not self.fechado:
+                self.usos[driver] = 0
+                self.livres.put(driver)
+                return
+        driver.quit()
+
+    def _saudavel(self, driver):
+        try:
+            driver.execute_script("return document.readyState")
+            return len(driver.window_handles) > 0
+        except Exception:
+            return False
+
+    def _limpar(self, driver):
+        # A próxima consulta pode ser de outro CPF: nada da sessão anterior
+        # pode ficar no navegador
+        try:
+            try:
+                driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+            except Exception:
+                driver.delete_all_cookies()
+            driver.execute_script("try { localStorage.clear(); sessionStorage.clear(); } catch (e) {}")
+            driver.get(self.url_aquecimento or 'about:blank')
+            return True
+        except Exception:
+            return False
+
+    def _descartar(self, driver, motivo):
+        with self.lock:
+            self.usos.pop(driver, None)
+            self.estatisticas[motivo] += 1
+            repor = not self.fechado
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        if repor:
+            self._repor()
+
+    def obter(self, timeout=TIMEOUT_OBTER):
+        """Um driver livre e saudável; TimeoutError se nenhum ficar livre em `timeout` s."""
+        self._aquecer()
+        limite = time.monotonic() + timeout
+        while True:
+            if self.fechado:
+                raise RuntimeError("pool de navegadores fechado")
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                raise TimeoutError(f"nenhum navegador livre em {timeout} s")
+            try:
+                driver = self.livres.get(timeout=restante)
+            except queue.Empty:
+                continue
+            if self._saudavel(driver):
+                return driver
+            self._descartar(driver, 'doentes')
+
+    def devolver(self, driver):
+        with self.lock:
+            self.usos[driver] = self.usos.get(driver, 0) + 1
+            esgotado = self.usos[driver] >= self.max_usos
+        if esgotado or self.fechado:
+            self._descartar(driver, 'reciclados')
+        elif not self._limpar(driver):
+            self._descartar(driver, 'doentes')
+        else:
+            self.livres.put(driver)
+
+    @contextmanager
+    def navegador(self, timeout=TIMEOUT_OBTER):
+        driver = self.obter(timeout)
+        try:
+            yield driver
+        finally:
+            self.devolver(driver)
+
+    def fechar(self):
+        """Fecha os drivers livres; os emprestados são fechados quando voltarem."""
+        with self.lock:
+            self.fechado = True
+        while True:
+            try:
+                driver = self.livres.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
@@ -0,0 +1,332 @@
+"""
+Central do Assinante de mentira, servida localmente, para testar e comparar
+os motores da automação sem acessar o portal de verdade.
+
+Reproduz o que a automação usa do portal: o formulário de login (com token
+de formulário e cookie de sessão), a mensagem de senha inválida, a página
+principal com a tabela de faturas e o card de contratos no mesmo caminho
+CSS do botão de desbloqueio, e o pop-up de confirmação do desbloqueio.
+Com --js, a tabela de faturas é preenchida por JavaScript depois que a
+página carrega, como nas telas em que só o navegador consegue ler.
+
+Uso:
+  python ixc_portal_local.py --assinantes 20
+  python ixc_portal_local.py --porta 8765 --latencia 80 --js
+
+Os assinantes gerados têm CPF 10000000000, 10000000001, ... e senha
+"senha"; o CPF e a base_url de cada um são impressos na partida.
+"""
+
+from datetime import date, timedelta
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import argparse
+import html
+import json
+import random
+import secrets
+import threading
+import time
+
+PREFIXO = "/central_assinante_web"
+SENHA_PADRAO = "senha"
+ASSINANTES_PADRAO = 10
+PORTA_PADRAO = 8765
+
+SITUACOES = {'em_aberto': 'Em aberto', 'vencida': 'Vencida', 'paga': 'Paga'}
+
+
+def gerar_assinantes(quantidade, semente=42):
+    """
+    {cpf: {'senha', 'nome', 'contrato', 'bloqueado', 'faturas'}}, com 0 a 3
+    faturas (uma delas às vezes já paga) e ~1/3 dos contratos bloqueados.
+    """
+    rng = random.Random(semente)
+    hoje = date.today()
+    assinantes = {}
+    for i in range(quantidade):
+        faturas = []
+        for j in range(rng.randint(0, 3)):
+            vencimento = hoje + timedelta(days=rng.randint(-60, 25))
+            situacao = rng.choice(['paga', 'aberta', 'aberta'])
+            if situacao == 'aberta':
+                situacao = 'vencida' if vencimento < hoje else 'em_aberto'
+            faturas.append({
+                'id': str(40000 + i * 10 + j),
+                'emissao': (vencimento - timedelta(days=20)).isoformat(),
+                'vencimento': vencimento.isoformat(),
+                'valor': round(rng.uniform(49.9, 1899.9), 2),
+                'status': situacao,
+            })
+        assinantes[f"{10000000000 + i}"] = {
+            'senha': SENHA_PADRAO,
+            'nome': f"Assinante {i + 1}",
+            'contrato': str(900 + i),
+            'bloqueado': rng.random() < 0.35,
+            'faturas': faturas,
+        }
+    return assinantes
+
+
+def _data_br(iso):
+    return date.fromisoformat(iso).strftime('%d/%m/%Y')
+
+
+def _valor_br(valor):
+    return f"R$ {valor:,.2f}".replace(',', '_').replace('.', ',').replace('_', '.')
+
+
+PAGINA = """<!DOCTYPE html>
+<html lang="pt-br"><head><meta charset="utf-8"><title>Central do Assinante</title>
+<style>.modal {{ position: fixed; top: 30%; left: 30%; background: #fff; border: 1px solid #999; padding: 20px; }}</style>
+</head><body>
+{corpo}
+</body></html>
+"""
+
+LOGIN = """<div class="login-box">
+  <h2>Central do Assinante</h2>
+  {erro}
+  <form method="post" action="login">
+    <input type="hidden" name="_token" value="{token}">
+    <input type="text" name="login" placeholder="CPF" autocomplete="username">
+    <input type="password" name="senha" placeholder="Senha" autocomplete="current-password">
+    <button type="submit">ENTRAR</button>
+  </form>
+</div>"""
+
+# O card de contratos é o terceiro filho, como no seletor do desbloqueio em
+# ixccentralassinante.py (SELETORES_DESBLOQUEIO)
+HOME = """<div id="home_central"><div class="content"><div><div><div>
+  <div class="card-boas-vindas"><div class="card"><div class="card-content"><h3>Olá, {nome}</h3></div></div></div>
+  <div class="card-faturas"><div class="card"><div class="card-title">Faturas</div><div class="card-content">
+    <table class="table">
+      <thead><tr><th>Fatura</th><th>Emissão</th><th>Vencimento</th><th>Valor</th><th>Situação</th></tr></thead>
+      <tbody id="faturas">{faturas}</tbody>
+    </table>
+    {sem_faturas}
+  </div></div></div>
+  <div class="card-contratos"><div class="card panel"><div class="card-content">
+    <table class="table"><tbody><tr>
+      <td>Contrato {contrato}</td>
+      <td class="situacao-contrato">{situacao_contrato}</td>
+      <td class="col-md-2 float-center">{acoes}</td>
+    </tr></tbody></table>
+  </div></div></div>
+</div></div></div></div></div>
+<div class="modal" id="confirmar-desbloqueio" style="display: none">
+  <p>Confirma o desbloqueio de confiança do contrato {contrato}?</p>
+  <button type="button" id="confirmar">Confirmar</button>
+</div>
+<script>
+var base = "{prefixo}";
+document.querySelectorAll('a.desbloquear').forEach(function (a) {{
+  a.addEventListener('click', function (e) {{
+    e.preventDefault();
+    document.getElementById('confirmar-desbloqueio').style.display = 'block';
+  }});
+}});
+document.getElementById('confirmar').addEventListener('click', function () {{
+  fetch(base + '/desbloqueio', {{method: 'POST', credentials: 'same-origin'}}).then(function () {{
+    document.getElementById('confirmar-desbloqueio').style.display = 'none';
+    document.querySelector('.situacao-contrato').textContent = 'Desbloqueado em confiança';
+  }});
+}});
+{script_faturas}
+</script>"""
+
+# --js: as linhas chegam depois, por fetch, como numa tela montada no navegador
+SCRIPT_FATURAS = """fetch(base + '/faturas.json', {credentials: 'same-origin'}).then(function (r) { return r.json(); }).then(function (d) {
+  document.getElementById('faturas').innerHTML = d.html;
+});"""
+
+LINHA_FATURA = """<tr data-id-fatura="{id}"><td>{id}</td><td>{emissao}</td><td>{vencimento}</td><td>{valor}</td><td>{situacao}</td></tr>"""
+
+
+class PortalLocal:
+    """
+    O portal numa thread, em 127.0.0.1. `desbloqueios` lista os CPFs
+    desbloqueados e `requisicoes` conta as requisições atendidas.
+    """
+
+    def __init__(self, assinantes=None, js=False, latencia=0.0):
+        self.assinantes = assinantes if assinantes is not None else gerar_assinantes(ASSINANTES_PADRAO)
+        self.js = js
+        self.latencia = latencia
+        self.sessoes = {}       # cookie de sessão -> cpf
+        self.tokens = set()     # tokens de formulário emitidos
+        self.desbloqueios = []
+        self.requisicoes = 0
+        self.lock = threading.Lock()
+        self.servidor = None
+
+    @property
+    def base_url(self):
+        host, porta = self.servidor.server_address[:2]
+        return f"http://{host}:{porta}{PREFIXO}"
+
+    def iniciar(self, porta=0):
+        portal = self
+
+        class Manipulador(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                portal._atender(self, 'GET')
+
+            def do_POST(self):
+                portal._atender(self, 'POST')
+
+        self.servidor = ThreadingHTTPServer(('127.0.0.1', porta), Manipulador)
+        self.servidor.daemon_threads = True
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+        return self.base_url
+
+    def parar(self):
+        if self.servidor is not None:
+            self.servidor.shutdown()
+            self.servidor.server_close()
+            self.servidor = None
+
+    def __enter__(self):
+        self.iniciar()
+        return self
+
+    def __exit__(self, *exc):
+        self.parar()
+
+    # --- respostas ---
+
+    def _responder(self, req, status, corpo='', tipo='text/html; charset=utf-8', cabecalhos=()):
+        dados = corpo.encode('utf-8')
+        req.send_response(status)
+        req.send_header('Content-Type', tipo)
+        req.send_header('Content-Length', str(len(dados)))
+        for nome, valor in cabecalhos:
+            req.send_header(nome, valor)
+        req.end_headers()
+        req.wfile.write(dados)
+
+    def _redirecionar(self, req, caminho, cabecalhos=()):
+        self._responder(req, 302, cabecalhos=[('Location', caminho), *cabecalhos])
+
+    def _cpf_da_sessao(self, req):
+        cookies = SimpleCookie(req.headers.get('Cookie', ''))
+        sessao = cookies.get('ixc_sessao')
+        with self.lock:
+            return self.sessoes.get(sessao.value) if sessao else None
+
+    def _atender(self, req, metodo):
+        with self.lock:
+            self.requisicoes += 1
+        if self.latencia:
+            time.sleep(self.latencia)
+
+        caminho = urlsplit(req.path).path.rstrip('/')
+        corpo = req.rfile.read(int(req.headers.get('Content-Length') or 0)).decode('utf-8')
+        if caminho == f"{PREFIXO}/login":
+            if metodo == 'POST':
+                return self._entrar(req, parse_qs(corpo))
+            return self._pagina_login(req)
+
+        cpf = self._cpf_da_sessao(req)
+        if cpf is None:
+            return self._redirecionar(req, f"{PREFIXO}/login")
+        if caminho in (PREFIXO, f"{PREFIXO}/home"):
+            return self._responder(req, 200, self._home(cpf))
+        if caminho == f"{PREFIXO}/faturas.json":
+            return self._responder(req, 200, json.dumps({'html': self._linhas_faturas(cpf)}), 'application/json')
+        if caminho == f"{PREFIXO}/desbloqueio" and metodo == 'POST':
+            with self.lock:
+                self.assinantes[cpf]['bloqueado'] = False
+                self.desbloqueios.append(cpf)
+            return self._responder(req, 200, json.dumps({'ok': True}), 'application/json')
+        self._responder(req, 404, PAGINA.format(corpo="<h1>Página não encontrada</h1>"))
+
+    def _pagina_login(self, req, erro=''):
+        token = secrets.token_hex(16)
+        with self.lock:
+            self.tokens.add(token)
+        self._responder(req, 200, PAGINA.format(corpo=LOGIN.format(erro=erro, token=token)))
+
+    def _entrar(self, req, campos):
+        token = campos.get('_token', [''])[0]
+        cpf = ''.join(filter(str.isdigit, campos.get('login', [''])[0]))
+        senha = campos.get('senha', [''])[0]
+        with self.lock:
+            token_valido = token in self.tokens
+            self.tokens.discard(token)
+        assinante = self.assinantes.get(cpf)
+        if not token_valido:
+            return self._pagina_login(req, '<div class="alert alert-danger">Formulário expirado, tente de novo.</div>')
+        if assinante is None or assinante['senha'] != senha:
+            return self._pagina_login(req, '<div class="alert alert-danger">CPF ou senha inválidos.</div>')
+
+        sessao = secrets.token_hex(16)
+        with self.lock:
+            self.sessoes[sessao] = cpf
+        self._redirecionar(
+            req, f"{PREFIXO}/home", [('Set-Cookie', f"ixc_sessao={sessao}; Path={PREFIXO}; HttpOnly")]
+        )
+
+    def _linhas_faturas(self, cpf):
+        return ''.join(
+            LINHA_FATURA.format(
+                id=f['id'],
+                emissao=_data_br(f['emissao']),
+                vencimento=_data_br(f['vencimento']),
+                valor=_valor_br(f['valor']),
+                situacao=SITUACOES[f['status']],
+            )
+            for f in self.assinantes[cpf]['faturas']
+        )
+
+    def _home(self, cpf):
+        assinante = self.assinantes[cpf]
+        em_aberto = [f for f in assinante['faturas'] if f['status'] != 'paga']
+        if assinante['bloqueado']:
+            situacao = "O contrato está bloqueado"
+            acoes = '<a href="#" class="desbloquear" title="Desbloqueio de confiança"><i class="fa fa-unlock"></i></a>'
+        else:
+            situacao, acoes = "Ativo", ''
+        return PAGINA.format(corpo=HOME.format(
+            nome=html.escape(assinante['nome']),
+            faturas='' if self.js else self._linhas_faturas(cpf),
+            sem_faturas='' if em_aberto or self.js else '<p class="sem-faturas">Nenhuma fatura em aberto.</p>',
+            contrato=assinante['contrato'],
+            situacao_contrato=situacao,
+            acoes=acoes,
+            prefixo=PREFIXO,
+            script_faturas=SCRIPT_FATURAS if self.js else '',
+        ))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Central do Assinante local para testar a automação sem o portal real.")
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO, help=f"porta em 127.0.0.1 (padrão: {PORTA_PADRAO})")
+    parser.add_argument(
+        "--assinantes",
+        type=int,
+        default=ASSINANTES_PADRAO,
+        help=f"quantos assinantes gerar (padrão: {ASSINANTES_PADRAO})",
+    )
+    parser.add_argument("--latencia", type=float, default=0, help="atraso de cada resposta, em ms (padrão: 0)")
+    parser.add_argument("--js", action="store_true", help="faturas carregadas por JavaScript (só o navegador lê)")
+    args = parser.parse_args()
+
+    portal = PortalLocal(gerar_assinantes(args.assinantes), js=args.js, latencia=args.latencia / 1000)
+    base_url = portal.iniciar(args.porta)
+    print(f"✔ Central do Assinante local em {base_url}")
+    for cpf, assinante in list(portal.assinantes.items())[:5]:
+        print(f"   {cpf} / {assinante['senha']} — {len(assinante['faturas'])} fatura(s), bloqueado: {assinante['bloqueado']}")
+    if len(portal.assinantes) > 5:
+        print(f"   ... e mais {len(portal.assinantes) - 5}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        portal.parar()
+        print("\nencerrado")
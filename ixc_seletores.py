@@ -0,0 +1,218 @@
+"""
+Seletores da Central do Assinante com ranking aprendido.
+
+Cada elemento que a automação procura (campo de login, senha, botão ENTRAR,
+desbloqueio) tem uma lista de seletores candidatos. Antes, eles eram
+tentados um de cada vez, cada um com seu próprio timeout: quando o portal
+mudava e o primeiro deixava de funcionar, toda execução perdia 15 s (ou
+mais) esperando por ele.
+
+Agora todos os candidatos de uma etapa são testados juntos, num único
+script no navegador a cada verificação, e o primeiro que aparecer ganha.
+O cache lembra qual seletor funcionou por último em cada etapa e o coloca
+na frente da próxima vez; acertos e trocas ficam contados, e uma troca
+(o preferido não serviu, outro serviu) é o sinal de que o portal mudou.
+
+O arquivo do ranking não é regravado a cada procura: só na hora quando o
+seletor da frente muda; contadores novos vão para o disco no máximo a cada
+INTERVALO_SALVAR segundos, em salvar() e na saída do processo.
+
+Uso:
+    seletores = CacheSeletores('/tmp/ixc_seletores.json')
+    automacao = CentralAssinanteAutomacao(cpf, senha, seletores=seletores)
+    ...
+    seletores.imprimir_estatisticas()
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+import weakref
+
+from selenium.webdriver.common.by import By
+
+CAMINHO_PADRAO = "/tmp/ixc_seletores.json"
+# Contadores mudados sem troca de seletor esperam até isto para ir ao disco (s)
+INTERVALO_SALVAR = 60
+
+# caches com mudanças ainda não gravadas, salvos na saída do processo
+_pendentes = weakref.WeakSet()
+_lock_pendentes = threading.Lock()
+
+
+@atexit.register
+def _salvar_pendentes():
+    with _lock_pendentes:
+        caches = list(_pendentes)
+    for cache in caches:
+        cache.salvar()
+
+# Testa os candidatos em ordem e devolve [índice, elemento] do primeiro que
+# atende o modo ('presente', 'visivel' ou 'clicavel'), ou null.
+PROCURAR_SELETORES_JS = r"""
+var candidatos = arguments[0], modo = arguments[1];
+function visivel(el) {
+    if (!el.getClientRects().length) return false;
+    var estilo = window.getComputedStyle(el);
+    return estilo.visibility !== 'hidden' && estilo.display !== 'none';
+}
+for (var i = 0; i < candidatos.length; i++) {
+    var tipo = candidatos[i][0], valor = candidatos[i][1], elementos = [];
+    try {
+        if (tipo === 'xpath') {
+            var r = document.evaluate(valor, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            for (var j = 0; j < r.snapshotLength; j++) elementos.push(r.snapshotItem(j));
+        } else {
+            elementos = document.querySelectorAll(valor);
+        }
+    } catch (e) {
+        continue;  // seletor inválido nesta página não derruba os outros
+    }
+    for (var k = 0; k < elementos.length; k++) {
+        var el = elementos[k];
+        if (modo === 'presente') return [i, el];
+        if (visivel(el) && (modo === 'visivel' || !el.disabled)) return [i, el];
+    }
+}
+return null;
+"""
+
+
+def _para_js(seletor):
+    """(By, valor) do Selenium -> ('css' ou 'xpath', valor) para o script."""
+    como, valor = seletor
+    if como == By.XPATH:
+        return 'xpath', valor
+    if como == By.CSS_SELECTOR:
+        return 'css', valor
+    if como == By.ID:
+        return 'css', f'[id="{valor}"]'
+    if como == By.NAME:
+        return 'css', f'[name="{valor}"]'
+    raise ValueError(f"tipo de seletor não suportado: {como}")
+
+
+def chave(seletor):
+    return f"{seletor[0]}={seletor[1]}"
+
+
+class ProcurarSeletores:
+    """
+    Condição para WebDriverWait: o primeiro candidato que atende o modo,
+    como (seletor, elemento). Uma verificação é uma chamada ao navegador,
+    qualquer que seja o número de candidatos.
+    """
+
+    def __init__(self, candidatos, modo='presente'):
+        self.candidatos = list(candidatos)
+        self.modo = modo
+        self.argumentos = [list(_para_js(s)) for s in self.candidatos]
+
+    def __call__(self, driver):
+        achado = driver.execute_script(PROCURAR_SELETORES_JS, self.argumentos, self.modo)
+        if not achado:
+            return False
+        indice, elemento = achado
+        return self.candidatos[indice], elemento
+
+
+class CacheSeletores:
+    """
+    Ranking dos candidatos de cada etapa e estatísticas de acerto. Com
+    `caminho`, fica também num arquivo JSON e vale para as próximas
+    execuções. Pode ser compartilhado entre threads (ixc_lote.py).
+    """
+
+    def __init__(self, caminho=CAMINHO_PADRAO):
+        self.caminho = caminho
+        self.lock = threading.Lock()
+        self.etapas = {}
+        self.sujo = False
+        self.salvo_em = time.monotonic()
+        if caminho and os.path.exists(caminho):
+            try:
+                with open(caminho, encoding='utf-8') as f:
+                    self.etapas = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"   → Ranking de seletores ignorado ({e})")
+
+    def _etapa(self, etapa):
+        return self.etapas.setdefault(
+            etapa, {'ultimo': None, 'vitorias': {}, 'acertos': 0, 'trocas': 0, 'falhas': 0}
+        )
+
+    def ordenar(self, etapa, candidatos):
+        """Os candidatos com o último vencedor na frente, depois os que mais venceram."""
+        with self.lock:
+            dados = self._etapa(etapa)
+            posicao = {chave(s): i for i, s in enumerate(candidatos)}
+            return sorted(
+                candidatos,
+                key=lambda s: (
+                    chave(s) != dados['ultimo'],
+                    -dados['vitorias'].get(chave(s), 0),
+                    posicao[chave(s)],
+                ),
+            )
+
+    def registrar(self, etapa, ordem, vencedor):
+        """
+        Anota o resultado de uma procura: `ordem` é a lista que foi testada
+        e `vencedor` o seletor encontrado (None se nenhum apareceu).
+        """
+        with self.lock:
+            dados = self._etapa(etapa)
+            if vencedor is None:
+                dados['falhas'] += 1
+                mudou = False
+            else:
+                dados['acertos' if vencedor == ordem[0] else 'trocas'] += 1
+                mudou = dados['ultimo'] != chave(vencedor)
+                dados['ultimo'] = chave(vencedor)
+                dados['vitorias'][chave(vencedor)] = dados['vitorias'].get(chave(vencedor), 0) + 1
+            self.sujo = True
+            # a procura não espera o disco: só a troca do seletor da frente grava na hora
+            if mudou or time.monotonic() - self.salvo_em >= INTERVALO_SALVAR:
+                self._salvar()
+            elif self.caminho:
+                with _lock_pendentes:
+                    _pendentes.add(self)
+
+    def salvar(self):
+        """Grava o ranking se há mudanças ainda fora do disco."""
+        with self.lock:
+            if self.sujo:
+                self._salvar()
+
+    def estatisticas(self):
+        """{etapa: {'acertos', 'trocas', 'falhas', 'ultimo'}}"""
+        with self.lock:
+            return {
+                etapa: {k: dados[k] for k in ('acertos', 'trocas', 'falhas', 'ultimo')}
+                for etapa, dados in self.etapas.items()
+            }
+
+    def imprimir_estatisticas(self, arquivo=None):
+        print(f"\n{'seletor':<14} {'acertos':>8} {'trocas':>7} {'falhas':>7}  último", file=arquivo)
+        for etapa, dados in self.estatisticas().items():
+            print(
+                f"{etapa:<14} {dados['acertos']:>8} {dados['trocas']:>7} {dados['falhas']:>7}  {dados['ultimo'] or '-'}",
+                file=arquivo,
+            )
+
+    def _salvar(self):
+        self.sujo = False
+        self.salvo_em = time.monotonic()
+        with _lock_pendentes:
+            _pendentes.discard(self)
+        if not self.caminho:
+            return
+        temporario = f"{self.caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temporario, 'w', encoding='utf-8') as f:
+                json.dump(self.etapas, f, ensure_ascii=False, indent=1)
+            os.replace(temporario, self.caminho)
+        except OSError as e:
+            print(f"   → Ranking de seletores não foi salvo ({e})")
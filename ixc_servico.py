@@ -0,0 +1,473 @@
+"""
+Serviço residente da automação da Central do Assinante: recebe pedidos em
+JSON por HTTP local (ou socket Unix) e responde com as faturas em aberto ou
+o resultado do desbloqueio de confiança.
+
+O Python, o pool de navegadores, as conexões HTTP e as sessões sobem uma
+vez só; cada mensagem do WhatsApp vira um pedido, não um processo novo. Os
+pedidos entram numa fila limitada (--fila): com a fila cheia, a resposta é
+503 na hora, com Retry-After, em vez de acumular espera. Cada pedido tem um
+prazo (--timeout, ou "timeout" no corpo, até esse máximo) contado desde
+que entrou na fila; quem passa do prazo recebe 504.
+
+As faturas de cada CPF ficam em cache por --cache-ttl segundos (ixc_cache.py):
+a pergunta repetida responde da memória, sem fila nem portal ("cache": true
+na resposta). Pedidos iguais (mesmo CPF e senha) que chegam enquanto um já
+está em andamento esperam por ele (até o próprio prazo) em vez de abrir
+outra consulta. Um desbloqueio bem-sucedido tira o CPF do cache, e a
+consulta que já estava no portal nessa hora não o devolve ao cache.
+
+Pedidos (corpo JSON: {"cpf": "...", "senha": "...", "timeout": 60}):
+  POST /faturas      -> {"status": "ok", "faturas": [...], "motor": "http"}
+  POST /desbloqueio  -> {"status": "ok", "desbloqueado": true}
+  GET  /saude        -> fila, trabalhadores ocupados e contadores
+  GET  /metricas     -> latência de pedidos, fila, etapas, esperas e seletores
+                        e contagem de resultados, no formato do Prometheus
+                        (ixc_metricas.py; --log-json grava cada span em JSON)
+"status" também pode ser "login_recusado" (CPF/senha recusados pelo portal,
+HTTP 200), "invalido" (400), "ocupado" (503), "tempo_esgotado" (504) ou
+"erro" (502).
+
+Uso:
+  python ixc_servico.py --porta 8787 --trabalhadores 2
+  python ixc_servico.py --unix /run/ixc/ixc.sock --motor selenium
+  curl -s localhost:8787/faturas -d '{"cpf": "12345678901", "senha": "..."}'
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import signal
+import sys
+import time
+
+from ixc_cache import MAX_MB_PADRAO as MAX_MB_CACHE, TTL_PADRAO as TTL_CACHE, CacheFaturas
+from ixc_http import MOTORES, ConexoesHttp, criar_automacao
+from ixc_lote import FALHAS_TRANSITORIAS
+from ixc_metricas import LOG_PADRAO as LOG_METRICAS, Metricas, metricas_padrao
+from ixccentralassinante import BASE_URL
+
+PORTA_PADRAO = 8787
+TRABALHADORES_PADRAO = 2
+FILA_PADRAO = 20
+TIMEOUT_PADRAO = 90
+MAX_CORPO = 64 * 1024
+TIPOS = ('faturas', 'desbloqueio')
+
+STATUS_HTTP = {'ok': 200, 'login_recusado': 200, 'invalido': 400, 'nao_encontrado': 404,
+               'ocupado': 503, 'tempo_esgotado': 504, 'erro': 502}
+MOTIVOS_HTTP = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 503: 'Service Unavailable',
+                504: 'Gateway Timeout', 502: 'Bad Gateway'}
+
+
+def _agora():
+    return time.strftime('%H:%M:%S')
+
+
+def _log(mensagem):
+    # stdout fica com as mensagens da automação (silenciadas sem --verboso)
+    print(f"[{_agora()}] {mensagem}", file=sys.stderr, flush=True)
+
+
+def _cpf_mascarado(cpf):
+    return f"***{cpf[-4:]}" if cpf else '-'
+
+
+class ServicoIxc:
+    """
+    A fila, os trabalhadores e os recursos compartilhados entre pedidos.
+    `opcoes` vão para criar_automacao (pool, sessoes, seletores, capturas...).
+    Sem `cache`, toda consulta de faturas vai ao portal. As automações
+    registram nas mesmas `metricas` do serviço.
+    """
+
+    def __init__(self, motor='auto', trabalhadores=TRABALHADORES_PADRAO, fila=FILA_PADRAO, timeout=TIMEOUT_PADRAO,
+                 cache=None, metricas=None, **opcoes):
+        self.motor = motor
+        self.cache = cache
+        self.metricas = metricas if metricas is not None else metricas_padrao()
+        self.em_andamento = {}   # (chave de cpf e senha, geração) -> futuro da consulta de faturas em curso
+        self.trabalhadores = trabalhadores
+        self.tamanho_fila = fila
+        self.timeout = timeout
+        self.opcoes = {**opcoes, 'metricas': self.metricas}
+        self.executor = ThreadPoolExecutor(max_workers=trabalhadores, thread_name_prefix='ixc')
+        self.fila = None
+        self.ocupados = 0
+        self.executando = set()   # respostas dos pedidos que já saíram da fila
+        self.tarefas = []
+        self.estatisticas = {'recebidos': 0, 'concluidos': 0, 'recusados_fila_cheia': 0, 'expirados': 0, 'erros': 0,
+                             'do_cache': 0, 'agrupados': 0}
+
+    async def iniciar(self):
+        self.fila = asyncio.Queue(maxsize=self.tamanho_fila)
+        self.tarefas = [asyncio.create_task(self._trabalhador()) for _ in range(self.trabalhadores)]
+
+    async def parar(self):
+        for tarefa in self.tarefas:
+            tarefa.cancel()
+        await asyncio.gather(*self.tarefas, return_exceptions=True)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def saude(self):
+        return {
+            'status': 'ok',
+            'motor': self.motor,
+            'fila': self.fila.qsize(),
+            'capacidade_fila': self.tamanho_fila,
+            'ocupados': self.ocupados,
+            'trabalhadores': self.trabalhadores,
+            **self.estatisticas,
+            'cache': self.cache.resumo() if self.cache is not None else None,
+        }
+
+    def metricas_prometheus(self):
+        return self.metricas.prometheus({
+            'fila_pedidos': self.fila.qsize(),
+            'fila_capacidade': self.tamanho_fila,
+            'trabalhadores_ocupados': self.ocupados,
+            'trabalhadores': self.trabalhadores,
+        })
+
+    async def pedir(self, tipo, cpf, senha, timeout=None):
+        """Responde um pedido, do cache ou pela fila: (status HTTP, corpo)."""
+        self.estatisticas['recebidos'] += 1
+        with self.metricas.medir('pedido', tipo=tipo, origem='portal') as span:
+            if tipo == 'faturas' and self.cache is not None:
+                status, corpo = await self._faturas_com_cache(cpf, senha, timeout, span)
+            else:
+                status, corpo = await self._enfileirar(tipo, cpf, senha, timeout)
+                if tipo == 'desbloqueio' and self.cache is not None and corpo.get('desbloqueado'):
+                    # o portal mudou: a próxima pergunta de fatura vai buscar de novo
+                    self.cache.invalidar(cpf)
+            span.resultado = corpo['status']
+            return status, corpo
+
+    async def _faturas_com_cache(self, cpf, senha, timeout, span):
+        resultado = self.cache.obter(cpf, senha)
+        if resultado is not None:
+            self.estatisticas['do_cache'] += 1
+            span.rotulos['origem'] = 'cache'
+            return 200, {**resultado, 'cache': True}
+
+        # depois de um desbloqueio, a consulta que já estava no portal não serve
+        geracao = self.cache.geracao(cpf)
+        chave = (self.cache.chave(cpf, senha), geracao)
+        em_andamento = self.em_andamento.get(chave)
+        if em_andamento is not None:
+            self.estatisticas['agrupados'] += 1
+            span.rotulos['origem'] = 'agrupado'
+            # quem espera a consulta de outro pedido respeita o próprio prazo
+            prazo = min(timeout or self.timeout, self.timeout)
+            try:
+                return await asyncio.wait_for(asyncio.shield(em_andamento), prazo)
+            except asyncio.TimeoutError:
+                self.estatisticas['expirados'] += 1
+                return 504, {'status': 'tempo_esgotado', 'erro': "prazo acabou esperando a consulta igual"}
+
+        em_andamento = asyncio.get_running_loop().create_future()
+        self.em_andamento[chave] = em_andamento
+        try:
+            status, corpo = await self._enfileirar('faturas', cpf, senha, timeout)
+            if corpo['status'] == 'ok':
+                self.cache.guardar(cpf, senha, corpo, geracao)
+            em_andamento.set_result((status, corpo))
+            return status, corpo
+        finally:
+            del self.em_andamento[chave]
+            if not em_andamento.done():
+                em_andamento.set_result((502, {'status': 'erro', 'erro': "consulta interrompida"}))
+
+    async def _enfileirar(self, tipo, cpf, senha, timeout):
+        loop = asyncio.get_running_loop()
+        timeout = min(timeout or self.timeout, self.timeout)
+        resposta = loop.create_future()
+        try:
+            self.fila.put_nowait((tipo, cpf, senha, loop.time(), loop.time() + timeout, resposta))
+        except asyncio.QueueFull:
+            self.estatisticas['recusados_fila_cheia'] += 1
+            return 503, {'status': 'ocupado', 'erro': f"fila cheia ({self.tamanho_fila} pedidos)"}
+        try:
+            return await asyncio.wait_for(asyncio.shield(resposta), timeout)
+        except asyncio.TimeoutError:
+            if resposta in self.executando:
+                # o trabalhador já pegou o pedido e responde no mesmo prazo
+                return await resposta
+            # ainda na fila com os trabalhadores ocupados: o 504 sai no prazo, e o
+            # trabalhador descarta (e conta) o pedido quando chegar nele
+            _resolver(resposta, 504, {'status': 'tempo_esgotado', 'erro': "prazo acabou na fila"})
+            return resposta.result()
+
+    async def _trabalhador(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            tipo, cpf, senha, entrada, prazo, resposta = await self.fila.get()
+            try:
+                restante = prazo - loop.time()
+                expirado = restante <= 0 or resposta.done()
+                self.metricas.registrar('fila', loop.time() - entrada, 'expirado' if expirado else 'ok', tipo=tipo)
+                if expirado:
+                    self.estatisticas['expirados'] += 1
+                    _resolver(resposta, 504, {'status': 'tempo_esgotado', 'erro': "prazo acabou na fila"})
+                    continue
+
+                inicio = time.perf_counter()
+                self.ocupados += 1
+                self.executando.add(resposta)
+                execucao = loop.run_in_executor(self.executor, self.executar, tipo, cpf, senha)
+                try:
+                    corpo = await asyncio.wait_for(asyncio.shield(execucao), restante)
+                    self.estatisticas['concluidos'] += 1
+                    _resolver(resposta, STATUS_HTTP.get(corpo['status'], 200), corpo)
+                except asyncio.TimeoutError:
+                    self.estatisticas['expirados'] += 1
+                    _resolver(resposta, 504, {'status': 'tempo_esgotado', 'erro': "prazo acabou durante a consulta"})
+                    # a thread não pode ser interrompida: o trabalhador só pega outro
+                    # pedido quando ela terminar, para não passar do número de navegadores
+                    with contextlib.suppress(Exception):
+                        await execucao
+                except Exception as e:
+                    self.estatisticas['erros'] += 1
+                    _resolver(resposta, 502, {'status': 'erro', 'erro': str(e) or type(e).__name__})
+                finally:
+                    self.ocupados -= 1
+                    self.executando.discard(resposta)
+                _log(f"{tipo} {_cpf_mascarado(cpf)} -> {resposta.result()[1]['status']} ({time.perf_counter() - inicio:.1f} s)")
+            finally:
+                self.fila.task_done()
+
+    def executar(self, tipo, cpf, senha):
+        """Um pedido, na thread: login e a etapa pedida."""
+        automacao = criar_automacao(self.motor, cpf, senha, **self.opcoes)
+        try:
+            with automacao.medir_etapa('login') as etapa:
+                logado = automacao.fazer_login()
+                if not logado:
+                    etapa.resultado = automacao.motivo_falha_login or 'falhou'
+            if not logado:
+                if automacao.motivo_falha_login in FALHAS_TRANSITORIAS:
+                    return {'status': 'erro', 'erro': f"login: {automacao.motivo_falha_login}"}
+                return {'status': 'login_recusado'}
+            if tipo == 'faturas':
+                with automacao.medir_etapa('faturas'):
+                    resultado = {'status': 'ok', 'faturas': automacao.buscar_faturas_em_aberto()}
+            else:
+                with automacao.medir_etapa('desbloqueio') as etapa:
+                    resultado = {'status': 'ok', 'desbloqueado': bool(automacao.realizar_desbloqueio_confianca())}
+                    if not resultado['desbloqueado']:
+                        etapa.resultado = 'falhou'
+            # no motor auto, o que respondeu de fato (o desbloqueio sempre passa ao navegador)
+            resultado['motor'] = automacao.motor
+            return resultado
+        finally:
+            automacao.encerrar()
+
+
+def _resolver(resposta, status, corpo):
+    if not resposta.done():
+        resposta.set_result((status, corpo))
+
+
+# --- HTTP mínimo (asyncio) ---
+
+async def _ler_pedido(reader):
+    """(método, caminho, cabeçalhos, corpo) ou None se a conexão fechou."""
+    linha = await reader.readline()
+    if not linha:
+        return None
+    try:
+        metodo, alvo, _ = linha.decode('latin-1').split(' ', 2)
+    except ValueError:
+        raise ValueError("linha de pedido inválida")
+    cabecalhos = {}
+    while True:
+        linha = await reader.readline()
+        if linha in (b'\r\n', b'\n', b''):
+            break
+        nome, _, valor = linha.decode('latin-1').partition(':')
+        cabecalhos[nome.strip().lower()] = valor.strip()
+    tamanho = int(cabecalhos.get('content-length') or 0)
+    if tamanho > MAX_CORPO:
+        raise ValueError(f"corpo maior que {MAX_CORPO} bytes")
+    corpo = await reader.readexactly(tamanho) if tamanho else b''
+    return metodo.upper(), urlsplit(alvo).path.rstrip('/') or '/', cabecalhos, corpo
+
+
+def _resposta(status, corpo, manter):
+    # texto (as métricas) vai como está; o resto, em JSON
+    if isinstance(corpo, str):
+        dados, tipo = corpo.encode('utf-8'), "text/plain; version=0.0.4; charset=utf-8"
+    else:
+        dados, tipo = json.dumps(corpo, ensure_ascii=False).encode('utf-8'), "application/json; charset=utf-8"
+    cabecalhos = [
+        f"HTTP/1.1 {status} {MOTIVOS_HTTP.get(status, '')}",
+        f"Content-Type: {tipo}",
+        f"Content-Length: {len(dados)}",
+        f"Connection: {'keep-alive' if manter else 'close'}",
+    ]
+    if status == 503:
+        cabecalhos.append("Retry-After: 5")
+    return ('\r\n'.join(cabecalhos) + '\r\n\r\n').encode('latin-1') + dados
+
+
+async def _responder_pedido(servico, metodo, caminho, corpo):
+    if caminho == '/saude' and metodo == 'GET':
+        return 200, servico.saude()
+    if caminho == '/metricas' and metodo == 'GET':
+        return 200, servico.metricas_prometheus()
+    tipo = caminho.lstrip('/')
+    if tipo not in TIPOS:
+        return 404, {
+            'status': 'nao_encontrado',
+            'erro': f"use POST /{' ou POST /'.join(TIPOS)}, GET /saude ou GET /metricas",
+        }
+    if metodo != 'POST':
+        return 400, {'status': 'invalido', 'erro': f"/{tipo} é POST"}
+    try:
+        dados = json.loads(corpo or b'{}')
+        cpf = ''.join(filter(str.isdigit, str(dados.get('cpf', ''))))
+        senha = str(dados.get('senha') or '')
+        timeout = float(dados['timeout']) if dados.get('timeout') else None
+    except (ValueError, TypeError, AttributeError):
+        return 400, {'status': 'invalido', 'erro': "corpo deve ser JSON com cpf e senha"}
+    if len(cpf) != 11 or not senha:
+        return 400, {'status': 'invalido', 'erro': "CPF com 11 dígitos e senha são obrigatórios"}
+    return await servico.pedir(tipo, cpf, senha, timeout)
+
+
+def atendente(servico):
+    async def atender(reader, writer):
+        try:
+            while True:
+                try:
+                    pedido = await _ler_pedido(reader)
+                except (ValueError, asyncio.IncompleteReadError) as e:
+                    writer.write(_resposta(400, {'status': 'invalido', 'erro': str(e)}, False))
+                    break
+                if pedido is None:
+                    break
+                metodo, caminho, cabecalhos, corpo = pedido
+                status, resposta = await _responder_pedido(servico, metodo, caminho, corpo)
+                manter = cabecalhos.get('connection', '').lower() != 'close'
+                writer.write(_resposta(status, resposta, manter))
+                await writer.drain()
+                if not manter:
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+            with contextlib.suppress(Exception):
+                await writer.wait_closed()
+    return atender
+
+
+async def servir(servico, host='127.0.0.1', porta=PORTA_PADRAO, unix=None):
+    """Roda até receber SIGINT/SIGTERM."""
+    await servico.iniciar()
+    if unix:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(unix)
+        servidor = await asyncio.start_unix_server(atendente(servico), path=unix)
+        os.chmod(unix, 0o660)
+        endereco = unix
+    else:
+        servidor = await asyncio.start_server(atendente(servico), host, porta)
+        endereco = f"http://{host}:{porta}"
+    _log(f"✔ serviço IXC em {endereco} (motor {servico.motor}, {servico.trabalhadores} trabalhador(es), fila {servico.tamanho_fila})")
+
+    parar = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sinal in (signal.SIGINT, signal.SIGTERM):
+        with contextlib.suppress(NotImplementedError):
+            loop.add_signal_handler(sinal, parar.set)
+    async with servidor:
+        await parar.wait()
+    await servico.parar()
+    if unix:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(unix)
+    _log("encerrado")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serviço local de consultas à Central do Assinante (faturas e desbloqueio).")
+    parser.add_argument("--host", default="127.0.0.1", help="endereço de escuta (padrão: 127.0.0.1)")
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO, help=f"porta HTTP (padrão: {PORTA_PADRAO})")
+    parser.add_argument("--unix", help="escuta num socket Unix neste caminho em vez da porta")
+    parser.add_argument("--motor", choices=MOTORES, default='auto', help="auto (padrão), http ou selenium")
+    parser.add_argument("--base-url", default=BASE_URL, help="endereço da Central do Assinante (padrão: o portal real)")
+    parser.add_argument(
+        "--trabalhadores",
+        type=int,
+        default=TRABALHADORES_PADRAO,
+        help=f"consultas ao mesmo tempo, e navegadores no pool (padrão: {TRABALHADORES_PADRAO})",
+    )
+    parser.add_argument("--fila", type=int, default=FILA_PADRAO, help=f"pedidos em espera antes do 503 (padrão: {FILA_PADRAO})")
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=TIMEOUT_PADRAO,
+        help=f"prazo máximo de cada pedido, em s, fila incluída (padrão: {TIMEOUT_PADRAO})",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=TTL_CACHE,
+        help=f"segundos que as faturas de um CPF valem no cache (padrão: {TTL_CACHE}; 0 = sem cache)",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=float,
+        default=MAX_MB_CACHE,
+        help=f"memória máxima do cache; acima dela saem os CPFs mais antigos (padrão: {MAX_MB_CACHE})",
+    )
+    parser.add_argument("--sessoes", help="arquivo para guardar as sessões entre reinícios (login reaproveitado)")
+    parser.add_argument("--verboso", action="store_true", help="mostra as mensagens da automação de cada pedido")
+    parser.add_argument(
+        "--log-json",
+        default=LOG_METRICAS,
+        help="log JSON com o tempo de cada pedido, etapa, espera e seletor (- para stderr)",
+    )
+    args = parser.parse_args()
+
+    from ixc_pool import PoolNavegadores, SessoesCpf
+    from ixc_seletores import CacheSeletores
+
+    # o Chrome sobe na partida só no motor selenium; no auto, na primeira página que o HTTP não lê
+    pool = None if args.motor == 'http' else PoolNavegadores(
+        tamanho=args.trabalhadores, headless=True, url_aquecimento=f"{args.base_url.rstrip('/')}/login",
+        aquecer=args.motor == 'selenium',
+    )
+    metricas = Metricas(log=args.log_json)
+    conexoes = ConexoesHttp(por_host=args.trabalhadores, metricas=metricas)
+    servico = ServicoIxc(
+        motor=args.motor,
+        trabalhadores=args.trabalhadores,
+        fila=args.fila,
+        timeout=args.timeout,
+        cache=CacheFaturas(args.cache_ttl, args.cache_max_mb) if args.cache_ttl > 0 else None,
+        metricas=metricas,
+        pool=pool,
+        conexoes=conexoes,
+        sessoes=SessoesCpf(args.sessoes),
+        seletores=CacheSeletores(),
+        base_url=args.base_url,
+    )
+    saida = contextlib.nullcontext() if args.verboso else contextlib.redirect_stdout(open(os.devnull, 'w'))
+    try:
+        with saida:
+            asyncio.run(servir(servico, args.host, args.porta, args.unix))
+    finally:
+        if pool is not None:
+            pool.fechar()
+        conexoes.fechar()
+        metricas.fechar()
+
+
+if __name__ == "__main__":
+    main()
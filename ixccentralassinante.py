@@ -3,6 +3,10 @@ Script de Automação Web - Central do Assinante IXC Soft
 Objetivo: Fazer login, buscar faturas em aberto e realizar desbloqueio de confiança
 Tecnologia: Selenium WebDriver (controla um navegador real)
 Entrada: CPF e Senha solicitados via terminal
+         (para vários assinantes sem interação: ixc_lote.py;
+          login e faturas sem navegador: ixc_http.py;
+          serviço residente chamado pelo servidor Node: ixc_servico.py;
+          tempos por etapa, espera e seletor: ixc_metricas.py)
 """
 
 from selenium import webdriver
@@ -11,14 +15,335 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.action_chains import ActionChains
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from contextlib import contextmanager
+from ixc_capturas import AnelCapturas, gravador_padrao
+from ixc_metricas import metricas_padrao
+from ixc_seletores import CacheSeletores, ProcurarSeletores, chave
 import time
-import os
 import sys
 import getpass
 from datetime import datetime
 
-class CentralAssinanteAutomacao:
-    def __init__(self, cpf, senha, headless=False):
+# Tempo máximo (s) de cada espera. A espera termina assim que a condição é
+# atendida; o limite só é atingido quando a página não responde.
+TIMEOUTS = {
+    'pagina': 15,       # página de login carregada
+    'campo': 5,         # valor digitado aparecer no campo
+    'login': 15,        # sair da tela de login (ou aparecer a mensagem de erro)
+    'rede': 10,         # rede ociosa depois de um clique ou navegação
+    'desbloqueio': 10,  # botão de desbloqueio clicável
+    'modal': 8,         # pop-up de confirmação aparecer / sumir
+}
+
+# Janela sem nenhuma requisição nova para considerar a rede ociosa (s)
+JANELA_REDE_OCIOSA = 0.5
+
+# Mensagens de erro do portal na tela de login (alerta, toast, SweetAlert)
+SELETOR_ERRO_LOGIN = ".alert-danger, .alert-error, .toast-error, .swal2-popup, .error-message"
+
+# Candidatos de cada elemento procurado, na ordem de preferência inicial;
+# o CacheSeletores reordena pelo que funcionou nas execuções anteriores
+SELETORES_LOGIN = [
+    (By.CSS_SELECTOR, "input[type='text']"),
+    (By.NAME, "login"),
+    (By.ID, "login"),
+    (By.XPATH, "//input[@placeholder='Login' or @placeholder='CPF']"),
+]
+SELETORES_SENHA = [
+    (By.CSS_SELECTOR, "input[type='password']"),
+    (By.NAME, "senha"),
+    (By.ID, "senha"),
+    (By.XPATH, "//input[@placeholder='Senha']"),
+]
+SELETORES_BOTAO = [
+    (By.XPATH, "//button[contains(text(), 'ENTRAR') or contains(text(), 'Entrar')]"),
+    (By.CSS_SELECTOR, "button[type='submit']"),
+    (By.XPATH, "//*[contains(text(), 'ENTRAR') or contains(text(), 'Entrar')]"),
+]
+# O primeiro é o caminho completo passado pelo usuário; o segundo é o mesmo
+# botão sem depender da posição exata dos cards na página
+SELETORES_DESBLOQUEIO = [
+    (By.CSS_SELECTOR, "#home_central > div.content > div > div > div > div:nth-child(3) > div > div.card-content > table > tbody > tr > td.col-md-2.float-center > a:nth-child(1) > i"),
+    (By.CSS_SELECTOR, "#home_central div.card-content td.float-center > a:nth-child(1) > i"),
+]
+
+XPATH_CONFIRMAR = (
+    "//button[contains(text(), 'Confirmar') or contains(text(), 'confirmar') or contains(text(), 'Sim') or contains(text(), 'OK') or contains(text(), 'Desbloquear') or contains(text(), 'desbloquear')] | //a[contains(text(), 'Confirmar') or contains(text(), 'Sim')]"
+)
+
+# Conta as requisições XHR/fetch em andamento na página. Instalado em todo
+# documento novo (via CDP), antes de qualquer script do portal rodar.
+CONTADOR_REQUISICOES_JS = """
+(function () {
+    if (window.__ixcPendentes !== undefined) return;
+    window.__ixcPendentes = 0;
+    var fim = function () { window.__ixcPendentes--; };
+    var send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        window.__ixcPendentes++;
+        this.addEventListener('loadend', fim);
+        return send.apply(this, arguments);
+    };
+    if (window.fetch) {
+        var fetchOriginal = window.fetch;
+        window.fetch = function () {
+            window.__ixcPendentes++;
+            return fetchOriginal.apply(this, arguments).finally(fim);
+        };
+    }
+})();
+"""
+
+# Extrai as faturas da página numa única chamada ao navegador: percorre os
+# textos do DOM uma vez, sobe de cada "R$" até o menor elemento que também
+# tem uma data (a linha ou o card da fatura) e devolve os campos já
+# interpretados. Antes eram milhares de chamadas WebDriver (.text de cada
+# tr, do pai de cada "R$" e, no último caso, de todos os elementos).
+EXTRAIR_FATURAS_JS = r"""
+var RE_VALOR = /R\$\s*(-?[\d.]+,\d{2})/;
+var RE_DATA = /(\d{2})\/(\d{2})\/(\d{4})/g;
+var TEM_DATA = /\d{2}\/\d{2}\/\d{4}/;
+var cabecalhosPorTabela = new Map();
+
+function limpar(t) { return (t || '').replace(/\s+/g, ' ').trim(); }
+
+function valor(t) {
+    var m = RE_VALOR.exec(t);
+    return m ? parseFloat(m[1].replace(/\./g, '').replace(',', '.')) : null;
+}
+
+function vencimento(t) {
+    var m = /venc\w*\.?\s*:?\s*(?:em\s*)?(\d{2})\/(\d{2})\/(\d{4})/i.exec(t);
+    if (m) return m[3] + '-' + m[2] + '-' + m[1];
+    // sem rótulo: a data mais recente (emissão vem antes do vencimento)
+    var datas = [], d;
+    RE_DATA.lastIndex = 0;
+    while ((d = RE_DATA.exec(t))) datas.push(d[3] + '-' + d[2] + '-' + d[1]);
+    return datas.length ? datas.sort()[datas.length - 1] : null;
+}
+
+function situacao(t) {
+    var s = t.toLowerCase();
+    if (/vencid|atrasad|em atraso/.test(s)) return 'vencida';
+    if (/\bpag[ao]\b|quitad|liquidad|baixad/.test(s)) return 'paga';
+    if (/aberto|a vencer|pendente|aguardando/.test(s)) return 'em_aberto';
+    return null;
+}
+
+function identificador(el, t) {
+    var alvos = [el].concat(Array.prototype.slice.call(
+        el.querySelectorAll('[data-id-fatura], [data-fatura], [data-boleto], [data-id], a[href]')));
+    for (var i = 0; i < alvos.length; i++) {
+        var ds = alvos[i].dataset || {};
+        var id = ds.idFatura || ds.fatura || ds.boleto || ds.id;
+        if (id) return String(id);
+        var href = alvos[i].getAttribute('href');
+        var m = href && /(?:fatura|boleto|titulo|id)[\/=_-]?(\d{3,})/i.exec(href);
+        if (m) return m[1];
+    }
+    var n = /(?:fatura|boleto|t[íi]tulo|documento|n[º°o]\.?|#)\s*:?\s*(\d{3,})/i.exec(t);
+    return n ? n[1] : null;
+}
+
+function cabecalhos(tr) {
+    var tabela = tr.closest('table');
+    if (!tabela) return [];
+    if (!cabecalhosPorTabela.has(tabela)) {
+        var ths = tabela.querySelectorAll('thead th');
+        if (!ths.length) {
+            var primeira = tabela.querySelector('tr');
+            ths = primeira ? primeira.querySelectorAll('th') : [];
+        }
+        cabecalhosPorTabela.set(tabela, Array.prototype.map.call(ths, function (th) { return limpar(th.innerText).toLowerCase(); }));
+    }
+    return cabecalhosPorTabela.get(tabela);
+}
+
+function registro(el) {
+    var texto = limpar(el.innerText);
+    var fatura = {id: identificador(el, texto), valor: valor(texto), vencimento: vencimento(texto),
+                  status: situacao(texto), texto: texto};
+    // numa tabela com cabeçalho, cada campo vem da sua coluna
+    if (el.tagName === 'TR') {
+        var nomes = cabecalhos(el);
+        for (var i = 0; i < el.cells.length && i < nomes.length; i++) {
+            var celula = limpar(el.cells[i].innerText);
+            if (/venc/.test(nomes[i]) && TEM_DATA.test(celula)) fatura.vencimento = vencimento(celula);
+            else if (/valor|total/.test(nomes[i]) && valor('R$ ' + celula.replace('R$', '')) !== null && fatura.valor === null) fatura.valor = valor('R$ ' + celula.replace('R$', ''));
+            else if (/situa|status/.test(nomes[i]) && celula) fatura.status = situacao(celula);  // desconhecida: o vencimento decide
+            else if (/fatura|n[º°o]|c[óo]d|documento/.test(nomes[i]) && /^\d{3,}$/.test(celula) && !fatura.id) fatura.id = celula;
+        }
+    }
+    return fatura;
+}
+
+var candidatos = [];
+var vistos = new Set();
+function adicionar(el) {
+    if (el && !vistos.has(el) && el.getClientRects().length) {
+        vistos.add(el);
+        candidatos.push(el);
+    }
+}
+
+var walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
+var no;
+while ((no = walker.nextNode())) {
+    if (no.nodeValue.indexOf('R$') < 0) continue;
+    for (var el = no.parentElement, nivel = 0; el && el !== document.body && nivel < 8; el = el.parentElement, nivel++) {
+        if (el.tagName === 'TR') { adicionar(el); break; }
+        var t = el.innerText || '';
+        if (t.length > 600) break;
+        if (TEM_DATA.test(t)) { adicionar(el); break; }
+    }
+}
+
+// sem nenhum "R$": linhas de tabela com data e menção a vencimento/fatura
+if (!candidatos.length) {
+    document.querySelectorAll('tr').forEach(function (tr) {
+        var t = tr.innerText || '';
+        if (TEM_DATA.test(t) && /venc|fatura/i.test(t)) adicionar(tr);
+    });
+}
+
+// um card que contém outra fatura já encontrada é só o contêiner delas
+return candidatos.filter(function (el) {
+    return !candidatos.some(function (outro) { return outro !== el && el.contains(outro); });
+}).map(registro);
+"""
+
+
+class RedeOciosa:
+    """
+    Condição de espera: documento carregado, nenhuma requisição XHR/fetch
+    (ou jQuery) pendente e nenhum recurso novo carregado há `janela` segundos.
+    """
+
+    def __init__(self, janela=JANELA_REDE_OCIOSA):
+        self.janela = janela
+        self.recursos = None
+        self.desde = None
+
+    def __call__(self, driver):
+        estado, pendentes, recursos = driver.execute_script(
+            "return [document.readyState,"
+            " (window.__ixcPendentes || 0) + (window.jQuery ? jQuery.active : 0),"
+            " performance.getEntriesByType('resource').length];"
+        )
+        agora = time.monotonic()
+        if estado != 'complete' or pendentes > 0 or recursos != self.recursos:
+            self.recursos = recursos
+            self.desde = agora
+            return False
+        return agora - self.desde >= self.janela
+
+
+def saiu_da_pagina(trecho_url):
+    """Condição de espera: a URL atual não contém mais `trecho_url`."""
+    return lambda driver: trecho_url not in driver.current_url.lower()
+
+
+def campo_com_valor(campo, valor, somente_digitos=False):
+    """Condição de espera: o campo já mostra o valor digitado (máscaras de CPF ignoradas)."""
+    def condicao(driver):
+        atual = campo.get_attribute('value') or ''
+        if somente_digitos:
+            atual = ''.join(filter(str.isdigit, atual))
+        return atual == valor
+    return condicao
+
+
+BASE_URL = "https://sis.netcartelecom.com.br/central_assinante_web"
+LOGIN_URL = f"{BASE_URL}/login"
+
+# Tentativas de subir o Chrome (falhas transitórias: porta do chromedriver, /dev/shm)
+TENTATIVAS_CHROME = 3
+
+
+def opcoes_chrome(headless=False):
+    """Opções do Chrome usadas pela automação."""
+    chrome_options = Options()
+    if headless:
+        chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36")
+    chrome_options.add_argument("--ignore-certificate-errors")
+    return chrome_options
+
+
+def criar_driver(headless=False):
+    """
+    Sobe um Chrome pronto para a automação. Falhas do WebDriver são tentadas
+    de novo com espera crescente (1 s, 2 s); qualquer outro erro, ou a
+    última falha, sobe como exceção.
+    """
+    for tentativa in range(TENTATIVAS_CHROME):
+        try:
+            driver = webdriver.Chrome(options=opcoes_chrome(headless))
+            break
+        except WebDriverException as e:
+            if tentativa == TENTATIVAS_CHROME - 1:
+                raise
+            print(f"Erro ao inicializar Chrome (tentativa {tentativa + 1}): {e}")
+            time.sleep(2 ** tentativa)
+
+    # Contador de requisições pendentes para a espera por rede ociosa
+    try:
+        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': CONTADOR_REQUISICOES_JS})
+    except Exception:
+        # Sem CDP (outro navegador): a espera usa só jQuery.active e os recursos carregados
+        pass
+    return driver
+
+
+class MedicaoTempos:
+    """
+    Tempo por etapa de uma consulta (self.tempos), comum aos motores da
+    automação. As etapas também vão para self.metricas (ixc_metricas.py),
+    com o motor que as fez (self.motor).
+    """
+
+    def _tempo(self, etapa):
+        return self.tempos.setdefault(etapa, {'total': 0.0, 'espera': 0.0, 'sleep_anterior': 0.0})
+
+    @contextmanager
+    def medir_etapa(self, etapa):
+        """
+        Soma em self.tempos a duração do bloco e a registra como span
+        'etapa'; o bloco recebe o span para marcar o resultado.
+        """
+        inicio = time.perf_counter()
+        with self.metricas.medir('etapa', etapa=etapa) as span:
+            try:
+                yield span
+            finally:
+                self._tempo(etapa)['total'] += time.perf_counter() - inicio
+                # no motor auto, o que fez a etapa de fato
+                span.rotulos['motor'] = self.motor
+
+    def sleep_dispensado(self, etapa, segundos):
+        """Registra um time.sleep fixo que foi removido sem precisar de espera no lugar."""
+        self._tempo(etapa)['sleep_anterior'] += segundos
+
+    def imprimir_tempos(self):
+        """Tempo de cada etapa, quanto dele foi espera e quanto os sleeps fixos custavam antes."""
+        print(f"\n{'etapa':<14} {'total (s)':>10} {'espera (s)':>11} {'sleeps antes':>13} {'economia (s)':>13}")
+        for etapa, t in self.tempos.items():
+            economia = t['sleep_anterior'] - t['espera']
+            print(
+                f"{etapa:<14} {t['total']:>10.2f} {t['espera']:>11.2f} "
+                f"{t['sleep_anterior']:>13.2f} {economia:>13.2f}"
+            )
+
+
+class CentralAssinanteAutomacao(MedicaoTempos):
+    motor = 'selenium'
+
+    def __init__(self, cpf, senha, headless=False, pool=None, sessoes=None, seletores=None, base_url=None,
+                 capturas=None, metricas=None):
         """
         Inicializa a automação com CPF e senha do cliente.
         
@@ -26,46 +351,152 @@ class CentralAssinanteAutomacao:
             cpf (str): CPF do cliente (somente números)
             senha (str): Senha do cliente
             headless (bool): Se True, executa sem interface gráfica
+            pool (ixc_pool.PoolNavegadores): Se informado, usa um navegador já
+                aberto do pool em vez de subir um Chrome novo
+            sessoes (ixc_pool.SessoesCpf): Se informado, reaproveita a sessão
+                (cookies) de um login anterior do mesmo CPF
+            seletores (ixc_seletores.CacheSeletores): Ranking dos seletores;
+                sem ele, usa o arquivo padrão em /tmp
+            base_url (str): Endereço da Central do Assinante (padrão: BASE_URL;
+                o portal local de ixc_portal_local.py, nos testes)
+            capturas (ixc_capturas.GravadorCapturas): Onde gravar as capturas
+                de tela das falhas (padrão: um gravador compartilhado em /tmp)
+            metricas (ixc_metricas.Metricas): Onde registrar os tempos de
+                etapas, esperas e seletores (padrão: as métricas do processo)
         """
         self.cpf = cpf
         self.senha = senha
-        self.base_url = "https://sis.netcartelecom.com.br/central_assinante_web"
+        self.base_url = (base_url or BASE_URL).rstrip('/')
         self.login_url = f"{self.base_url}/login"
-        self.screenshots_dir = "/tmp/ixc_screenshots"
-        
-        # Criar diretório para screenshots
-        if not os.path.exists(self.screenshots_dir):
-            os.makedirs(self.screenshots_dir)
-        
-        # Configurar opções do Chrome
-        chrome_options = Options()
-        if headless:
-            chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-        chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36")
-        chrome_options.add_argument("--ignore-certificate-errors")
+        self.capturas = AnelCapturas(capturas if capturas is not None else gravador_padrao())
+        self.screenshots_dir = self.capturas.gravador.diretorio
+        self.pool = pool
+        self.sessoes = sessoes
+        self.seletores = seletores if seletores is not None else CacheSeletores()
+        self.seletores_proprios = seletores is None
+        self.metricas = metricas if metricas is not None else metricas_padrao()
+        # Por que o último fazer_login falhou: 'credenciais' (o portal recusou
+        # CPF/senha), 'pagina' (formulário não encontrado), 'sem_resposta' ou 'excecao'
+        self.motivo_falha_login = None
         
+        self.tempos = {}
+
         # Inicializar o driver
-        try:
-            self.driver = webdriver.Chrome(options=chrome_options)
-        except Exception as e:
-            print(f"Erro ao inicializar Chrome: {e}")
-            # Tenta novamente, caso o erro seja temporário
-            self.driver = webdriver.Chrome(options=chrome_options)
-        
+        with self.medir_etapa('navegador') as etapa:
+            etapa.rotulos['origem'] = 'pool' if pool is not None else 'novo'
+            self.driver = pool.obter() if pool is not None else criar_driver(headless)
+
         self.wait = WebDriverWait(self.driver, 15)
         self.actions = ActionChains(self.driver)
-        
+
+    def esperar(self, condicao, etapa, timeout, sleep_anterior=0, nome=None):
+        """
+        Espera até a condição ser atendida (no máximo `timeout` segundos) e
+        retorna o valor dela; TimeoutException se não for. `sleep_anterior`
+        é o time.sleep fixo que esta espera substituiu, usado só no
+        relatório de tempo. `nome` identifica a espera nas métricas (padrão:
+        a classe da condição).
+        """
+        registro = self._tempo(etapa)
+        registro['sleep_anterior'] += sleep_anterior
+        inicio = time.perf_counter()
+        with self.metricas.medir('espera', etapa=etapa, condicao=nome or type(condicao).__name__) as span:
+            try:
+                return WebDriverWait(self.driver, timeout, poll_frequency=0.1).until(condicao)
+            except TimeoutException:
+                span.resultado = 'timeout'
+                raise
+            finally:
+                registro['espera'] += time.perf_counter() - inicio
+
+    def procurar(self, nome, candidatos, modo, etapa, timeout):
+        """
+        Espera o primeiro dos `candidatos` que atender o modo ('presente',
+        'visivel' ou 'clicavel'), testando todos juntos, e retorna o
+        elemento (None se nenhum aparecer em `timeout` s). O resultado
+        alimenta o ranking `nome` do cache de seletores.
+        """
+        ordem = self.seletores.ordenar(nome, candidatos)
+        with self.metricas.medir('seletor', elemento=nome) as span:
+            try:
+                seletor, elemento = self.esperar(ProcurarSeletores(ordem, modo), etapa, timeout)
+            except TimeoutException:
+                span.resultado, span.tentativas = 'falhou', len(ordem)
+                span.rotulos['estrategia'] = 'nenhuma'
+                self.seletores.registrar(nome, ordem, None)
+                return None
+            # tentativas: a posição no ranking do seletor que achou
+            span.tentativas = ordem.index(seletor) + 1
+            span.rotulos['estrategia'] = chave(seletor)
+            if seletor != ordem[0]:
+                # O preferido não serviu: provavelmente o portal mudou
+                print(f"   → Seletor de '{nome}' mudou: {seletor[1]}")
+                span.resultado = 'trocou'
+        self.seletores.registrar(nome, ordem, seletor)
+        return elemento
+
+    def clicar(self, elemento):
+        # scrollIntoView e o clique via JS são síncronos: não precisam de pausa entre eles
+        self.driver.execute_script("arguments[0].scrollIntoView(true); arguments[0].click();", elemento)
+
+    def encerrar(self):
+        """Devolve o navegador ao pool (ou fecha o Chrome, sem pool)."""
+        if self.seletores_proprios:
+            # um ranking compartilhado é salvo por quem o criou
+            self.seletores.salvar()
+        if self.driver is None:
+            return
+        if self.pool is not None:
+            self.pool.devolver(self.driver)
+        else:
+            self.driver.quit()
+        self.driver = None
+
+    def restaurar_sessao(self):
+        """
+        Tenta entrar com os cookies guardados do último login deste CPF.
+        Retorna True se a sessão ainda vale (o portal não voltou para o login).
+        """
+        cookies = self.sessoes.obter(self.cpf, self.senha) if self.sessoes is not None else None
+        if not cookies:
+            return False
+
+        # O navegador só aceita cookies do domínio da página aberta
+        self.driver.get(self.login_url)
+        self.driver.delete_all_cookies()
+        for cookie in cookies:
+            self.driver.add_cookie(
+                {k: cookie[k] for k in ('name', 'value', 'path', 'domain', 'secure', 'httpOnly', 'expiry', 'sameSite') if k in cookie}
+            )
+        self.driver.get(self.base_url)
+        try:
+            self.esperar(RedeOciosa(), 'login', TIMEOUTS['pagina'])
+        except TimeoutException:
+            pass
+
+        if "login" in self.driver.current_url.lower():
+            print("   → Sessão guardada expirou no portal; fazendo login...")
+            self.sessoes.invalidar(self.cpf)
+            self.driver.delete_all_cookies()
+            return False
+        print("   ✓ Sessão anterior reaproveitada (login dispensado)")
+        return True
+
     def tirar_screenshot(self, nome):
         """
-        Tira um screenshot da página para debug.
+        Captura a página para debug. Fica só em memória, a não ser que uma
+        etapa falhe depois (registrar_falha) ou o modo debug esteja ligado.
         """
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        caminho = os.path.join(self.screenshots_dir, f"{nome}_{timestamp}.png")
-        self.driver.save_screenshot(caminho)
-        print(f"   → Screenshot salvo: {caminho}")
+        try:
+            self.capturas.registrar(self.driver, nome)
+        except Exception as e:
+            print(f"   → Captura '{nome}' falhou: {e}")
+
+    def registrar_falha(self, nome):
+        """Grava, em segundo plano, a captura da falha e as que levaram até ela."""
+        quantas = self.capturas.falha(self.driver, nome)
+        if quantas:
+            print(f"   → {quantas} captura(s) da falha em {self.screenshots_dir}")
         
     def fazer_login(self):
         """
@@ -77,118 +508,110 @@ class CentralAssinanteAutomacao:
         print(f"Acessando: {self.login_url}")
         
         try:
+            if self.restaurar_sessao():
+                return True
+
             self.driver.get(self.login_url)
             self.driver.maximize_window() # Adicionado para garantir que o botão não fique oculto
-            time.sleep(3)
+            self.esperar(RedeOciosa(), 'login', TIMEOUTS['pagina'], sleep_anterior=3)
             
             self.tirar_screenshot("01_login_page")
             
             print(f"\nPreenchendo CPF: {self.cpf}")
             
-            campo_login = None
-            seletores_login = [
-                (By.CSS_SELECTOR, "input[type='text']"),
-                (By.NAME, "login"),
-                (By.ID, "login"),
-                (By.XPATH, "//input[@placeholder='Login' or @placeholder='CPF']"),
-            ]
-            
-            for seletor in seletores_login:
-                try:
-                    campo_login = self.wait.until(EC.presence_of_element_located(seletor))
-                    print(f"   ✓ Campo de login encontrado")
-                    break
-                except:
-                    continue
-            
-            if not campo_login:
+            campo_login = self.procurar('campo_login', SELETORES_LOGIN, 'presente', 'login', TIMEOUTS['pagina'])
+            if campo_login:
+                print(f"   ✓ Campo de login encontrado")
+            else:
                 print("   ✗ Erro: Campo de login não encontrado!")
-                self.tirar_screenshot("01_erro_login_nao_encontrado")
+                self.registrar_falha("01_erro_login_nao_encontrado")
+                self.motivo_falha_login = 'pagina'
                 return False
             
             campo_login.clear()
             campo_login.send_keys(self.cpf)
-            time.sleep(1)
+            self.esperar(
+                campo_com_valor(campo_login, self.cpf, somente_digitos=True), 'login', TIMEOUTS['campo'],
+                sleep_anterior=1, nome='campo_preenchido',
+            )
             
             print("Preenchendo senha...")
             
-            campo_senha = None
-            seletores_senha = [
-                (By.CSS_SELECTOR, "input[type='password']"),
-                (By.NAME, "senha"),
-                (By.ID, "senha"),
-                (By.XPATH, "//input[@placeholder='Senha']"),
-            ]
-            
-            for seletor in seletores_senha:
-                try:
-                    campo_senha = self.driver.find_element(*seletor)
-                    print(f"   ✓ Campo de senha encontrado")
-                    break
-                except:
-                    continue
-            
-            if not campo_senha:
+            campo_senha = self.procurar('campo_senha', SELETORES_SENHA, 'presente', 'login', TIMEOUTS['campo'])
+            if campo_senha:
+                print(f"   ✓ Campo de senha encontrado")
+            else:
                 print("   ✗ Erro: Campo de senha não encontrado!")
-                self.tirar_screenshot("01_erro_senha_nao_encontrado")
+                self.registrar_falha("01_erro_senha_nao_encontrado")
+                self.motivo_falha_login = 'pagina'
                 return False
             
             campo_senha.clear()
             campo_senha.send_keys(self.senha)
-            time.sleep(1)
+            self.esperar(
+                campo_com_valor(campo_senha, self.senha), 'login', TIMEOUTS['campo'], sleep_anterior=1,
+                nome='campo_preenchido',
+            )
             
             print("Clicando no botão 'ENTRAR'...")
             
-            botao_entrar = None
-            seletores_botao = [
-                (By.XPATH, "//button[contains(text(), 'ENTRAR') or contains(text(), 'Entrar')]"),
-                (By.CSS_SELECTOR, "button[type='submit']"),
-                (By.XPATH, "//*[contains(text(), 'ENTRAR') or contains(text(), 'Entrar')]"),
-            ]
-            
-            for seletor in seletores_botao:
-                try:
-                    botao_entrar = self.wait.until(EC.element_to_be_clickable(seletor))
-                    print(f"   ✓ Botão 'ENTRAR' encontrado")
-                    break
-                except:
-                    continue
-            
-            if not botao_entrar:
+            botao_entrar = self.procurar('botao_entrar', SELETORES_BOTAO, 'clicavel', 'login', TIMEOUTS['pagina'])
+            if botao_entrar:
+                print(f"   ✓ Botão 'ENTRAR' encontrado")
+            else:
                 print("   ✗ Erro: Botão 'ENTRAR' não encontrado!")
-                self.tirar_screenshot("01_erro_botao_nao_encontrado")
+                self.registrar_falha("01_erro_botao_nao_encontrado")
+                self.motivo_falha_login = 'pagina'
                 return False
             
             self.driver.execute_script("arguments[0].click();", botao_entrar)
-            time.sleep(4)
-            
-            self.tirar_screenshot("02_apos_login")
+            try:
+                # Sucesso: a URL sai de /login. Senha errada: o portal mostra a mensagem de erro
+                self.esperar(
+                    EC.any_of(saiu_da_pagina("login"), EC.visibility_of_element_located((By.CSS_SELECTOR, SELETOR_ERRO_LOGIN))),
+                    'login', TIMEOUTS['login'], sleep_anterior=4, nome='resposta_login',
+                )
+            except TimeoutException:
+                pass
             
             url_atual = self.driver.current_url.lower()
             if "login" not in url_atual:
+                self.tirar_screenshot("02_apos_login")
                 print("\n   ✓ Login realizado com SUCESSO!")
                 print(f"   → URL atual: {self.driver.current_url}")
+                if self.sessoes is not None:
+                    self.sessoes.guardar(self.cpf, self.senha, self.driver.get_cookies())
                 return True
             else:
                 print("\n   ✗ Erro: Login falhou. Verifique CPF e senha.")
                 print(f"   → URL atual: {self.driver.current_url}")
+                recusado = any(e.is_displayed() for e in self.driver.find_elements(By.CSS_SELECTOR, SELETOR_ERRO_LOGIN))
+                self.motivo_falha_login = 'credenciais' if recusado else 'sem_resposta'
+                self.registrar_falha("02_erro_login")
                 return False
                 
         except Exception as e:
             print(f"   ✗ Erro ao fazer login: {e}")
-            self.tirar_screenshot("01_erro_excecao")
+            self.registrar_falha("01_erro_excecao")
+            self.motivo_falha_login = 'excecao'
             return False
     
     def buscar_faturas_em_aberto(self):
         """
         Busca as faturas em aberto na Central do Assinante.
+
+        Retorna uma lista de dicionários: id (ou None), valor (float, em R$),
+        vencimento ('AAAA-MM-DD'), status ('vencida', 'em_aberto' ou None,
+        quando a situação não é reconhecida e não há vencimento para decidir)
+        e texto (a linha como aparece na página).
         """
         print(f"\n{'='*70}")
         print("ETAPA 2: BUSCAR FATURAS EM ABERTO")
         print(f"{'='*70}")
         
         try:
-            time.sleep(2)
+            # A página principal carrega contratos e faturas por XHR depois do login
+            self.esperar(RedeOciosa(), 'faturas', TIMEOUTS['rede'], sleep_anterior=2)
             
             self.tirar_screenshot("03_pagina_principal")
             
@@ -203,66 +626,22 @@ class CentralAssinanteAutomacao:
                 
                 try:
                     elemento = elementos_fatura[0]
-                    self.driver.execute_script("arguments[0].scrollIntoView(true);", elemento)
-                    time.sleep(1)
-                    self.driver.execute_script("arguments[0].click();", elemento)
-                    time.sleep(2)
+                    self.clicar(elemento)
+                    self.sleep_dispensado('faturas', 1)
+                    self.esperar(RedeOciosa(), 'faturas', TIMEOUTS['rede'], sleep_anterior=2)
                     self.tirar_screenshot("04_apos_clicar_fatura")
                     print("   ✓ Clique realizado com sucesso!")
                 except Exception as e:
                     print(f"   → Clique falhou ({e}), continuando com busca direta...")
             
-            # Estratégia 2: Procurar diretamente por informações de faturas na página
+            # Estratégia 2: ler as faturas da página numa única chamada ao navegador
             print("Procurando por informações de faturas na página...")
             
-            faturas = []
-            
-            # Procurar por tabelas
-            tabelas = self.driver.find_elements(By.TAG_NAME, "table")
-            
-            if tabelas:
-                print(f"   ✓ {len(tabelas)} tabela(s) encontrada(s).")
-                for tabela in tabelas:
-                    linhas = tabela.find_elements(By.TAG_NAME, "tr")
-                    for linha in linhas:
-                        texto_linha = linha.text.strip()
-                        if texto_linha and ("R$" in texto_linha or "vencimento" in texto_linha.lower() or "data" in texto_linha.lower()):
-                            if texto_linha not in faturas:
-                                faturas.append(texto_linha)
-            
-            # Procurar por divs ou spans com valores em R$
-            if not faturas:
-                elementos_valores = self.driver.find_elements(By.XPATH, "//*[contains(text(), 'R$')]")
-                print(f"   ✓ {len(elementos_valores)} elemento(s) com valores encontrado(s).")
-                
-                for elemento in elementos_valores:
-                    try:
-                        pai = elemento.find_element(By.XPATH, "..")
-                        texto_pai = pai.text.strip()
-                        if texto_pai and len(texto_pai) < 500 and texto_pai not in faturas:
-                            faturas.append(texto_pai)
-                    except:
-                        texto = elemento.text.strip()
-                        if texto and len(texto) < 200 and texto not in faturas:
-                            faturas.append(texto)
-            
-            # Procurar por qualquer elemento que contenha datas e valores
-            if not faturas:
-                print("   → Procurando por padrões de fatura na página...")
-                todos_elementos = self.driver.find_elements(By.XPATH, "//*")
-                
-                for elemento in todos_elementos:
-                    try:
-                        texto = elemento.text.strip()
-                        if (("/" in texto and len(texto) < 300) and 
-                            ("R$" in texto or "vencimento" in texto.lower() or "fatura" in texto.lower())):
-                            if texto not in faturas and len(texto) > 10:
-                                faturas.append(texto)
-                    except:
-                        pass
-            
-            faturas = list(dict.fromkeys(faturas))
+            inicio = time.perf_counter()
+            registros = self.driver.execute_script(EXTRAIR_FATURAS_JS) or []
+            print(f"   → Página lida em {(time.perf_counter() - inicio) * 1000:.0f} ms ({len(registros)} registro(s))")
             
+            faturas = faturas_em_aberto(registros)
             if faturas:
                 print(f"\n   ✓ {len(faturas)} fatura(s) encontrada(s)!")
                 return faturas
@@ -272,7 +651,7 @@ class CentralAssinanteAutomacao:
                 
         except Exception as e:
             print(f"   ✗ Erro ao buscar faturas: {e}")
-            self.tirar_screenshot("03_erro_buscar_faturas")
+            self.registrar_falha("03_erro_buscar_faturas")
             return []
     
     def realizar_desbloqueio_confianca(self):
@@ -287,114 +666,128 @@ class CentralAssinanteAutomacao:
             print("Procurando opção de Desbloqueio de Confiança...")
             
             # ESTRATÉGIA 1: Procurar pelo seletor CSS fornecido pelo usuário
-            seletor_usuario = "#home_central > div.content > div > div > div > div:nth-child(3) > div > div.card-content > table > tbody > tr > td.col-md-2.float-center > a:nth-child(1) > i"
-            
-            try:
-                print("   → Tentando encontrar o botão de desbloqueio pelo seletor CSS do usuário...")
-                elemento_desbloqueio = self.wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, seletor_usuario)))
-                print(f"   ✓ Elemento de Desbloqueio de Confiança encontrado pelo seletor do usuário!")
-                
-                # Clicar no elemento (que é um <i> dentro de um <a>)
-                self.driver.execute_script("arguments[0].scrollIntoView(true);", elemento_desbloqueio)
-                time.sleep(1)
-                self.driver.execute_script("arguments[0].click();", elemento_desbloqueio)
-                time.sleep(3) # Esperar o modal de confirmação carregar
-                self.tirar_screenshot("05_apos_clicar_desbloqueio_usuario")
+            with self.metricas.medir('estrategia', etapa='desbloqueio', estrategia='seletor') as span:
+                try:
+                    print("   → Tentando encontrar o botão de desbloqueio pelo seletor CSS do usuário...")
+                    elemento_desbloqueio = self.procurar(
+                        'desbloqueio', SELETORES_DESBLOQUEIO, 'clicavel', 'desbloqueio', TIMEOUTS['desbloqueio']
+                    )
+                    if elemento_desbloqueio is None:
+                        raise TimeoutException("nenhum seletor de desbloqueio apareceu")
+                    print(f"   ✓ Elemento de Desbloqueio de Confiança encontrado pelo seletor do usuário!")
                 
-                # Procurar por botão de confirmação no pop-up (mantendo a lógica genérica)
-                print("   → Aguardando pop-up de confirmação...")
+                    # Clicar no elemento (que é um <i> dentro de um <a>)
+                    self.clicar(elemento_desbloqueio)
+                    self.sleep_dispensado('desbloqueio', 1)
                 
-                botoes_confirmar = self.driver.find_elements(By.XPATH, 
-                    "//button[contains(text(), 'Confirmar') or contains(text(), 'confirmar') or contains(text(), 'Sim') or contains(text(), 'OK') or contains(text(), 'Desbloquear') or contains(text(), 'desbloquear')] | //a[contains(text(), 'Confirmar') or contains(text(), 'Sim')]"
-                )
+                    # Procurar por botão de confirmação no pop-up (mantendo a lógica genérica)
+                    print("   → Aguardando pop-up de confirmação...")
+                    botoes_confirmar = self._esperar_confirmacao(sleep_anterior=3)
+                    self.tirar_screenshot("05_apos_clicar_desbloqueio_usuario")
                 
-                if botoes_confirmar:
-                    print(f"   ✓ Botão de confirmação encontrado!")
-                    print("   → Clicando no botão de confirmação...")
-                    botao_conf = botoes_confirmar[0]
-                    self.driver.execute_script("arguments[0].scrollIntoView(true);", botao_conf)
-                    time.sleep(1)
-                    self.driver.execute_script("arguments[0].click();", botao_conf)
-                    time.sleep(2)
-                    self.tirar_screenshot("06_apos_confirmar_desbloqueio")
-                    print("\n   ✓ Desbloqueio de Confiança realizado com SUCESSO!")
-                    return True
-                else:
-                    print("   ✗ Botão de confirmação não encontrado. O desbloqueio pode ter sido direto.")
-                    # Se não encontrou botão de confirmação, assumimos sucesso se o clique inicial foi bem-sucedido.
-                    return True
+                    if botoes_confirmar:
+                        print(f"   ✓ Botão de confirmação encontrado!")
+                        print("   → Clicando no botão de confirmação...")
+                        self._confirmar(botoes_confirmar[0])
+                        self.tirar_screenshot("06_apos_confirmar_desbloqueio")
+                        print("\n   ✓ Desbloqueio de Confiança realizado com SUCESSO!")
+                        return True
+                    else:
+                        print("   ✗ Botão de confirmação não encontrado. O desbloqueio pode ter sido direto.")
+                        # Se não encontrou botão de confirmação, assumimos sucesso se o clique inicial foi bem-sucedido.
+                        return True
                     
-            except Exception as e:
-                print(f"   ✗ Elemento de Desbloqueio de Confiança não encontrado pela Estratégia 1 (Seletor CSS): {e}.")
-                # Se a Estratégia 1 falhar, tentamos a Estratégia 2 (baseada em texto de bloqueio)
-                pass
+                except Exception as e:
+                    print(f"   ✗ Elemento de Desbloqueio de Confiança não encontrado pela Estratégia 1 (Seletor CSS): {e}.")
+                    span.resultado = 'falhou'
+                    # Se a Estratégia 1 falhar, tentamos a Estratégia 2 (baseada em texto de bloqueio)
+                    pass
             
             # ESTRATÉGIA 2: Procurar pela mensagem "O contrato está bloqueado" (Fallback)
-            print("   → Tentando Estratégia 2: Procurando pela mensagem 'O contrato está bloqueado'...")
-            elementos_bloqueado = self.driver.find_elements(By.XPATH, "//*[contains(text(), 'O contrato está bloqueado') or contains(text(), 'contrato está bloqueado')]")
+            with self.metricas.medir('estrategia', etapa='desbloqueio', estrategia='mensagem_bloqueio') as span:
+                print("   → Tentando Estratégia 2: Procurando pela mensagem 'O contrato está bloqueado'...")
+                elementos_bloqueado = self.driver.find_elements(By.XPATH, "//*[contains(text(), 'O contrato está bloqueado') or contains(text(), 'contrato está bloqueado')]")
             
-            if elementos_bloqueado:
-                print(f"   ✓ Mensagem de contrato bloqueado encontrada!")
-                print("   → Procurando pelo ícone de cadeado ou link de desbloqueio próximo...")
+                if elementos_bloqueado:
+                    print(f"   ✓ Mensagem de contrato bloqueado encontrada!")
+                    print("   → Procurando pelo ícone de cadeado ou link de desbloqueio próximo...")
                 
-                # Procurar pelo elemento pai que contém o cadeado
-                try:
-                    elemento_bloqueado = elementos_bloqueado[0]
+                    # Procurar pelo elemento pai que contém o cadeado
+                    try:
+                        elemento_bloqueado = elementos_bloqueado[0]
                     
-                    # Procurar pelo link de desbloqueio (cadeado aberto) dentro do mesmo painel/card
-                    xpath_fallback = "ancestor::div[contains(@class, 'panel') or contains(@class, 'card') or contains(@class, 'box')]//i[contains(@class, 'fa-unlock') or contains(@class, 'fa-lock-open')]/ancestor::a[1]"
-                    botoes = elemento_bloqueado.find_elements(By.XPATH, xpath_fallback)
+                        # Procurar pelo link de desbloqueio (cadeado aberto) dentro do mesmo painel/card
+                        xpath_fallback = "ancestor::div[contains(@class, 'panel') or contains(@class, 'card') or contains(@class, 'box')]//i[contains(@class, 'fa-unlock') or contains(@class, 'fa-lock-open')]/ancestor::a[1]"
+                        botoes = elemento_bloqueado.find_elements(By.XPATH, xpath_fallback)
                     
-                    if botoes:
-                        print(f"   ✓ {len(botoes)} botão(ões) de desbloqueio encontrado(s) na seção de Contratos.")
-                        print("   → Clicando no primeiro botão...")
+                        if botoes:
+                            print(f"   ✓ {len(botoes)} botão(ões) de desbloqueio encontrado(s) na seção de Contratos.")
+                            print("   → Clicando no primeiro botão...")
                         
-                        botao = botoes[0]
-                        self.driver.execute_script("arguments[0].scrollIntoView(true);", botao)
-                        time.sleep(1)
-                        self.driver.execute_script("arguments[0].click();", botao)
-                        time.sleep(2)
-                        self.tirar_screenshot("05_apos_clicar_desbloqueio_fallback")
+                            botao = botoes[0]
+                            self.clicar(botao)
+                            self.sleep_dispensado('desbloqueio', 1)
                         
-                        # Procurar por botão de confirmação no pop-up
-                        print("   → Aguardando pop-up de confirmação...")
-                        time.sleep(1)
+                            # Procurar por botão de confirmação no pop-up
+                            print("   → Aguardando pop-up de confirmação...")
+                            botoes_confirmar = self._esperar_confirmacao(sleep_anterior=3)
+                            self.tirar_screenshot("05_apos_clicar_desbloqueio_fallback")
                         
-                        botoes_confirmar = self.driver.find_elements(By.XPATH, 
-                            "//button[contains(text(), 'Confirmar') or contains(text(), 'confirmar') or contains(text(), 'Sim') or contains(text(), 'OK') or contains(text(), 'Desbloquear') or contains(text(), 'desbloquear')] | //a[contains(text(), 'Confirmar') or contains(text(), 'Sim')]"
-                        )
-                        
-                        if botoes_confirmar:
-                            print(f"   ✓ Botão de confirmação encontrado!")
-                            print("   → Clicando no botão de confirmação...")
-                            botao_conf = botoes_confirmar[0]
-                            self.driver.execute_script("arguments[0].scrollIntoView(true);", botao_conf)
-                            time.sleep(1)
-                            self.driver.execute_script("arguments[0].click();", botao_conf)
-                            time.sleep(2)
-                            self.tirar_screenshot("06_apos_confirmar_desbloqueio_fallback")
-                            print("\n   ✓ Desbloqueio de Confiança realizado com SUCESSO!")
-                            return True
+                            if botoes_confirmar:
+                                print(f"   ✓ Botão de confirmação encontrado!")
+                                print("   → Clicando no botão de confirmação...")
+                                self._confirmar(botoes_confirmar[0])
+                                self.tirar_screenshot("06_apos_confirmar_desbloqueio_fallback")
+                                print("\n   ✓ Desbloqueio de Confiança realizado com SUCESSO!")
+                                return True
+                            else:
+                                print("   ✗ Botão de confirmação não encontrado.")
+                                self.registrar_falha("06_erro_botao_confirmacao_fallback")
+                                span.resultado = 'falhou'
+                                return False
                         else:
-                            print("   ✗ Botão de confirmação não encontrado.")
-                            self.tirar_screenshot("06_erro_botao_confirmacao_fallback")
+                            print("   ✗ Nenhum botão de desbloqueio encontrado na seção de Contratos.")
+                            span.resultado = 'falhou'
                             return False
-                    else:
-                        print("   ✗ Nenhum botão de desbloqueio encontrado na seção de Contratos.")
-                        return False
                         
-                except Exception as e:
-                    print(f"   ✗ Erro ao processar elemento bloqueado na Estratégia 2: {e}")
+                    except Exception as e:
+                        print(f"   ✗ Erro ao processar elemento bloqueado na Estratégia 2: {e}")
+                        span.resultado = 'falhou'
+                        return False
+                else:
+                    print("   ✗ Mensagem de contrato bloqueado não encontrada. Desbloqueio não necessário ou indisponível.")
+                    span.resultado = 'nao_encontrada'
                     return False
-            else:
-                print("   ✗ Mensagem de contrato bloqueado não encontrada. Desbloqueio não necessário ou indisponível.")
-                return False
                 
         except Exception as e:
             print(f"   ✗ Erro ao tentar desbloqueio: {e}")
-            self.tirar_screenshot("05_erro_desbloqueio")
+            self.registrar_falha("05_erro_desbloqueio")
             return False
     
+    def _esperar_confirmacao(self, sleep_anterior=0):
+        """Espera o pop-up de confirmação; retorna os botões de confirmar (lista vazia se não apareceu)."""
+        try:
+            self.esperar(
+                EC.visibility_of_element_located((By.XPATH, XPATH_CONFIRMAR)), 'desbloqueio', TIMEOUTS['modal'],
+                sleep_anterior=sleep_anterior, nome='modal_aberto',
+            )
+        except TimeoutException:
+            return []
+        return self.driver.find_elements(By.XPATH, XPATH_CONFIRMAR)
+
+    def _confirmar(self, botao_conf):
+        self.clicar(botao_conf)
+        self.sleep_dispensado('desbloqueio', 1)
+        # O desbloqueio terminou quando o pop-up fecha e a requisição volta
+        try:
+            self.esperar(
+                EC.invisibility_of_element(botao_conf), 'desbloqueio', TIMEOUTS['modal'], sleep_anterior=2,
+                nome='modal_fechado',
+            )
+            self.esperar(RedeOciosa(), 'desbloqueio', TIMEOUTS['rede'])
+        except TimeoutException:
+            pass
+
     def executar_fluxo_completo(self):
         """
         Executa o fluxo completo: Login -> Buscar Faturas -> Desbloqueio.
@@ -407,20 +800,27 @@ class CentralAssinanteAutomacao:
         print("="*70)
         
         # Passo 1: Fazer Login
-        if not self.fazer_login():
+        with self.medir_etapa('login') as etapa:
+            logado = self.fazer_login()
+            if not logado:
+                etapa.resultado = self.motivo_falha_login or 'falhou'
+        if not logado:
             print("\n✗ Erro: Não foi possível fazer login. Encerrando...")
-            self.driver.quit()
+            self.encerrar()
+            self.imprimir_tempos()
+            self.seletores.imprimir_estatisticas()
             return
         
         # Passo 2: Buscar Faturas
-        faturas = self.buscar_faturas_em_aberto()
+        with self.medir_etapa('faturas'):
+            faturas = self.buscar_faturas_em_aberto()
         
         if faturas:
             print("\n" + "="*70)
             print("FATURAS EM ABERTO")
             print("="*70)
             for i, fatura in enumerate(faturas, 1):
-                print(f"\n{i}. {fatura}")
+                print(f"\n{i}. {formatar_fatura(fatura)}")
             
             # Passo 3: Oferecer Desbloqueio de Confiança
             print("\n" + "="*70)
@@ -428,7 +828,9 @@ class CentralAssinanteAutomacao:
             resposta = input("\nDeseja realizar o Desbloqueio de Confiança? (s/n): ").lower().strip()
             
             if resposta == 's':
-                self.realizar_desbloqueio_confianca()
+                with self.medir_etapa('desbloqueio') as etapa:
+                    if not self.realizar_desbloqueio_confianca():
+                        etapa.resultado = 'falhou'
             else:
                 print("Desbloqueio de Confiança não solicitado.")
         else:
@@ -436,10 +838,40 @@ class CentralAssinanteAutomacao:
         
         print("\n" + "="*70)
         print("Automação concluída!")
-        print("Fechando navegador em 5 segundos...")
+        print("Fechando navegador...")
         print("="*70)
-        time.sleep(5)
-        self.driver.quit()
+        self.sleep_dispensado('encerramento', 5)
+        with self.medir_etapa('encerramento'):
+            self.encerrar()
+        self.imprimir_tempos()
+        self.seletores.imprimir_estatisticas()
+
+def faturas_em_aberto(registros):
+    """As faturas não pagas dentre os registros extraídos da página."""
+    hoje = datetime.now().date().isoformat()
+    faturas = []
+    for fatura in registros:
+        # Sem situação na página, a data decide
+        if fatura['status'] is None and fatura['vencimento']:
+            fatura['status'] = 'vencida' if fatura['vencimento'] < hoje else 'em_aberto'
+        if fatura['status'] != 'paga':
+            faturas.append(fatura)
+    return faturas
+
+
+def formatar_fatura(fatura):
+    """Uma fatura de buscar_faturas_em_aberto em uma linha legível."""
+    partes = []
+    if fatura['valor'] is not None:
+        partes.append(f"R$ {fatura['valor']:,.2f}".replace(',', '_').replace('.', ',').replace('_', '.'))
+    if fatura['vencimento']:
+        partes.append("vence " + datetime.strptime(fatura['vencimento'], '%Y-%m-%d').strftime('%d/%m/%Y'))
+    if fatura['status']:
+        partes.append(fatura['status'].replace('_', ' '))
+    if fatura['id']:
+        partes.append(f"fatura {fatura['id']}")
+    return ' — '.join(partes) or fatura['texto']
+
 
 def solicitar_credenciais():
     """
@@ -0,0 +1,332 @@
+"""
+Benchmark do conversor completo (converter_arquivo) sobre exportações
+sintéticas no layout de 22 colunas do arquivo.csv.
+
+Para cada tamanho, encoding e modo, a conversão roda num processo novo:
+o tempo não inclui subir o Python/pandas e o pico de memória (RSS) é só
+daquela conversão. O relatório sai em JSON e pode ser comparado com um
+relatório anterior (--comparar), que serve de linha de base.
+
+Encodings gerados:
+  - utf8: exportação atual
+  - latin1: exportações antigas do ERP
+  - misto: utf-8 com ~1% das linhas em cp1252 (a exportação "misturada")
+
+Modos:
+  - inteiro: lê o arquivo de uma vez
+  - streaming: em blocos de TAMANHO_BLOCO_PADRAO linhas
+  - sem_validacao: streaming sem a validação de SKU
+  - cache: entrada já convertida antes (só restaura do cache)
+  - leve: o caminho só com a biblioteca padrão (motor='leve')
+
+Os modos com pandas forçam motor='pandas', e o pandas é importado antes de
+começar a medir, como no processo de um servidor que já o tem carregado.
+
+Uso:
+  python benchmark_conversor.py                          # 10k, 100k, 1M e 5M linhas
+  python benchmark_conversor.py --tamanhos 10k,100k -o base.json
+  python benchmark_conversor.py --tamanhos 100k --comparar base.json
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+CABECALHO = (
+    'COD_BARRAS;PRODUTO_ID;NOMEORDER;FORNECEDOR;LOCALIZACAO;TRIBUTACAO;NCM;ALIQUOTA_NCM;CST_PIS;'
+    'CST_COFINS;NATUREZA_RECEITA_PIS_COFINS;PADRAO_COMISSAO;DESCONTO_MAXIMO;QUANTIDADEORDER;TABELA;'
+    'VENDA;PROMOCAO;VALOR_ULT_COMPRA;MARGEM;TOTAL_PRVENDA;TOTAL_PRPROMOCAO;TOTAL_PRCOMPRA'
+)
+TAMANHOS_PADRAO = '10k,100k,1M,5M'
+ENCODINGS = ('utf8', 'latin1', 'misto')
+MODOS = ('inteiro', 'streaming', 'sem_validacao', 'cache', 'leve')
+LINHAS_POR_BLOCO_GERADO = 100_000
+TOLERANCIA_PADRAO = 0.15
+
+PRODUTOS = ['ALBENDAZOL 40 MG/ML', 'AÇÚCAR CRISTAL 5KG', 'PÃO DE MEL', 'CAFÉ TORRADO 500G',
+            'ALOE VERA C/60 CAPS', 'ABAJUR DE MESA', 'SABÃO EM PÓ 1KG', 'MAÇÃ NACIONAL']
+FORNECEDORES = ['NOVA QUIMICA', 'NATURE', 'CALESITA', 'UNIÃO', 'ITATIAIA']
+# só existe em cp1252: aparece nas linhas cp1252 do arquivo misto
+TRAVESSAO = '–'
+
+
+def _ler_tamanho(texto):
+    texto = texto.strip().lower()
+    multiplicador = {'k': 1_000, 'm': 1_000_000}.get(texto[-1:], 1)
+    return int(float(texto.rstrip('km')) * multiplicador)
+
+
+def _gtin13(rng, linhas):
+    codigos = np.char.add('789', rng.integers(10 ** 8, 10 ** 9, linhas).astype(str))
+    digitos = np.frombuffer(codigos.astype('S12').tobytes(), dtype=np.uint8).reshape(-1, 12) - ord('0')
+    soma = digitos @ np.tile([1, 3], 6)
+    return np.char.add(codigos, ((10 - soma % 10) % 10).astype(str))
+
+
+def _decimal(valores):
+    return pd.Series(np.round(valores, 2)).map('{:.2f}'.format).str.replace('.', ',', regex=False).to_numpy()
+
+
+def _bloco(rng, inicio, linhas, linhas_cp1252=None):
+    """Um pedaço da exportação como DataFrame de texto, com células sujas."""
+    produto_id = np.arange(inicio, inicio + linhas) + 1000
+    # ~0,1% de PRODUTO_ID repetido (SKU duplicado no erp_estoque)
+    repetidos = rng.random(linhas) < 0.001
+    produto_id[repetidos] = np.maximum(produto_id[repetidos] - 7, 1000)
+
+    nomes = np.char.add(rng.choice(PRODUTOS, linhas), np.char.add(' ', produto_id.astype(str)))
+    if linhas_cp1252 is not None:
+        nomes[linhas_cp1252] = np.char.add(nomes[linhas_cp1252], f' {TRAVESSAO} PROMO')
+
+    venda = rng.gamma(2.0, 30.0, linhas)
+    compra = venda * rng.uniform(0.4, 0.8, linhas)
+    quantidade = rng.integers(0, 300, linhas).astype(str).astype(object)
+    venda_texto = _decimal(venda).astype(object)
+
+    # células sujas: milhar, espaços, vazias e lixo, como nas exportações reais
+    sorteio = rng.random(linhas)
+    venda_texto[sorteio < 0.01] = '1.234,56'
+    venda_texto[(sorteio >= 0.01) & (sorteio < 0.02)] = ' 29,05 '
+    venda_texto[(sorteio >= 0.02) & (sorteio < 0.025)] = ''
+    venda_texto[(sorteio >= 0.025) & (sorteio < 0.027)] = 'R$ 10,00'
+    sorteio = rng.random(linhas)
+    quantidade[sorteio < 0.01] = '1.234'
+    quantidade[(sorteio >= 0.01) & (sorteio < 0.03)] = '2,5'
+    quantidade[(sorteio >= 0.03) & (sorteio < 0.04)] = ' 5 '
+    quantidade[(sorteio >= 0.04) & (sorteio < 0.05)] = ''
+
+    vazio = np.full(linhas, '', dtype=object)
+    return pd.DataFrame({
+        'COD_BARRAS': _gtin13(rng, linhas),
+        'PRODUTO_ID': produto_id,
+        'NOMEORDER': np.char.add(' ', nomes),
+        'FORNECEDOR': rng.choice(FORNECEDORES, linhas),
+        'LOCALIZACAO': vazio,
+        'TRIBUTACAO': rng.choice(['ST', '18 %', '12 %'], linhas),
+        'NCM': rng.integers(10 ** 7, 10 ** 8, linhas),
+        'ALIQUOTA_NCM': 0,
+        'CST_PIS': rng.choice(['', '49', '04'], linhas),
+        'CST_COFINS': rng.choice(['', '49', '04'], linhas),
+        'NATUREZA_RECEITA_PIS_COFINS': rng.choice(['', '   '], linhas),
+        'PADRAO_COMISSAO': '2,5',
+        'DESCONTO_MAXIMO': 8,
+        'QUANTIDADEORDER': quantidade,
+        'TABELA': vazio,
+        'VENDA': venda_texto,
+        'PROMOCAO': 0,
+        'VALOR_ULT_COMPRA': _decimal(compra),
+        'MARGEM': _decimal((venda / compra - 1) * 100),
+        'TOTAL_PRVENDA': _decimal(venda * 3),
+        'TOTAL_PRPROMOCAO': 0,
+        'TOTAL_PRCOMPRA': _decimal(compra * 3),
+    })
+
+
+def gerar_exportacao(caminho, linhas, encoding, semente=42):
+    """Grava uma exportação sintética em blocos (5M linhas não cabem folgadas na memória)."""
+    rng = np.random.default_rng(semente)
+    with open(caminho, 'wb') as saida:
+        saida.write((CABECALHO + '\r\n').encode('ascii'))
+        for inicio in range(0, linhas, LINHAS_POR_BLOCO_GERADO):
+            quantidade = min(LINHAS_POR_BLOCO_GERADO, linhas - inicio)
+            if encoding != 'misto':
+                bloco = _bloco(rng, inicio, quantidade)
+                texto = bloco.to_csv(sep=';', header=False, index=False, lineterminator='\r\n')
+                saida.write(texto.encode('utf-8' if encoding == 'utf8' else 'latin1'))
+                continue
+
+            cp1252 = rng.random(quantidade) < 0.01
+            bloco = _bloco(rng, inicio, quantidade, cp1252)
+            texto = bloco.to_csv(sep=';', header=False, index=False, lineterminator='\r\n')
+            linhas_texto = texto.split('\r\n')[:-1]
+            saida.write(b''.join(
+                (linha + '\r\n').encode('cp1252' if em_cp1252 else 'utf-8')
+                for linha, em_cp1252 in zip(linhas_texto, cp1252)
+            ))
+
+
+def _rss_pico_mb():
+    # no Linux o VmHWM é do processo atual; o ru_maxrss herda o pico do pai
+    # através do fork/exec e mediria a geração dos dados, não a conversão
+    try:
+        with open('/proc/self/status') as f:
+            for linha in f:
+                if linha.startswith('VmHWM:'):
+                    return int(linha.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def _medir(entrada, saida, modo, diretorio_cache):
+    """Roda num processo novo: uma conversão, com tempo e pico de RSS dela."""
+    from cache_conversao import CacheConversao
+    import resumo_csv
+
+    opcoes = {
+        'tamanho_bloco': None if modo == 'inteiro' else resumo_csv.TAMANHO_BLOCO_PADRAO,
+        'validar': modo != 'sem_validacao',
+        'cache': CacheConversao(diretorio_cache) if modo == 'cache' else None,
+        'motor': 'leve' if modo == 'leve' else 'pandas',
+    }
+    if opcoes['motor'] == 'pandas':
+        import pandas  # noqa: F401
+    rss_base = _rss_pico_mb()
+    inicio = time.perf_counter()
+    resumo = resumo_csv.converter_arquivo(entrada, saida, **opcoes)
+    segundos = time.perf_counter() - inicio
+
+    return {
+        'segundos': segundos,
+        'linhas_saida': resumo['linhas'],
+        'cache': bool(resumo.get('cache')),
+        'rss_base_mb': rss_base,
+        'rss_pico_mb': _rss_pico_mb(),
+    }
+
+
+def _em_processo_novo(*args):
+    contexto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as executor:
+        return executor.submit(_medir, *args).result()
+
+
+def executar(tamanhos, encodings, modos, diretorio_dados, repeticoes=1):
+    resultados = []
+    diretorio_trabalho = tempfile.mkdtemp(prefix='benchmark_conversor_')
+    try:
+        for linhas in tamanhos:
+            for encoding in encodings:
+                entrada = os.path.join(diretorio_dados, f"erp_{linhas}_{encoding}.csv")
+                if not os.path.exists(entrada):
+                    inicio = time.perf_counter()
+                    gerar_exportacao(entrada, linhas, encoding)
+                    print(f"   gerado {entrada} em {time.perf_counter() - inicio:.1f} s", file=sys.stderr)
+                tamanho_mb = os.path.getsize(entrada) / 1024 / 1024
+                saida = os.path.join(diretorio_trabalho, 'saida.csv')
+
+                for modo in modos:
+                    diretorio_cache = os.path.join(diretorio_trabalho, 'cache')
+                    shutil.rmtree(diretorio_cache, ignore_errors=True)
+                    if modo == 'cache':
+                        # a primeira conversão só preenche o cache e não entra na medida
+                        _em_processo_novo(entrada, saida, modo, diretorio_cache)
+
+                    medidas = [_em_processo_novo(entrada, saida, modo, diretorio_cache) for _ in range(repeticoes)]
+                    melhor = min(medidas, key=lambda m: m['segundos'])
+                    resultado = {
+                        'linhas': linhas,
+                        'encoding': encoding,
+                        'modo': modo,
+                        'tamanho_mb': round(tamanho_mb, 1),
+                        'segundos': round(melhor['segundos'], 3),
+                        'linhas_por_s': round(linhas / melhor['segundos']),
+                        'rss_pico_mb': round(max(m['rss_pico_mb'] for m in medidas), 1),
+                        'rss_base_mb': round(melhor['rss_base_mb'], 1),
+                        'linhas_saida': melhor['linhas_saida'],
+                    }
+                    resultados.append(resultado)
+                    print(
+                        f"{linhas:>9} {encoding:>7} {modo:>14} {resultado['segundos']:>9.2f} "
+                        f"{resultado['linhas_por_s']:>12,} {resultado['rss_pico_mb']:>10.0f}"
+                    )
+    finally:
+        shutil.rmtree(diretorio_trabalho, ignore_errors=True)
+    return resultados
+
+
+def comparar(resultados, caminho_base, tolerancia):
+    """Imprime a razão de tempo contra a linha de base; devolve as medidas que pioraram."""
+    with open(caminho_base, encoding='utf-8') as f:
+        base = {(r['linhas'], r['encoding'], r['modo']): r for r in json.load(f)['resultados']}
+
+    piores = []
+    print(f"\n{'linhas':>9} {'encoding':>7} {'modo':>14} {'base (s)':>9} {'agora (s)':>9} {'razão':>7}")
+    for r in resultados:
+        anterior = base.get((r['linhas'], r['encoding'], r['modo']))
+        if anterior is None:
+            continue
+        razao = r['segundos'] / anterior['segundos']
+        marca = ' ⚠' if razao > 1 + tolerancia else ''
+        print(
+            f"{r['linhas']:>9} {r['encoding']:>7} {r['modo']:>14} {anterior['segundos']:>9.2f} "
+            f"{r['segundos']:>9.2f} {razao:>6.2f}x{marca}"
+        )
+        if marca:
+            piores.append(r)
+    return piores
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do resumo_csv com exportações sintéticas do ERP.")
+    parser.add_argument("--tamanhos", default=TAMANHOS_PADRAO, help=f"linhas por arquivo (padrão: {TAMANHOS_PADRAO})")
+    parser.add_argument("--encodings", default=','.join(ENCODINGS), help=f"padrão: {','.join(ENCODINGS)}")
+    parser.add_argument("--modos", default=','.join(MODOS), help=f"padrão: {','.join(MODOS)}")
+    parser.add_argument("--repeticoes", type=int, default=1, help="execuções por medida; vale a mais rápida")
+    parser.add_argument(
+        "--dados",
+        default=os.path.join(tempfile.gettempdir(), 'benchmark_conversor'),
+        help="onde ficam as exportações geradas (reaproveitadas entre execuções)",
+    )
+    parser.add_argument("-o", "--saida", default="benchmark_conversor.json", help="relatório JSON")
+    parser.add_argument("--comparar", help="relatório anterior usado como linha de base")
+    parser.add_argument(
+        "--tolerancia",
+        type=float,
+        default=TOLERANCIA_PADRAO,
+        help=f"piora aceita contra a base, em fração (padrão: {TOLERANCIA_PADRAO})",
+    )
+    args = parser.parse_args()
+
+    encodings = args.encodings.split(',')
+    modos = args.modos.split(',')
+    desconhecidos = (set(encodings) - set(ENCODINGS)) | (set(modos) - set(MODOS))
+    if desconhecidos:
+        parser.error(f"opção desconhecida: {', '.join(sorted(desconhecidos))}")
+    os.makedirs(args.dados, exist_ok=True)
+
+    import resumo_csv
+
+    print(f"{'linhas':>9} {'encoding':>7} {'modo':>14} {'tempo (s)':>9} {'linhas/s':>12} {'RSS (MB)':>10}")
+    resultados = executar(
+        [_ler_tamanho(t) for t in args.tamanhos.split(',')],
+        encodings,
+        modos,
+        args.dados,
+        args.repeticoes,
+    )
+
+    relatorio = {
+        'gerado_em': datetime.datetime.now().isoformat(timespec='seconds'),
+        'versao_conversor': resumo_csv.VERSAO_CONVERSOR,
+        'ambiente': {
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'plataforma': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'resultados': resultados,
+    }
+    with open(args.saida, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, indent=2, ensure_ascii=False)
+    print(f"\n📁 Relatório: {args.saida}")
+
+    if args.comparar:
+        piores = comparar(resultados, args.comparar, args.tolerancia)
+        if piores:
+            print(f"\n{len(piores)} medida(s) mais de {args.tolerancia:.0%} mais lenta(s) que a base.")
+            sys.exit(1)
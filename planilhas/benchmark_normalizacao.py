@@ -0,0 +1,74 @@
+"""
+Compara a limpeza antiga de quantity (lambda por linha) com normalizar_numeros.
+
+Dois cenários:
+  - lida: coluna como o pandas entrega num export limpo (float com vazios)
+  - texto: coluna que ficou como texto por causa de células sujas
+    (vírgula decimal, espaços, vazios)
+
+Uso:
+  python benchmark_normalizacao.py            # 100 mil e 1 milhão de linhas
+  python benchmark_normalizacao.py 500000     # tamanhos personalizados
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from resumo_csv import normalizar_numeros
+
+
+def gerar_colunas(linhas, semente=42):
+    """Quantidades como vêm do ERP: inteiros, decimais com vírgula e vazios."""
+    rng = np.random.default_rng(semente)
+    inteiros = rng.integers(0, 500, linhas)
+    decimais = rng.random(linhas) < 0.2
+    vazias = rng.random(linhas) < 0.25
+
+    lida = pd.Series(np.where(decimais, inteiros + 0.5, inteiros).astype(float))
+    lida[vazias] = np.nan
+
+    texto = inteiros.astype(str).astype(object)
+    texto[decimais] = [f"{v},5" for v in texto[decimais]]
+    espacos = rng.random(linhas) < 0.05
+    texto[espacos] = [f" {v} " for v in texto[espacos]]
+    texto[vazias] = np.nan
+    return {'lida': lida, 'texto': pd.Series(texto)}
+
+
+def lambda_antiga(serie):
+    return (
+        serie
+        .fillna(0)
+        .astype(str)
+        .str.replace(',', '.')
+        .str.replace(' ', '')
+        .apply(lambda x: int(float(x)) if x and x != 'nan' else 0)
+    )
+
+
+def medir(funcao, serie, repeticoes=3):
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(serie)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+if __name__ == "__main__":
+    tamanhos = [int(t) for t in sys.argv[1:]] or [100_000, 1_000_000]
+
+    print(f"{'linhas':>10} {'cenário':>8} {'lambda (s)':>11} {'vetorizado (s)':>15} {'ganho':>8}")
+    for linhas in tamanhos:
+        for cenario, serie in gerar_colunas(linhas).items():
+            novo, _ = normalizar_numeros(serie, inteiro=True)
+            if not (lambda_antiga(serie).to_numpy() == novo.to_numpy()).all():
+                print(f"Erro: resultados divergentes ({cenario}, {linhas} linhas).")
+                sys.exit(1)
+
+            antigo = medir(lambda_antiga, serie)
+            vetorizado = medir(lambda s: normalizar_numeros(s, inteiro=True), serie)
+            print(f"{linhas:>10} {cenario:>8} {antigo:>11.3f} {vetorizado:>15.3f} {antigo / vetorizado:>7.1f}x")
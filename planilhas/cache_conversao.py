@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+DIRETORIO_PADRAO = os.path.join(os.path.expanduser('~'), '.cache', 'resumo_csv')
+TAMANHO_MAXIMO_PADRAO = 512 * 1024 * 1024
+BLOCO_LEITURA = 1024 * 1024
+
+
+def _hash_arquivo(caminho):
+    h = hashlib.blake2b(digest_size=20)
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(BLOCO_LEITURA), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _gravar_json(caminho, dados):
+    # grava num temporário e troca, para não deixar JSON pela metade se dois
+    # jobs rodarem juntos ou o processo cair no meio
+    fd, temporario = tempfile.mkstemp(dir=os.path.dirname(caminho), suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(dados, f)
+    os.replace(temporario, caminho)
+
+
+def _copiar(origem, destino):
+    # o mesmo para as cópias: quem restaura ao mesmo tempo vê o arquivo
+    # antigo ou o novo inteiro, nunca um pela metade
+    fd, temporario = tempfile.mkstemp(dir=os.path.dirname(destino), suffix='.tmp')
+    os.close(fd)
+    try:
+        shutil.copyfile(origem, temporario)
+        os.replace(temporario, destino)
+    except BaseException:
+        try:
+            os.remove(temporario)
+        except OSError:
+            pass
+        raise
+
+
+class CacheConversao:
+    """
+    Cache em disco das saídas do resumir_csv.
+
+    A chave é o hash do conteúdo da entrada + mapeamento de colunas + versão
+    do conversor. Antes de ler o arquivo inteiro para calcular o hash, o
+    tamanho e o mtime são comparados com os da última execução; se forem os
+    mesmos, o hash anterior é reaproveitado. O total em disco é limitado e as
+    entradas menos usadas recentemente são removidas primeiro.
+
+    O índice (caminho da entrada -> tamanho, mtime e hash) é um arquivo
+    pequeno por entrada, em indice/: os processos do lote gravam cada um o
+    seu, sem disputar um arquivo único, e a remoção do LRU leva junto os
+    que não foram usados desde a entrada mais nova removida.
+    """
+
+    def __init__(self, diretorio=DIRETORIO_PADRAO, tamanho_maximo=TAMANHO_MAXIMO_PADRAO):
+        self.diretorio = diretorio
+        self.tamanho_maximo = tamanho_maximo
+        self.diretorio_indice = os.path.join(diretorio, 'indice')
+        os.makedirs(self.diretorio_indice, exist_ok=True)
+
+    def _caminho_indice(self, caminho):
+        nome = hashlib.blake2b(caminho.encode('utf-8'), digest_size=16).hexdigest()
+        return os.path.join(self.diretorio_indice, nome + '.json')
+
+    def _hash_conteudo(self, input_file):
+        estado = os.stat(input_file)
+        caminho = os.path.abspath(input_file)
+        caminho_indice = self._caminho_indice(caminho)
+
+        try:
+            with open(caminho_indice, encoding='utf-8') as f:
+                anterior = json.load(f)
+        except (OSError, ValueError):
+            anterior = None
+        if (anterior and anterior['caminho'] == caminho and anterior['tamanho'] == estado.st_size
+                and anterior['mtime_ns'] == estado.st_mtime_ns):
+            # o mtime marca o último uso, como nas entradas
+            try:
+                os.utime(caminho_indice)
+            except OSError:
+                pass
+            return anterior['hash']
+
+        hash_conteudo = _hash_arquivo(input_file)
+        _gravar_json(caminho_indice, {
+            'caminho': caminho,
+            'tamanho': estado.st_size,
+            'mtime_ns': estado.st_mtime_ns,
+            'hash': hash_conteudo,
+        })
+        return hash_conteudo
+
+    def chave(self, input_file, parametros):
+        """Chave da conversão: conteúdo da entrada + parâmetros que mudam a saída."""
+        h = hashlib.blake2b(digest_size=20)
+        h.update(self._hash_conteudo(input_file).encode())
+        h.update(json.dumps(parametros, sort_keys=True).encode())
+        return h.hexdigest()
+
+    def _caminhos(self, chave):
+        base = os.path.join(self.diretorio, chave)
+        return base + '.csv', base + '.json'
+
+    def _caminho_anexo(self, chave, nome):
+        # sem a extensão .csv, para não ser contado como uma entrada à parte
+        return os.path.join(self.diretorio, f"{chave}.{nome}")
+
+    def restaurar(self, chave, output_file, anexos=None):
+        """
+        Copia a saída guardada para output_file (e cada anexo, nome -> caminho,
+        para o seu caminho) e devolve o resumo, ou None se não houver.
+        """
+        saida, resumo = self._caminhos(chave)
+        anexos = anexos or {}
+        try:
+            with open(resumo, encoding='utf-8') as f:
+                dados = json.load(f)
+            shutil.copyfile(saida, output_file)
+            for nome, caminho in anexos.items():
+                shutil.copyfile(self._caminho_anexo(chave, nome), caminho)
+        except (OSError, ValueError):
+            # sem resumo, ou removida pelo LRU de outro processo no meio: miss
+            return None
+
+        # o mtime marca o último uso, que é o critério do LRU
+        try:
+            os.utime(saida)
+            os.utime(resumo)
+        except OSError:
+            pass
+        return dados
+
+    def guardar(self, chave, output_file, resumo, anexos=None):
+        saida, caminho_resumo = self._caminhos(chave)
+        _copiar(output_file, saida)
+        for nome, caminho in (anexos or {}).items():
+            _copiar(caminho, self._caminho_anexo(chave, nome))
+        # o resumo por último: é ele que diz ao restaurar que a entrada está completa
+        _gravar_json(caminho_resumo, resumo)
+        self._remover_excedente()
+
+    def _remover_excedente(self):
+        entradas = []
+        total = 0
+        nomes = os.listdir(self.diretorio)
+        for nome in nomes:
+            if not nome.endswith('.csv'):
+                continue
+            # a entrada é a saída .csv mais o resumo .json e os anexos da mesma chave
+            prefixo = nome[:-len('.csv')] + '.'
+            arquivos = [os.path.join(self.diretorio, n) for n in nomes if n.startswith(prefixo)]
+            try:
+                mtime = os.stat(os.path.join(self.diretorio, nome)).st_mtime
+                tamanho = sum(os.stat(a).st_size for a in arquivos)
+            except OSError:
+                continue
+            entradas.append((mtime, tamanho, arquivos))
+            total += tamanho
+
+        removida = None
+        for mtime, tamanho, arquivos in sorted(entradas):
+            if total <= self.tamanho_maximo:
+                break
+            for arquivo in arquivos:
+                try:
+                    os.remove(arquivo)
+                except OSError:
+                    pass
+            total -= tamanho
+            removida = mtime
+
+        if removida is not None:
+            self._podar_indice(removida)
+
+    def _podar_indice(self, limite):
+        # sem uso desde a entrada mais nova removida: a saída dele já deve ter
+        # saído do cache; se não saiu, o custo é só recalcular o hash
+        for nome in os.listdir(self.diretorio_indice):
+            if not nome.endswith('.json'):
+                continue   # .tmp de outro processo ainda gravando
+            caminho = os.path.join(self.diretorio_indice, nome)
+            try:
+                if os.stat(caminho).st_mtime <= limite:
+                    os.remove(caminho)
+            except OSError:
+                pass
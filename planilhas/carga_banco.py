@@ -0,0 +1,170 @@
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+# o mesmo chunkSize do bulkUpsertProducts e o MAX_UPLOAD_ERRORS do upload web
+TAMANHO_LOTE_PADRAO = 500
+MAX_ERROS_UPLOAD = 10
+
+COLUNAS_PRODUTO = ['workspaceId', 'uploadId', 'sku', 'name', 'price', 'quantity', 'description']
+
+# mesmo upsert do bulkUpsertProducts: chave (workspaceId, sku), a linha nova vence
+UPSERT = (
+    " ON CONFLICT (workspaceId, sku) DO UPDATE SET"
+    " name = excluded.name, price = excluded.price, quantity = excluded.quantity,"
+    " description = excluded.description, uploadId = excluded.uploadId,"
+    " updatedAt = strftime('%s', 'now')"
+)
+
+
+def abrir_banco(url):
+    """
+    Abre o banco SQLite do servidor a partir do DATABASE_URL ("file:caminho"
+    ou só o caminho). Bancos remotos (libsql://, http://) não são suportados.
+    """
+    if url.startswith('file:'):
+        caminho = url[len('file:'):]
+        if caminho.startswith('//'):
+            caminho = caminho[2:]
+    elif '://' in url:
+        raise ValueError(f"a carga direta só funciona com o banco SQLite local (DATABASE_URL={url})")
+    else:
+        caminho = url
+
+    if not os.path.exists(caminho):
+        raise FileNotFoundError(f"banco '{caminho}' não encontrado")
+    # o servidor pode estar gravando ao mesmo tempo: espera o lock em vez de falhar
+    return sqlite3.connect(caminho, timeout=30)
+
+
+class CargaProdutos:
+    """
+    Grava os produtos da conversão direto na tabela products, sem o ciclo
+    CSV -> upload -> csv-parse do products.uploadCsv, mas com o mesmo efeito:
+    cria o registro em product_uploads como 'processing', aplica as mesmas
+    regras por linha (SKU, nome e preço obrigatórios; preço em centavos;
+    quantidade negativa vira 0),
+    faz o upsert por (workspaceId, sku) e no fim marca o upload como
+    'completed' ou 'failed'.
+
+    As linhas são agrupadas em lotes de tamanho_lote; cada lote é um único
+    INSERT de várias linhas, na sua própria transação.
+    """
+
+    def __init__(self, conexao, workspace_id, nome_arquivo, tamanho_lote=TAMANHO_LOTE_PADRAO):
+        self.conexao = conexao
+        self.workspace_id = workspace_id
+        # o INSERT de várias linhas não pode passar do limite de parâmetros do SQLite
+        limite = conexao.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER) // len(COLUNAS_PRODUTO)
+        self.tamanho_lote = max(1, min(tamanho_lote, limite))
+        self.pendentes = []
+        self.carregadas = 0
+        self.lotes = 0
+        self.erros = []
+
+        with conexao:
+            cursor = conexao.execute(
+                "INSERT INTO product_uploads (workspaceId, fileName, status, rowCount) "
+                "VALUES (?, ?, 'processing', 0)",
+                (workspace_id, nome_arquivo),
+            )
+        self.upload_id = cursor.lastrowid
+
+    def _registrar_erros(self, mascara, linhas, mensagem):
+        for linha in linhas[mascara][:MAX_ERROS_UPLOAD - len(self.erros)]:
+            self.erros.append(f"Linha {linha}: {mensagem}")
+
+    def adicionar(self, df_resumo, linhas):
+        """Valida e enfileira um bloco da saída; lotes completos são gravados na hora."""
+        linhas = np.asarray(linhas)
+        sku = df_resumo['sku'].astype('string').str.strip().fillna('')
+        name = df_resumo['name'].astype('string').str.strip().fillna('')
+        description = df_resumo['description'].astype('string').str.strip().fillna('')
+        # Math.round do parsePriceToCents: meio centavo arredonda para cima
+        price = np.floor(df_resumo['price'].to_numpy(dtype='float64', na_value=np.nan) * 100 + 0.5)
+
+        sem_sku = (sku == '').to_numpy(dtype=bool)
+        sem_nome = (name == '').to_numpy(dtype=bool) & ~sem_sku
+        sem_preco = ~np.isfinite(price) & ~sem_sku & ~sem_nome
+        self._registrar_erros(sem_sku, linhas, "SKU obrigatório.")
+        self._registrar_erros(sem_nome, linhas, "Nome obrigatório.")
+        self._registrar_erros(sem_preco, linhas, "Preço inválido.")
+
+        validas = ~(sem_sku | sem_nome | sem_preco)
+        quantidade = df_resumo['quantity'].to_numpy(dtype='float64', na_value=0)[validas]
+        # Math.max(quantity, 0) do parseQuantity: estoque negativo do ERP vira 0
+        quantidade = np.maximum(np.nan_to_num(quantidade), 0)
+        self.pendentes.extend(zip(
+            sku[validas].tolist(),
+            name[validas].tolist(),
+            price[validas].astype('int64').tolist(),
+            quantidade.astype('int64').tolist(),
+            # descrição vazia vira NULL, como no upload web
+            [d or None for d in description[validas].tolist()],
+        ))
+
+        while len(self.pendentes) >= self.tamanho_lote:
+            self._gravar_lote(self.pendentes[:self.tamanho_lote])
+            del self.pendentes[:self.tamanho_lote]
+
+    def _gravar_lote(self, lote):
+        marcadores = '(' + ', '.join('?' * len(COLUNAS_PRODUTO)) + ')'
+        sql = (
+            f"INSERT INTO products ({', '.join(COLUNAS_PRODUTO)}) VALUES "
+            + ', '.join([marcadores] * len(lote))
+            + UPSERT
+        )
+        parametros = []
+        for sku, name, price, quantity, description in lote:
+            parametros += [self.workspace_id, self.upload_id, sku, name, price, quantity, description]
+        with self.conexao:
+            self.conexao.execute(sql, parametros)
+        self.carregadas += len(lote)
+        self.lotes += 1
+
+    def _atualizar_upload(self, status, row_count, mensagem):
+        with self.conexao:
+            self.conexao.execute(
+                "UPDATE product_uploads SET status = ?, rowCount = COALESCE(?, rowCount), "
+                "errorMessage = ?, updatedAt = strftime('%s', 'now') WHERE id = ?",
+                (status, row_count, mensagem[:1000] if mensagem else None, self.upload_id),
+            )
+
+    def concluir(self):
+        """Grava o que falta e fecha o upload; sem nenhuma linha válida, o upload falha."""
+        if self.pendentes:
+            self._gravar_lote(self.pendentes)
+            self.pendentes = []
+
+        if self.carregadas == 0:
+            mensagem = ' | '.join(self.erros) or "Nenhuma linha válida encontrada no CSV."
+            self._atualizar_upload('failed', None, mensagem)
+            raise ValueError(mensagem)
+
+        self._atualizar_upload('completed', self.carregadas, ' | '.join(self.erros))
+        return {
+            'upload_id': self.upload_id,
+            'carregadas': self.carregadas,
+            'lotes': self.lotes,
+            'erros': list(self.erros),
+        }
+
+    def falhar(self, mensagem):
+        self._atualizar_upload('failed', None, mensagem)
+
+
+def carregar_resumo(caminho, carga, tamanho_bloco=50_000):
+    """Carrega um resumo já gravado (ex.: restaurado do cache), bloco a bloco."""
+    with pd.read_csv(
+        caminho,
+        dtype={'sku': str, 'name': str, 'description': str},
+        keep_default_na=False,
+        na_values={'price': [''], 'quantity': ['']},
+        encoding='utf-8',
+        chunksize=tamanho_bloco,
+    ) as leitor:
+        for bloco in leitor:
+            # linhas do próprio resumo, contando o cabeçalho
+            carga.adicionar(bloco, bloco.index.to_numpy() + 2)
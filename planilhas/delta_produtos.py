@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import os
+
+# colunas que, se mudarem, fazem o SKU entrar no delta
+COLUNAS_COMPARADAS = ['name', 'price', 'quantity', 'description']
+
+
+def _ler_resumo(caminho):
+    # tudo como texto, sem NaN: a comparação é sobre exatamente o que foi gravado
+    return pd.read_csv(caminho, dtype=str, keep_default_na=False, encoding='utf-8')
+
+
+def _hash_linhas(df):
+    return pd.util.hash_pandas_object(df[COLUNAS_COMPARADAS], index=False).to_numpy()
+
+
+def _indexar(df):
+    # SKU repetido: vale a última linha, como no bulkUpsertProducts
+    df = df.drop_duplicates('sku', keep='last')
+    return pd.Series(_hash_linhas(df), index=pd.Index(df['sku']))
+
+
+def carregar_indice(caminho):
+    """
+    Índice SKU -> hash da linha, a partir do resumo anterior (.csv) ou de um
+    snapshot compacto (.npz) gravado por salvar_snapshot.
+    """
+    if caminho.endswith('.npz'):
+        with np.load(caminho) as dados:
+            return pd.Series(dados['hash'], index=pd.Index(dados['sku'].astype(str)))
+    return _indexar(_ler_resumo(caminho))
+
+
+def salvar_snapshot(caminho_resumo, caminho_snapshot):
+    """Grava só SKU + hash de cada linha do resumo, para o próximo delta."""
+    indice = _indexar(_ler_resumo(caminho_resumo))
+    np.savez_compressed(
+        caminho_snapshot,
+        sku=indice.index.to_numpy(dtype=str),
+        hash=indice.to_numpy(dtype=np.uint64),
+    )
+
+
+def caminhos_delta(output_file):
+    base = os.path.splitext(output_file)[0]
+    return f"{base}_delta.csv", f"{base}_removidos.csv"
+
+
+def gerar_delta(caminho_resumo, indice_anterior, saida_delta, saida_removidos):
+    """
+    Compara o resumo recém-gerado com o índice anterior e grava:
+      - saida_delta: linhas novas ou alteradas, no mesmo formato do resumo
+        (pode ser enviado direto no upload de produtos)
+      - saida_removidos: SKUs que sumiram da exportação
+
+    A comparação usa a tabela hash do índice do pandas, então é linear no
+    número de linhas. Retorna a contagem de novos, alterados, removidos e
+    inalterados.
+    """
+    atual = _ler_resumo(caminho_resumo).drop_duplicates('sku', keep='last')
+    hashes = _hash_linhas(atual)
+
+    posicoes = indice_anterior.index.get_indexer(atual['sku'])
+    novos = posicoes == -1
+    hashes_anteriores = np.zeros(len(atual), dtype=np.uint64)
+    hashes_anteriores[~novos] = indice_anterior.to_numpy()[posicoes[~novos]]
+    alterados = ~novos & (hashes_anteriores != hashes)
+
+    removidos = ~indice_anterior.index.isin(atual['sku'])
+
+    atual[novos | alterados].to_csv(saida_delta, index=False, encoding='utf-8')
+    pd.DataFrame({'sku': indice_anterior.index[removidos]}).to_csv(
+        saida_removidos, index=False, encoding='utf-8'
+    )
+
+    return {
+        'novos': int(novos.sum()),
+        'alterados': int(alterados.sum()),
+        'removidos': int(removidos.sum()),
+        'inalterados': int((~novos & ~alterados).sum()),
+    }
@@ -0,0 +1,96 @@
+import os
+
+EXTENSOES_XLSX = ('.xlsx', '.xlsm')
+EXTENSOES_XLS = ('.xls',)
+
+
+def eh_planilha(caminho):
+    return caminho.lower().endswith(EXTENSOES_XLSX + EXTENSOES_XLS)
+
+
+def formato(caminho):
+    return os.path.splitext(caminho)[1].lower().lstrip('.')
+
+
+def _linhas_xlsx(caminho):
+    try:
+        import openpyxl
+    except ImportError:
+        raise RuntimeError("para ler .xlsx instale o openpyxl (pip install openpyxl)")
+
+    # read_only: o openpyxl lê o XML da aba conforme as linhas são pedidas,
+    # sem montar a planilha inteira na memória
+    livro = openpyxl.load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        yield from livro.worksheets[0].iter_rows(values_only=True)
+    finally:
+        livro.close()
+
+
+def _linhas_xls(caminho):
+    try:
+        import xlrd
+    except ImportError:
+        raise RuntimeError("para ler .xls instale o xlrd (pip install xlrd)")
+
+    # o formato binário antigo não permite ler linha a linha do disco; com
+    # on_demand só a primeira aba é carregada, e as linhas saem uma a uma
+    livro = xlrd.open_workbook(caminho, on_demand=True)
+    try:
+        aba = livro.sheet_by_index(0)
+        for i in range(aba.nrows):
+            yield aba.row_values(i)
+    finally:
+        livro.release_resources()
+
+
+def _texto(valor):
+    # números vindos do Excel (o xlrd devolve tudo como float) viram o mesmo
+    # texto que teriam no CSV: 7895296210218.0 -> "7895296210218"
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+
+def ler_linhas(caminho):
+    """Linhas da primeira aba de um .xls/.xlsx, uma a uma, como tuplas de valores."""
+    if caminho.lower().endswith(EXTENSOES_XLSX):
+        return _linhas_xlsx(caminho)
+    return _linhas_xls(caminho)
+
+
+def celula(linha, coluna, texto):
+    """Valor da célula como o resumo o vê: None se vazia, str se for coluna de texto."""
+    valor = linha[coluna] if coluna < len(linha) else None
+    if valor is None or valor == '':
+        return None
+    return _texto(valor) if texto else valor
+
+
+def em_blocos(linhas, colunas, colunas_texto, tamanho_bloco):
+    """
+    Agrupa as linhas em DataFrames de até tamanho_bloco linhas, só com as
+    colunas pedidas (rotuladas pelo índice, como no read_csv com
+    header=None) e com o índice contínuo entre blocos, como no chunksize do
+    read_csv. Colunas em colunas_texto vêm como string; as demais mantêm os
+    números do Excel.
+    """
+    import pandas as pd
+
+    bloco = {c: [] for c in colunas}
+    quantidade = 0
+    inicio = 0
+
+    for linha in linhas:
+        for c in colunas:
+            bloco[c].append(celula(linha, c, c in colunas_texto))
+        quantidade += 1
+
+        if quantidade == tamanho_bloco:
+            yield pd.DataFrame(bloco, index=pd.RangeIndex(inicio, inicio + quantidade))
+            bloco = {c: [] for c in colunas}
+            inicio += quantidade
+            quantidade = 0
+
+    if quantidade:
+        yield pd.DataFrame(bloco, index=pd.RangeIndex(inicio, inicio + quantidade))
@@ -0,0 +1,143 @@
+from concurrent.futures import ProcessPoolExecutor
+import glob
+import os
+import time
+
+import resumo_csv
+from cache_conversao import CacheConversao
+from leitor_planilha import EXTENSOES_XLS, EXTENSOES_XLSX
+from validacao_sku import caminho_rejeitados
+
+EXTENSOES_ENTRADA = ('.csv',) + EXTENSOES_XLSX + EXTENSOES_XLS
+SUFIXO_SAIDA = '_Resumo_final.csv'
+# o resumo e os SKUs rejeitados que a conversão grava ao lado dele
+SUFIXOS_SAIDA = (SUFIXO_SAIDA, caminho_rejeitados(SUFIXO_SAIDA))
+
+
+def eh_saida(nome):
+    """Arquivo gravado por uma conversão (não é entrada, mesmo na pasta das entradas)."""
+    return nome.endswith(SUFIXOS_SAIDA)
+
+
+def listar_entradas(padrao):
+    """Arquivos de um diretório (não recursivo) ou de um glob, em ordem alfabética."""
+    if os.path.isdir(padrao):
+        caminhos = [os.path.join(padrao, nome) for nome in os.listdir(padrao)]
+    else:
+        caminhos = glob.glob(padrao)
+    # saídas de um lote anterior no mesmo diretório não são entradas
+    return sorted(
+        c for c in caminhos
+        if os.path.isfile(c)
+        and c.lower().endswith(EXTENSOES_ENTRADA)
+        and not eh_saida(c)
+    )
+
+
+def nomes_saida(entradas, diretorio_saida, vizinhos=None):
+    """
+    <entrada>_Resumo_final.csv para cada entrada. `vizinhos` são todas as
+    entradas que gravam no mesmo diretório de saída (padrão: as próprias
+    entradas), para o vigia nomear um arquivo só como o lote nomearia a
+    pasta inteira. Nomes repetidos levam a extensão (a.csv e a.xlsx viram
+    a_csv_... e a_xlsx_...), depois o nome da pasta e, se ainda repetir, um
+    contador: duas entradas nunca gravam a mesma saída.
+    """
+    grupo = sorted({os.path.abspath(c) for c in [*(vizinhos or ()), *entradas]})
+
+    def repetidos(nomes):
+        chaves = [n.casefold() for n in nomes]
+        return [chaves.count(c) > 1 for c in chaves]
+
+    partes = [os.path.splitext(os.path.basename(c)) for c in grupo]
+    nomes = [base for base, _ in partes]
+    nomes = [f"{n}_{ext.lstrip('.').lower()}" if r else n for n, (_, ext), r in zip(nomes, partes, repetidos(nomes))]
+    nomes = [
+        f"{os.path.basename(os.path.dirname(c))}_{n}" if r else n
+        for n, c, r in zip(nomes, grupo, repetidos(nomes))
+    ]
+    # ainda repetido (ou igual ao nome natural de outra entrada): contador
+    vistos = set()
+    for i, nome in enumerate(nomes):
+        nome_final, contador = nome, 1
+        while nome_final.casefold() in vistos:
+            contador += 1
+            nome_final = f"{nome}_{contador}"
+        vistos.add(nome_final.casefold())
+        nomes[i] = nome_final
+
+    por_caminho = dict(zip(grupo, nomes))
+    return [os.path.join(diretorio_saida, por_caminho[os.path.abspath(e)] + SUFIXO_SAIDA) for e in entradas]
+
+
+def _converter(tarefa):
+    entrada, saida, tamanho_bloco, encoding, perfil, validar, diretorio_cache, tamanho_cache = tarefa
+    resultado = {
+        'entrada': entrada,
+        'saida': saida,
+        'linhas': 0,
+        'rejeitadas': 0,
+        'skus_rejeitados': 0,
+        'cache': False,
+        'erro': None,
+    }
+
+    inicio = time.perf_counter()
+    try:
+        cache = CacheConversao(diretorio_cache, tamanho_cache) if diretorio_cache else None
+        resumo = resumo_csv.converter_arquivo(entrada, saida, tamanho_bloco, encoding, cache, perfil, validar)
+        resultado['linhas'] = resumo['linhas']
+        resultado['rejeitadas'] = resumo['price']['rejeitadas'] + resumo['quantity']['rejeitadas']
+        resultado['skus_rejeitados'] = sum(resumo.get('rejeitados', {}).values())
+        resultado['cache'] = bool(resumo.get('cache'))
+    except Exception as e:
+        resultado['erro'] = str(e)
+    resultado['tempo'] = time.perf_counter() - inicio
+    return resultado
+
+
+def converter_lote(entradas, diretorio_saida, processos=None, tamanho_bloco=None,
+                   encoding=None, perfil=None, validar=True, diretorio_cache=None, tamanho_cache=None):
+    """
+    Converte vários arquivos em paralelo, um processo por arquivo (até
+    `processos` ao mesmo tempo). Devolve os resultados na ordem das entradas
+    e o tempo total.
+    """
+    os.makedirs(diretorio_saida, exist_ok=True)
+    tarefas = [
+        (entrada, saida, tamanho_bloco, encoding, perfil, validar, diretorio_cache, tamanho_cache)
+        for entrada, saida in zip(entradas, nomes_saida(entradas, diretorio_saida))
+    ]
+    processos = min(processos or os.cpu_count() or 1, len(tarefas))
+
+    inicio = time.perf_counter()
+    if processos <= 1:
+        resultados = [_converter(t) for t in tarefas]
+    else:
+        # os maiores primeiro, para nenhum arquivo grande ficar sozinho no fim
+        ordem = sorted(range(len(tarefas)), key=lambda i: os.path.getsize(tarefas[i][0]), reverse=True)
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            futuros = {i: executor.submit(_converter, tarefas[i]) for i in ordem}
+            resultados = [futuros[i].result() for i in range(len(tarefas))]
+    return resultados, time.perf_counter() - inicio
+
+
+def imprimir_tabela(resultados, tempo_total):
+    largura = max([len('arquivo')] + [len(os.path.basename(r['entrada'])) for r in resultados])
+    print(
+        f"{'arquivo':<{largura}}  {'linhas':>9}  {'rejeitadas':>10}  {'skus rej.':>9}  "
+        f"{'tempo (s)':>9}  status"
+    )
+    for r in resultados:
+        if r['erro']:
+            status = f"erro: {r['erro']}"
+        else:
+            status = 'cache' if r['cache'] else 'ok'
+        print(
+            f"{os.path.basename(r['entrada']):<{largura}}  {r['linhas']:>9}  "
+            f"{r['rejeitadas']:>10}  {r['skus_rejeitados']:>9}  {r['tempo']:>9.2f}  {status}"
+        )
+
+    linhas = sum(r['linhas'] for r in resultados)
+    erros = sum(1 for r in resultados if r['erro'])
+    print(f"\n{len(resultados)} arquivo(s), {linhas} linhas, {erros} erro(s) em {tempo_total:.2f} s")
@@ -0,0 +1,194 @@
+"""
+Junta a exportação de estoque do ERP, a planilha de vendas (preço correto) e a
+de produtos novos num único catálogo sku,name,price,quantity,description.
+
+Uso:
+  python mesclar_catalogo.py --estoque arquivo.csv --vendas VENDASCORRETOPRECO.csv \\
+      --novos NOVOSPRODUTOSHOJE.csv
+  python mesclar_catalogo.py ... --precedencia price=novos,vendas,estoque
+"""
+
+from itertools import combinations
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from perfis import PERFIS
+from resumo_csv import NOVAS_COLUNAS, detectar_encoding, normalizar_numeros
+
+
+def _layout_perfil(perfil):
+    """Colunas de um perfil do resumo_csv no layout da mescla (o sku do perfil é o código interno)."""
+    colunas = {perfil['codigo_barras']: 'barcode'}
+    for campo, origem in perfil['colunas'].items():
+        colunas[origem] = 'interno' if campo == 'sku' else campo
+    return {'colunas': colunas}
+
+
+# layout de cada fonte: coluna de origem (nome no cabeçalho) -> campo. A
+# exportação do ERP usa o mesmo perfil do resumo_csv, para os dois não
+# divergirem sobre de qual coluna vem cada campo
+LAYOUTS = {
+    'estoque': _layout_perfil(PERFIS['erp_estoque']),
+    'vendas': {
+        'colunas': {'sku': 'barcode', 'INTERNO': 'interno', 'name': 'name', 'quantity': 'quantity', 'price': 'price'},
+    },
+    'novos': {
+        'colunas': {'sku': 'barcode', 'name': 'name', 'quantity': 'quantity', 'price': 'price'},
+    },
+}
+
+# para cada campo, de qual fonte o valor vem primeiro; se a fonte não tiver o
+# produto (ou o campo estiver vazio), vale a próxima da lista
+PRECEDENCIA_PADRAO = {
+    'name': ['estoque', 'vendas', 'novos'],
+    'price': ['vendas', 'novos', 'estoque'],
+    'quantity': ['estoque', 'novos', 'vendas'],
+    'description': ['estoque', 'vendas', 'novos'],
+}
+
+# "SEM GTIN", vazio etc. não identificam o produto entre planilhas
+GTIN_VALIDO = r'\d{8,14}'
+
+
+def ler_fonte(nome, caminho):
+    """Lê uma fonte no layout dela e devolve um DataFrame indexado pela chave do produto."""
+    layout = LAYOUTS[nome]
+    df = pd.read_csv(
+        caminho,
+        sep=';',
+        encoding=detectar_encoding(caminho),
+        encoding_errors='resumo_csv_cp1252',
+        header=0,
+        usecols=list(layout['colunas']),
+        dtype=str,
+    ).rename(columns=layout['colunas'])
+
+    df['price'] = normalizar_numeros(df['price'])[0].round(2)
+    df['quantity'] = normalizar_numeros(df['quantity'], inteiro=True)[0]
+
+    # chave: o código de barras; sem GTIN, o código interno da própria fonte
+    # (que não casa com outras planilhas, mas mantém o produto no catálogo)
+    barcode = df['barcode'].str.strip()
+    gtin = barcode.str.fullmatch(GTIN_VALIDO).fillna(False).astype(bool)
+    chave = barcode.where(gtin)
+    if 'interno' in df:
+        chave = chave.fillna(nome + ':' + df['interno'].str.strip())
+
+    sem_chave = int(chave.isna().sum())
+    df = df.assign(chave=chave)[chave.notna()]
+    duplicadas = int(df['chave'].duplicated(keep='last').sum())
+    # chave repetida na mesma fonte: vale a última linha, como no bulkUpsertProducts
+    df = df.drop_duplicates('chave', keep='last').set_index('chave')
+
+    return df, {'linhas': len(df), 'sem_chave': sem_chave, 'duplicadas': duplicadas}
+
+
+def mesclar(fontes, precedencia=PRECEDENCIA_PADRAO):
+    """
+    Junta as fontes (nome -> DataFrame de ler_fonte) pela chave do produto.
+
+    Cada fonte vira um índice hash; os valores de cada campo são buscados
+    nas fontes na ordem de `precedencia`, então o custo é linear no total de
+    linhas. Retorna o catálogo e o relatório de conflitos (produtos em que
+    duas ou mais fontes têm valores diferentes para o mesmo campo).
+    """
+    chaves = pd.Index(pd.unique(np.concatenate([df.index.to_numpy(dtype=object) for df in fontes.values()])))
+
+    catalogo = pd.DataFrame(index=chaves)
+    conflitos = []
+    for campo in ('name', 'price', 'quantity', 'description'):
+        ordem = [f for f in precedencia[campo] if f in fontes and campo in fontes[f]]
+        valores = {f: fontes[f][campo].reindex(chaves) for f in ordem}
+        if campo == 'quantity':
+            valores = {f: v.astype('Int64') for f, v in valores.items()}
+
+        escolhido = pd.Series(np.nan, index=chaves, dtype=object)
+        origem = pd.Series(np.nan, index=chaves, dtype=object)
+        for f in ordem:
+            faltando = escolhido.isna() & valores[f].notna()
+            escolhido[faltando] = valores[f][faltando]
+            origem[faltando] = f
+        catalogo[campo] = escolhido
+
+        # conflito: duas fontes com o produto e valores diferentes no campo
+        diferentes = np.zeros(len(chaves), dtype=bool)
+        for a, b in combinations(ordem, 2):
+            ambos = (valores[a].notna() & valores[b].notna()).to_numpy(dtype=bool)
+            diferentes |= ambos & (valores[a] != valores[b]).fillna(False).to_numpy(dtype=bool)
+        if diferentes.any():
+            conflito = pd.DataFrame(valores)[diferentes]
+            conflito.insert(0, 'fonte_escolhida', origem[diferentes])
+            conflito.insert(0, 'valor_escolhido', escolhido[diferentes])
+            conflito.insert(0, 'campo', campo)
+            conflitos.append(conflito)
+
+    catalogo['price'] = pd.to_numeric(catalogo['price']).round(2)
+    catalogo['quantity'] = pd.to_numeric(catalogo['quantity']).fillna(0).astype('int64')
+    catalogo = catalogo.rename_axis('sku').reset_index()[NOVAS_COLUNAS]
+
+    if conflitos:
+        relatorio = pd.concat(conflitos).rename_axis('sku').reset_index()
+    else:
+        relatorio = pd.DataFrame(columns=['sku', 'campo', 'valor_escolhido', 'fonte_escolhida'])
+    return catalogo, relatorio
+
+
+def _ler_precedencia(regras):
+    precedencia = {campo: list(ordem) for campo, ordem in PRECEDENCIA_PADRAO.items()}
+    for regra in regras:
+        campo, _, ordem = regra.partition('=')
+        if campo not in precedencia or not ordem:
+            raise ValueError(f"regra de precedência inválida: '{regra}' (use campo=fonte1,fonte2)")
+        fontes = [f.strip() for f in ordem.split(',')]
+        desconhecidas = set(fontes) - set(LAYOUTS)
+        if desconhecidas:
+            raise ValueError(f"fonte desconhecida em '{regra}': {', '.join(sorted(desconhecidas))}")
+        precedencia[campo] = fontes
+    return precedencia
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mescla estoque, vendas e produtos novos num catálogo único.")
+    for nome in LAYOUTS:
+        parser.add_argument(f"--{nome}", help=f"arquivo da fonte '{nome}'")
+    parser.add_argument("-o", "--saida", default="Catalogo_mesclado.csv", help="catálogo de saída")
+    parser.add_argument("--conflitos", default="Catalogo_conflitos.csv", help="relatório de conflitos")
+    parser.add_argument(
+        "--precedencia",
+        action="append",
+        default=[],
+        help="ordem das fontes para um campo, ex.: price=vendas,novos,estoque (pode repetir)",
+    )
+    args = parser.parse_args()
+
+    caminhos = {nome: getattr(args, nome) for nome in LAYOUTS if getattr(args, nome)}
+    if not caminhos:
+        parser.error("informe ao menos uma fonte (--estoque, --vendas ou --novos)")
+
+    try:
+        precedencia = _ler_precedencia(args.precedencia)
+        fontes = {}
+        for nome, caminho in caminhos.items():
+            if not os.path.exists(caminho):
+                print(f"Erro: arquivo '{caminho}' não encontrado.")
+                sys.exit(1)
+            fontes[nome], info = ler_fonte(nome, caminho)
+            print(
+                f"   {nome}: {info['linhas']} produtos "
+                f"({info['sem_chave']} sem chave, {info['duplicadas']} duplicados descartados)"
+            )
+
+        catalogo, relatorio = mesclar(fontes, precedencia)
+        catalogo.to_csv(args.saida, index=False, sep=',', encoding='utf-8', decimal='.')
+        relatorio.to_csv(args.conflitos, index=False, sep=',', encoding='utf-8', decimal='.')
+
+        print(f"✔ Catálogo mesclado!\n📁 Saída: {args.saida} ({len(catalogo)} produtos)")
+        print(f"📁 Conflitos: {args.conflitos} ({len(relatorio)} divergências)")
+
+    except Exception as e:
+        print(f"Ocorreu um erro durante o processamento: {e}")
+        sys.exit(1)
@@ -0,0 +1,135 @@
+"""
+Perfis de layout das planilhas de entrada do resumo_csv.
+
+Cada perfil diz de onde vem cada campo da saída (sku, name, price, quantity,
+description): pelo nome da coluna no cabeçalho ou, quando o cabeçalho não fica
+sobre os dados, pelo índice. O perfil é escolhido olhando só as primeiras
+linhas do arquivo; nenhuma passada extra é feita sobre os dados.
+"""
+
+CAMPOS = ['sku', 'name', 'price', 'quantity', 'description']
+
+# quantas linhas do começo do arquivo são examinadas atrás do cabeçalho
+# (relatórios do ERP têm título e linhas em branco antes dele)
+LINHAS_BUSCA_CABECALHO = 20
+
+PERFIS = {
+    'erp_estoque': {
+        'descricao': 'exportação completa do ERP (COD_BARRAS;PRODUTO_ID;NOMEORDER;...;TOTAL_PRCOMPRA)',
+        'assinatura': ['COD_BARRAS', 'PRODUTO_ID', 'NOMEORDER', 'QUANTIDADEORDER', 'VENDA'],
+        # o GTIN do produto; o SKU da saída é o código interno (PRODUTO_ID)
+        'codigo_barras': 'COD_BARRAS',
+        'colunas': {
+            'sku': 'PRODUTO_ID',
+            'name': 'NOMEORDER',
+            'price': 'VENDA',
+            'quantity': 'QUANTIDADEORDER',
+            'description': 'FORNECEDOR',
+        },
+    },
+    'sku_name_quantity_price': {
+        'descricao': 'planilhas simples (sku;name;quantity;price, com ou sem INTERNO/description)',
+        'assinatura': ['sku', 'name', 'quantity', 'price'],
+        'colunas': {
+            'sku': 'sku',
+            'name': 'name',
+            'price': 'price',
+            'quantity': 'quantity',
+            'description': 'description',
+        },
+        'opcionais': ['description'],
+    },
+    'ean_descricao_valor': {
+        'descricao': 'planilha de vendas do ERP (CODIGO EAN;INTERNO;DESCRICAO;QUANTIDADE;VALOR)',
+        'assinatura': ['CODIGO EAN', 'DESCRICAO', 'QUANTIDADE', 'VALOR'],
+        'colunas': {
+            'sku': 'CODIGO EAN',
+            'name': 'DESCRICAO',
+            'price': 'VALOR',
+            'quantity': 'QUANTIDADE',
+        },
+    },
+    'posicao_estoque': {
+        'descricao': 'relatório "Posição de Estoque" (Cod.;Descrição;...;Saldo Est.;Pr.Custo;Pr.Venda)',
+        'assinatura': ['Cod.', 'Descrição', 'Saldo Est.', 'Pr.Venda'],
+        # o cabeçalho tem células mescladas e não fica sobre os dados: o
+        # mapeamento é por posição, o cabeçalho serve só para reconhecer o layout
+        'colunas': {'sku': 0, 'name': 1, 'price': 13, 'quantity': 10},
+        # o relatório repete o cabeçalho a cada página e tem rodapé
+        'sku_valido': r'\d+',
+    },
+    'posicional': {
+        'descricao': 'layout antigo por posição, sem cabeçalho útil (colunas 1, 2, 15, 8, 3)',
+        'assinatura': None,
+        'colunas': {'sku': 1, 'name': 2, 'price': 15, 'quantity': 8, 'description': 3},
+    },
+}
+
+
+class PerfilNaoReconhecido(ValueError):
+    pass
+
+
+def _normalizar(nome):
+    return str(nome or '').strip().lower()
+
+
+def detectar_separador(linha):
+    return ';' if linha.count(';') >= linha.count(',') else ','
+
+
+def _resolver_colunas(perfil, cabecalho):
+    posicoes = {_normalizar(nome): i for i, nome in reversed(list(enumerate(cabecalho)))}
+    indices = {}
+    for campo in CAMPOS:
+        origem = perfil['colunas'].get(campo)
+        if origem is None:
+            indices[campo] = None
+        elif isinstance(origem, int):
+            # mapeamento por posição: a linha precisa ter colunas suficientes
+            if origem >= len(cabecalho):
+                return None
+            indices[campo] = origem
+        elif _normalizar(origem) in posicoes:
+            indices[campo] = posicoes[_normalizar(origem)]
+        elif campo in perfil.get('opcionais', []):
+            indices[campo] = None
+        else:
+            return None
+    return indices
+
+
+def resolver_perfil(linhas_iniciais, nome=None):
+    """
+    Escolhe o perfil pelas primeiras linhas do arquivo (ou usa o informado em
+    `nome`) e devolve um dicionário com o nome do perfil, a linha do
+    cabeçalho, o índice da coluna de cada campo (None se o campo não existir
+    no layout) e o padrão de SKU válido, se houver.
+    """
+    if nome is not None and nome not in PERFIS:
+        raise PerfilNaoReconhecido(f"perfil desconhecido: '{nome}' (opções: {', '.join(PERFIS)})")
+
+    candidatos = [nome] if nome else [n for n, p in PERFIS.items() if p['assinatura']]
+    for numero, linha in enumerate(linhas_iniciais):
+        presentes = {_normalizar(c) for c in linha}
+        for candidato in candidatos:
+            perfil = PERFIS[candidato]
+            assinatura = perfil['assinatura'] or []
+            if not all(_normalizar(c) in presentes for c in assinatura):
+                continue
+            indices = _resolver_colunas(perfil, linha)
+            if indices is not None:
+                return {
+                    'nome': candidato,
+                    'linha_cabecalho': numero,
+                    'indices': indices,
+                    'sku_valido': perfil.get('sku_valido'),
+                }
+
+    if nome:
+        raise PerfilNaoReconhecido(f"o cabeçalho do arquivo não corresponde ao perfil '{nome}'")
+    cabecalho = ';'.join(_normalizar(c) for c in linhas_iniciais[0]) if linhas_iniciais else ''
+    raise PerfilNaoReconhecido(
+        f"layout não reconhecido (cabeçalho: '{cabecalho[:120]}'); "
+        f"use --perfil com um de: {', '.join(PERFIS)}"
+    )
@@ -1,51 +1,831 @@
-import pandas as pd
+"""
+Conversor das exportações de estoque para sku,name,price,quantity,description.
+
+Serve como script (python resumo_csv.py arquivo.csv) e como biblioteca:
+
+  import resumo_csv
+  resumo = resumo_csv.converter_arquivo('estoque.csv', 'saida.csv')
+  for sku, name, price, quantity, description in resumo_csv.iterar_resumo('estoque.csv'):
+      ...
+  df = resumo_csv.resumo_dataframe('estoque.xlsx')
+
+numpy e pandas só são importados quando usados: arquivos pequenos (até
+LIMITE_CAMINHO_LEVE) são convertidos só com a biblioteca padrão, com a
+mesma saída do caminho com pandas.
+"""
+
+import argparse
+import codecs
+import contextlib
+import csv
+import itertools
+import math
+import re
 import sys
 import os
+import threading
+
+import leitor_planilha
+from perfis import LINHAS_BUSCA_CABECALHO, PERFIS, detectar_separador, resolver_perfil
+from validacao_sku import COLUNAS_REJEITADOS, ValidadorSku, ValidadorSkuLinhas, caminho_rejeitados
+
+# incrementar sempre que a saída para a mesma entrada mudar (invalida o cache)
+VERSAO_CONVERSOR = 3
+
+NOVAS_COLUNAS = ['sku', 'name', 'price', 'quantity', 'description']
+
+# colunas de texto das planilhas, lidas sempre como string. No CSV todas as
+# colunas são lidas como string: a inferência de tipo do pandas muda com o
+# bloco (um SKU vazio num bloco transforma só ele em float, uma célula suja
+# deixa só aquele bloco como texto), e price/quantity passam só pelo
+# normalizar_numeros, com o mesmo resultado em qualquer --bloco e no leve
+CAMPOS_TEXTO = ['sku', 'name', 'description']
+
+# número comum do ERP ("29,05", "-3", "1.5"): convertido sem nenhuma limpeza
+NUMERO_COMUM = r'[+-]?\d+(?:[,.]\d+)?'
+# número já limpo (vírgula decimal trocada por ponto), aceitando expoente
+NUMERO_LIMPO = r'[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?'
+
+TAMANHO_BLOCO_PADRAO = 50_000
+
+# até este tamanho de entrada o motor 'auto' usa o caminho leve (só a
+# biblioteca padrão): nos arquivos pequenos do dia a dia, importar o pandas
+# demora mais que a própria conversão
+LIMITE_CAMINHO_LEVE = 4 * 1024 * 1024
+MOTORES = ('auto', 'leve', 'pandas')
+
+# células que o read_csv trata como vazias (os na_values padrão do pandas);
+# o caminho leve precisa tratá-las igual para gerar a mesma saída
+VALORES_VAZIOS = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+])
+
+# o encoding é decidido por uma amostra do início do arquivo, então o CSV é
+# lido uma única vez (antes uma falha tardia de utf-8 relia tudo em latin1)
+TAMANHO_AMOSTRA_ENCODING = 64 * 1024
+
+# bytes 0x80-0x9F: caracteres no cp1252 (€, “, ”, …), controles no latin1.
+# os 5 bytes que o cp1252 não define ficam com o valor latin1.
+_CP1252 = [bytes([b]).decode('cp1252', errors='ignore') or chr(b) for b in range(256)]
+_BYTES_CP1252 = re.compile(rb'[\x80-\x9f]')
+
+_transcodificacao = threading.local()
+
 
-def resumir_csv(input_file, output_file):
-    colunas_para_extrair = [1, 2, 15, 8, 3]
-    novas_colunas = ['sku', 'name', 'price', 'quantity', 'description']
+def _decodificar_como_cp1252(erro):
+    _transcodificacao.usada = True
+    trecho = erro.object[erro.start:erro.end]
+    return ''.join(_CP1252[b] for b in trecho), erro.end
 
+
+# handler de encoding_errors: um byte inválido no meio de um arquivo utf-8 é
+# lido como cp1252 em vez de abortar a leitura
+codecs.register_error('resumo_csv_cp1252', _decodificar_como_cp1252)
+
+
+def detectar_encoding(input_file, tamanho_amostra=TAMANHO_AMOSTRA_ENCODING):
+    """Escolhe entre utf-8-sig, utf-8, cp1252 e latin1 olhando só o começo do arquivo."""
+    with open(input_file, 'rb') as f:
+        amostra = f.read(tamanho_amostra)
+
+    if amostra.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
     try:
-        # tenta utf-8, se falhar usa latin1
-        try:
-            df = pd.read_csv(input_file, sep=';', encoding='utf-8', header=None, skiprows=1, decimal=',')
-        except UnicodeDecodeError:
-            df = pd.read_csv(input_file, sep=';', encoding='latin1', header=None, skiprows=1, decimal=',')
-
-        df_resumo = df[colunas_para_extrair].copy()
-        df_resumo.columns = novas_colunas
-        df_resumo['price'] = df_resumo['price'].astype(float).round(2)
-
-        df_resumo['quantity'] = (
-            df_resumo['quantity']
-            .fillna(0)
-            .astype(str)
-            .str.replace(',', '.')
-            .str.replace(' ', '')
-            .apply(lambda x: int(float(x)) if x and x != 'nan' else 0)
+        # final=False: um caractere multibyte cortado no fim da amostra não é erro
+        codecs.getincrementaldecoder('utf-8')().decode(amostra, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    if _BYTES_CP1252.search(amostra):
+        return 'cp1252'
+    return 'latin1'
+
+
+def _ler_linhas_iniciais(input_file, encoding):
+    with open(input_file, encoding=encoding, errors='resumo_csv_cp1252', newline='') as f:
+        separador = detectar_separador(f.readline())
+        f.seek(0)
+        linhas = list(itertools.islice(csv.reader(f, delimiter=separador), LINHAS_BUSCA_CABECALHO))
+    return linhas, separador
+
+
+def _colunas_lidas(perfil):
+    indices = perfil['indices']
+    colunas = sorted({i for i in indices.values() if i is not None})
+    texto = {indices[c] for c in CAMPOS_TEXTO if indices[c] is not None}
+    return colunas, texto
+
+
+def _ler_csv(input_file, encoding, perfil, **kwargs):
+    import pandas as pd
+
+    # só as colunas mapeadas pelo perfil são lidas, todas como texto
+    colunas, _ = _colunas_lidas(perfil)
+    return pd.read_csv(
+        input_file,
+        sep=perfil['separador'],
+        encoding=encoding,
+        encoding_errors='resumo_csv_cp1252',
+        header=None,
+        skiprows=perfil['linha_cabecalho'] + 1,
+        usecols=colunas,
+        dtype=str,
+        **kwargs,
+    )
+
+
+def _novas_estatisticas():
+    return {'vazias': 0, 'corrigidas': 0, 'rejeitadas': 0}
+
+
+def _texto_para_float(serie):
+    """Converte texto em float64 de forma vetorizada; retorna também vazias e corrigidas."""
+    import numpy as np
+
+    texto = serie.astype('string')
+    valores = np.full(len(texto), np.nan)
+    vazias = texto.isna().to_numpy(dtype=bool, copy=True)
+    corrigidas = np.zeros(len(texto), dtype=bool)
+
+    # caminho rápido: a maioria das células já está no formato comum
+    comum = texto.str.fullmatch(NUMERO_COMUM).fillna(False).to_numpy(dtype=bool)
+    if comum.any():
+        valores[comum] = texto[comum].str.replace(',', '.', regex=False).astype('float64').to_numpy()
+
+    resto = ~comum & ~vazias
+    if resto.any():
+        sujo = texto[resto]
+        limpo = sujo.str.replace(r'\s+', '', regex=True)
+        # com vírgula, ou com mais de um ponto, os pontos são separador de milhar
+        milhar = (
+            limpo.str.contains(',', regex=False) & limpo.str.contains('.', regex=False)
+        ) | (limpo.str.count(r'\.') > 1)
+        limpo = limpo.mask(milhar, limpo.str.replace('.', '', regex=False))
+        corrigidas[resto] = (limpo != sujo).to_numpy(dtype=bool)
+        vazias[resto] = (limpo == '').to_numpy(dtype=bool)
+
+        limpo = limpo.str.replace(',', '.', regex=False)
+        numero = limpo.str.fullmatch(NUMERO_LIMPO).to_numpy(dtype=bool)
+        parcial = np.full(len(limpo), np.nan)
+        parcial[numero] = limpo[numero].astype('float64').to_numpy()
+        valores[resto] = parcial
+
+    return valores, vazias, corrigidas
+
+
+def normalizar_numeros(serie, inteiro=False):
+    """
+    Converte uma coluna de price/quantity em números sem código Python por linha.
+
+    Colunas que o pandas já leu como número passam direto. Colunas de texto
+    aceitam vírgula decimal ("29,05"), separador de milhar ("1.234,56",
+    "1.234.567", "1 234") e espaços soltos. Células vazias e valores
+    inválidos viram NaN (ou 0 quando inteiro=True, truncando como
+    int(float(x))). Retorna a série convertida e um dicionário com a
+    contagem de células vazias, corrigidas e rejeitadas.
+    """
+    import numpy as np
+    import pandas as pd
+
+    if pd.api.types.is_numeric_dtype(serie):
+        valores = serie.to_numpy(dtype='float64', na_value=np.nan)
+        vazias = np.isnan(valores)
+        corrigidas = np.zeros(len(serie), dtype=bool)
+    else:
+        valores, vazias, corrigidas = _texto_para_float(serie)
+
+    validos = np.isfinite(valores)
+    if inteiro:
+        validos &= np.abs(np.where(validos, valores, 0)) < 2 ** 63
+    rejeitadas = ~validos & ~vazias
+
+    if inteiro:
+        truncados = np.where(validos, np.trunc(valores), 0)
+        corrigidas |= validos & (truncados != valores)
+        valores = truncados.astype('int64')
+    else:
+        valores = np.where(validos, valores, np.nan)
+
+    estatisticas = {
+        'vazias': int(vazias.sum()),
+        'corrigidas': int((corrigidas & validos).sum()),
+        'rejeitadas': int(rejeitadas.sum()),
+    }
+    return pd.Series(valores, index=serie.index, name=serie.name), estatisticas
+
+
+def _somar_estatisticas(total, parcial):
+    for chave, valor in parcial.items():
+        total[chave] += valor
+
+
+def _resumir_bloco(df, perfil, estatisticas, validador=None, rejeitados=None, carga=None):
+    import numpy as np
+    import pandas as pd
+
+    indices = perfil['indices']
+    df_resumo = pd.DataFrame({
+        campo: df[indices[campo]] if indices[campo] is not None else np.nan
+        for campo in NOVAS_COLUNAS
+    }, index=df.index)
+
+    if perfil['sku_valido']:
+        # descarta cabeçalhos repetidos, rodapés e linhas em branco de relatórios
+        validas = df_resumo['sku'].str.strip().str.fullmatch(perfil['sku_valido']).fillna(False)
+        validas = validas.to_numpy(dtype=bool)
+        estatisticas['descartadas'] += int((~validas).sum())
+        df_resumo = df_resumo[validas]
+
+    price, parcial = normalizar_numeros(df_resumo['price'])
+    df_resumo['price'] = price.round(2)
+    _somar_estatisticas(estatisticas['price'], parcial)
+
+    df_resumo['quantity'], parcial = normalizar_numeros(df_resumo['quantity'], inteiro=True)
+    _somar_estatisticas(estatisticas['quantity'], parcial)
+
+    # o índice do bloco é a posição do registro depois do cabeçalho; as
+    # linhas contam a partir de 1, como no upload web
+    linhas = df_resumo.index.to_numpy() + perfil['linha_cabecalho'] + 2
+    if validador is not None:
+        aceitas, df_rejeitadas = validador.validar(df_resumo, linhas)
+        if rejeitados is not None:
+            df_rejeitadas.to_csv(rejeitados, index=False, header=False)
+        df_resumo = df_resumo[aceitas]
+        linhas = linhas[aceitas]
+
+    if carga is not None:
+        carga.adicionar(df_resumo, linhas)
+    return df_resumo
+
+
+def _blocos_csv(input_file, encoding, perfil, tamanho_bloco):
+    with _ler_csv(input_file, encoding, perfil, chunksize=tamanho_bloco) as leitor:
+        yield from leitor
+
+
+_NUMERO_COMUM = re.compile(NUMERO_COMUM)
+_NUMERO_LIMPO = re.compile(NUMERO_LIMPO)
+_ESPACOS = re.compile(r'\s+')
+
+
+def _numero(valor, estatisticas, inteiro=False):
+    """normalizar_numeros para uma célula só (caminho leve); a contagem vai para estatisticas."""
+    corrigida = False
+    if valor is None:
+        numero = None
+    elif isinstance(valor, (int, float)):
+        # número vindo da planilha
+        numero = float(valor)
+    elif _NUMERO_COMUM.fullmatch(valor := str(valor)):
+        numero = float(valor.replace(',', '.'))
+    else:
+        limpo = _ESPACOS.sub('', valor)
+        if (',' in limpo and '.' in limpo) or limpo.count('.') > 1:
+            limpo = limpo.replace('.', '')
+        corrigida = limpo != valor
+        limpo = limpo.replace(',', '.')
+        if not limpo:
+            numero = None
+        else:
+            numero = float(limpo) if _NUMERO_LIMPO.fullmatch(limpo) else math.nan
+
+    if numero is None:
+        estatisticas['vazias'] += 1
+    elif not math.isfinite(numero) or (inteiro and abs(numero) >= 2 ** 63):
+        estatisticas['rejeitadas'] += 1
+        numero = None
+    elif inteiro:
+        truncado = math.trunc(numero)
+        corrigida = corrigida or truncado != numero
+        numero = truncado
+
+    if numero is None:
+        return 0 if inteiro else None
+    estatisticas['corrigidas'] += corrigida
+    return numero
+
+
+def _arredondar_centavos(valor):
+    # o mesmo que Series.round(2): rint(x * 100) / 100, mantendo o sinal de -0.0
+    centavos = valor * 100
+    if not math.isfinite(centavos):
+        return centavos / 100
+    return math.copysign(round(centavos), centavos) / 100
+
+
+def _celulas(input_file, encoding, perfil, linhas_planilha=None):
+    """
+    Células de cada registro, na ordem de NOVAS_COLUNAS, com None onde o
+    read_csv (ou em_blocos, na planilha) teria NaN.
+    """
+    indices = perfil['indices']
+    colunas = [indices[c] for c in NOVAS_COLUNAS]
+
+    if linhas_planilha is not None:
+        texto = [c in CAMPOS_TEXTO for c in NOVAS_COLUNAS]
+        for linha in linhas_planilha:
+            yield [
+                None if c is None else leitor_planilha.celula(linha, c, t)
+                for c, t in zip(colunas, texto)
+            ]
+        return
+
+    with open(input_file, encoding=encoding, errors='resumo_csv_cp1252', newline='') as f:
+        leitor = csv.reader(f, delimiter=perfil['separador'])
+        for linha in itertools.islice(leitor, perfil['linha_cabecalho'] + 1, None):
+            # linhas em branco não contam, como no read_csv
+            if not linha:
+                continue
+            yield [
+                None if c is None or c >= len(linha) or linha[c] in VALORES_VAZIOS else linha[c]
+                for c in colunas
+            ]
+
+
+def _resumir_linhas(celulas, perfil, estatisticas, validador=None, rejeitados=None):
+    """_resumir_bloco registro a registro, só com a biblioteca padrão (caminho leve)."""
+    sku_valido = re.compile(perfil['sku_valido']) if perfil['sku_valido'] else None
+    escritor = csv.writer(rejeitados, lineterminator=os.linesep) if rejeitados is not None else None
+    primeira_linha = perfil['linha_cabecalho'] + 2
+
+    for posicao, (sku, name, price, quantity, description) in enumerate(celulas):
+        if sku_valido is not None and (sku is None or not sku_valido.fullmatch(sku.strip())):
+            estatisticas['descartadas'] += 1
+            continue
+
+        price = _numero(price, estatisticas['price'])
+        if price is not None:
+            price = _arredondar_centavos(price)
+        quantity = _numero(quantity, estatisticas['quantity'], inteiro=True)
+
+        if validador is not None:
+            linha = primeira_linha + posicao
+            rejeicao = validador.validar(sku, linha)
+            if rejeicao is not None:
+                if escritor is not None:
+                    escritor.writerow([linha, rejeicao[0], sku, name, rejeicao[1]])
+                continue
+
+        yield sku, name, price, quantity, description
+
+
+def _escolher_motor(input_file, motor, carga=None):
+    if motor not in MOTORES:
+        raise ValueError(f"motor '{motor}' desconhecido (use {', '.join(MOTORES)})")
+    # a carga no banco valida e grava DataFrames
+    if carga is not None:
+        if motor == 'leve':
+            raise ValueError("a carga no banco precisa do motor pandas")
+        return 'pandas'
+    if motor == 'auto':
+        return 'leve' if os.path.getsize(input_file) <= LIMITE_CAMINHO_LEVE else 'pandas'
+    return motor
+
+
+def _preparar(input_file, encoding, nome_perfil, validar, leve):
+    """
+    Detecta o encoding e o perfil e monta o resumo (as estatísticas da
+    conversão). Na planilha, as linhas já lidas para achar o perfil são
+    reaproveitadas, sem abrir o arquivo de novo: volta também o iterador
+    com o restante das linhas (None no CSV).
+    """
+    _transcodificacao.usada = False
+    planilha = leitor_planilha.eh_planilha(input_file)
+    linhas = None
+
+    if planilha:
+        encoding = None
+        linhas = leitor_planilha.ler_linhas(input_file)
+        iniciais = list(itertools.islice(linhas, LINHAS_BUSCA_CABECALHO))
+        perfil = resolver_perfil(iniciais, nome_perfil)
+        linhas = itertools.chain(iniciais[perfil['linha_cabecalho'] + 1:], linhas)
+    else:
+        encoding = encoding or detectar_encoding(input_file)
+        iniciais, separador = _ler_linhas_iniciais(input_file, encoding)
+        perfil = resolver_perfil(iniciais, nome_perfil)
+        perfil['separador'] = separador
+
+    resumo = {
+        'formato': leitor_planilha.formato(input_file) if planilha else 'csv',
+        'encoding': encoding,
+        'perfil': perfil['nome'],
+        'linhas': 0,
+        'descartadas': 0,
+        'price': _novas_estatisticas(),
+        'quantity': _novas_estatisticas(),
+    }
+    validador = None
+    if validar:
+        validador = ValidadorSkuLinhas() if leve else ValidadorSku()
+        resumo['rejeitados'] = validador.estatisticas
+    return perfil, linhas, resumo, validador
+
+
+def _abrir_rejeitados(caminho):
+    if caminho is None:
+        return contextlib.nullcontext()
+    arquivo = open(caminho, 'w', encoding='utf-8', newline='')
+    arquivo.write(','.join(COLUNAS_REJEITADOS) + os.linesep)
+    return arquivo
+
+
+def _blocos_resumo(input_file, encoding, perfil, linhas_planilha, tamanho_bloco, resumo, validador=None,
+                   rejeitados=None, carga=None):
+    """Blocos (DataFrames) da saída pelo caminho com pandas."""
+    if linhas_planilha is None and not tamanho_bloco:
+        blocos = [_ler_csv(input_file, encoding, perfil)]
+    elif linhas_planilha is not None:
+        # planilhas são sempre lidas em blocos, direto do .xls/.xlsx
+        colunas, texto = _colunas_lidas(perfil)
+        blocos = leitor_planilha.em_blocos(linhas_planilha, colunas, texto, tamanho_bloco or TAMANHO_BLOCO_PADRAO)
+    else:
+        # modo streaming: cada bloco é convertido e entregue antes de ler o
+        # próximo, então a memória fica limitada ao tamanho do bloco
+        blocos = _blocos_csv(input_file, encoding, perfil, tamanho_bloco)
+
+    for bloco in blocos:
+        df_resumo = _resumir_bloco(bloco, perfil, resumo, validador, rejeitados, carga)
+        resumo['linhas'] += len(df_resumo)
+        yield df_resumo
+
+
+def _converter(input_file, output_file, encoding, tamanho_bloco, nome_perfil=None, validar=True, carga=None,
+               motor='auto'):
+    leve = _escolher_motor(input_file, motor, carga) == 'leve'
+    perfil, linhas, resumo, validador = _preparar(input_file, encoding, nome_perfil, validar, leve)
+    resumo['motor'] = 'leve' if leve else 'pandas'
+
+    with _abrir_rejeitados(caminho_rejeitados(output_file) if validar else None) as rejeitados, \
+            open(output_file, 'w', encoding='utf-8', newline='') as saida:
+        if leve:
+            escritor = csv.writer(saida, lineterminator=os.linesep)
+            escritor.writerow(NOVAS_COLUNAS)
+            for registro in _resumir_linhas(_celulas(input_file, resumo['encoding'], perfil, linhas), perfil,
+                                            resumo, validador, rejeitados):
+                escritor.writerow(registro)
+                resumo['linhas'] += 1
+        else:
+            cabecalho = True
+            for df_resumo in _blocos_resumo(input_file, resumo['encoding'], perfil, linhas, tamanho_bloco, resumo,
+                                            validador, rejeitados, carga):
+                df_resumo.to_csv(saida, index=False, header=cabecalho, sep=',', decimal='.')
+                cabecalho = False
+            if cabecalho:
+                saida.write(','.join(NOVAS_COLUNAS) + os.linesep)
+    return _registrar_transcodificacao(resumo)
+
+
+def iterar_resumo(input_file, perfil=None, encoding=None, validar=True, rejeitados=None, resumo=None):
+    """
+    Registros da saída, um a um, como tuplas (sku, name, price, quantity,
+    description), convertidos conforme são pedidos e sem pandas em nenhum
+    tamanho de arquivo. Células vazias vêm como None; quantity é sempre int.
+
+    `rejeitados` é o caminho do CSV de SKUs rejeitados (padrão: não grava).
+    Se `resumo` for um dicionário, ele recebe as estatísticas da conversão
+    (as mesmas de converter_arquivo), completas quando o iterador termina.
+    """
+    perfil, linhas, estatisticas, validador = _preparar(input_file, encoding, perfil, validar, leve=True)
+    if resumo is not None:
+        resumo.update(estatisticas, motor='leve')
+        estatisticas = resumo
+
+    with _abrir_rejeitados(rejeitados if validar else None) as arquivo_rejeitados:
+        for registro in _resumir_linhas(_celulas(input_file, estatisticas['encoding'], perfil, linhas), perfil,
+                                        estatisticas, validador, arquivo_rejeitados):
+            estatisticas['linhas'] += 1
+            yield registro
+    _registrar_transcodificacao(estatisticas)
+
+
+def resumo_dataframe(input_file, perfil=None, encoding=None, validar=True, rejeitados=None, resumo=None,
+                     tamanho_bloco=None):
+    """
+    A saída inteira num DataFrame (colunas de NOVAS_COLUNAS, índice 0..n-1),
+    pelo caminho com pandas. Os parâmetros são os de iterar_resumo;
+    tamanho_bloco lê o CSV em blocos, como no --streaming.
+    """
+    import pandas as pd
+
+    perfil, linhas, estatisticas, validador = _preparar(input_file, encoding, perfil, validar, leve=False)
+    if resumo is not None:
+        resumo.update(estatisticas, motor='pandas')
+        estatisticas = resumo
+
+    with _abrir_rejeitados(rejeitados if validar else None) as arquivo_rejeitados:
+        blocos = list(_blocos_resumo(input_file, estatisticas['encoding'], perfil, linhas, tamanho_bloco,
+                                     estatisticas, validador, arquivo_rejeitados))
+    _registrar_transcodificacao(estatisticas)
+    if not blocos:
+        return pd.DataFrame(columns=NOVAS_COLUNAS)
+    return pd.concat(blocos).reset_index(drop=True)
+
+
+def _registrar_transcodificacao(resumo):
+    # arquivo utf-8 com bytes cp1252 depois da amostra (exportação "misturada")
+    if _transcodificacao.usada and (resumo['encoding'] or '').startswith('utf-8'):
+        resumo['encoding'] += '+cp1252'
+    return resumo
+
+
+def _imprimir_resumo(output_file, resumo):
+    print(f"📁 Saída: {output_file}")
+    print(f"   {resumo['linhas']} linhas ({resumo['encoding'] or resumo['formato']}, perfil {resumo['perfil']})")
+    if resumo['descartadas']:
+        print(f"   {resumo['descartadas']} linhas descartadas (sem SKU válido)")
+    for coluna in ('price', 'quantity'):
+        e = resumo[coluna]
+        print(f"   {coluna}: {e['vazias']} vazias, {e['corrigidas']} corrigidas, {e['rejeitadas']} rejeitadas")
+    if 'rejeitados' in resumo:
+        r = resumo['rejeitados']
+        print(
+            f"   sku: {r['sku_vazio']} vazios, {r['gtin_invalido']} GTIN inválidos, "
+            f"{r['duplicado']} duplicados (em {caminho_rejeitados(output_file)})"
         )
+    if 'carga' in resumo:
+        c = resumo['carga']
+        print(f"   banco: {c['carregadas']} produtos em {c['lotes']} lotes (upload #{c['upload_id']})")
+        for erro in c['erros']:
+            print(f"   ⚠ {erro}")
+
 
-        df_resumo.to_csv(output_file, index=False, sep=',', encoding='utf-8', decimal='.')
+def converter_arquivo(input_file, output_file, tamanho_bloco=None, encoding=None, cache=None, perfil=None,
+                      validar=True, carga=None, motor='auto'):
+    """
+    Converte um arquivo sem imprimir nada; erros sobem como exceção. Com
+    `carga` (carga_banco.CargaProdutos), os produtos vão também direto para o
+    banco, bloco a bloco, e o upload é fechado no fim.
 
-        print(f"✔ Arquivo convertido com sucesso!\n📁 Saída: {output_file}")
+    `motor` escolhe o caminho: 'leve' (biblioteca padrão), 'pandas' ou
+    'auto' (leve até LIMITE_CAMINHO_LEVE bytes). A saída é a mesma.
+    """
+    try:
+        resumo = None
+        if cache is not None:
+            # o modo streaming não entra na chave: a saída é a mesma. O perfil
+            # detectado depende só do conteúdo, que já está na chave
+            chave = cache.chave(input_file, {
+                'versao': VERSAO_CONVERSOR,
+                'perfil': perfil,
+                'perfis': PERFIS,
+                'novas_colunas': NOVAS_COLUNAS,
+                'encoding': encoding,
+                'validar': validar,
+            })
+            # as linhas rejeitadas vão junto com a saída no cache
+            anexos = {'rejeitados': caminho_rejeitados(output_file)} if validar else {}
+            resumo = cache.restaurar(chave, output_file, anexos)
+
+        if resumo is not None:
+            resumo['cache'] = True
+            if carga is not None:
+                import carga_banco
+                carga_banco.carregar_resumo(output_file, carga)
+        else:
+            resumo = _converter(input_file, output_file, encoding, tamanho_bloco, perfil, validar, carga, motor)
+            if cache is not None:
+                cache.guardar(chave, output_file, resumo, anexos)
+
+        if carga is not None:
+            resumo['carga'] = carga.concluir()
+        return resumo
+
+    except Exception as e:
+        if carga is not None:
+            carga.falhar(str(e))
+        raise
+
+
+def resumir_csv(input_file, output_file, tamanho_bloco=None, encoding=None, cache=None, perfil=None,
+                validar=True, carga=None, motor='auto'):
+    try:
+        resumo = converter_arquivo(
+            input_file, output_file, tamanho_bloco, encoding, cache, perfil, validar, carga, motor
+        )
+
+        if resumo.get('cache'):
+            print("✔ Entrada sem alterações desde a última conversão (cache).")
+        else:
+            print("✔ Arquivo convertido com sucesso!")
+        _imprimir_resumo(output_file, resumo)
+        return resumo
 
     except Exception as e:
         print(f"Ocorreu um erro durante o processamento: {e}")
         sys.exit(1)
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Uso correto:")
-        print("  python resumo_csv.py caminho_do_arquivo.csv")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        description="Resume a exportação de estoque do ERP em sku,name,price,quantity,description."
+    )
+    parser.add_argument(
+        "input_csv",
+        help="arquivo exportado pelo ERP (.csv, .xls ou .xlsx), ou um diretório/glob "
+        "para converter vários em paralelo",
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="lê e grava em blocos, com memória constante (para arquivos grandes)",
+    )
+    parser.add_argument(
+        "--bloco",
+        type=int,
+        default=TAMANHO_BLOCO_PADRAO,
+        help=f"linhas por bloco no modo streaming (padrão: {TAMANHO_BLOCO_PADRAO})",
+    )
+    parser.add_argument(
+        "--anterior",
+        help="resumo (.csv) ou snapshot (.npz) da execução anterior: grava também "
+        "só as linhas novas/alteradas e os SKUs removidos",
+    )
+    parser.add_argument(
+        "--snapshot",
+        help="grava um snapshot compacto (.npz) do resumo, para usar no próximo --anterior",
+    )
+    parser.add_argument(
+        "--parquet",
+        nargs="?",
+        const="",
+        help="grava também o resumo em Parquet, com tipos fixos "
+        "(arquivo opcional, padrão: <saída>.parquet)",
+    )
+    parser.add_argument(
+        "--historico",
+        help="diretório do histórico: acrescenta o resumo como a partição do dia",
+    )
+    parser.add_argument(
+        "--historico-dias",
+        type=int,
+        help="histórico: apaga as partições com mais de N dias",
+    )
+    parser.add_argument(
+        "--cache",
+        nargs="?",
+        const="",
+        help="reaproveita a saída anterior se a entrada não mudou "
+        "(diretório opcional, padrão: ~/.cache/resumo_csv)",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=512,
+        help="tamanho máximo do cache em disco, em MB (padrão: 512)",
+    )
+    parser.add_argument(
+        "--encoding",
+        help="força o encoding de entrada (padrão: detectado pelo início do arquivo)",
+    )
+    parser.add_argument(
+        "--perfil",
+        choices=list(PERFIS),
+        help="layout da entrada (padrão: detectado pelo cabeçalho)",
+    )
+    parser.add_argument(
+        "--sem-validacao",
+        action="store_true",
+        help="não rejeita SKUs vazios, com GTIN inválido ou repetidos",
+    )
+    parser.add_argument(
+        "--motor",
+        choices=MOTORES,
+        default="auto",
+        help="leve: só biblioteca padrão; pandas: vetorizado; auto: leve para arquivos "
+        f"de até {LIMITE_CAMINHO_LEVE // (1024 * 1024)} MB (padrão: auto)",
+    )
+    parser.add_argument(
+        "--banco",
+        nargs="?",
+        const=os.environ.get("DATABASE_URL", ""),
+        help="grava os produtos direto no banco SQLite do servidor, sem upload do CSV "
+        "(padrão: DATABASE_URL)",
+    )
+    parser.add_argument(
+        "--workspace",
+        type=int,
+        help="banco: workspace dono dos produtos",
+    )
+    parser.add_argument(
+        "--lote-banco",
+        type=int,
+        default=500,
+        help="banco: linhas por INSERT/transação (padrão: 500)",
+    )
+    parser.add_argument(
+        "--saida-dir",
+        default="resumos",
+        help="lote: diretório dos arquivos <entrada>_Resumo_final.csv (padrão: resumos)",
+    )
+    parser.add_argument(
+        "--processos",
+        type=int,
+        default=os.cpu_count(),
+        help="lote: conversões em paralelo (padrão: número de CPUs)",
+    )
+    args = parser.parse_args()
 
-    input_csv = sys.argv[1]
+    input_csv = args.input_csv
+    tamanho_bloco = args.bloco if args.streaming else None
+    diretorio_cache = None
+    if args.cache is not None:
+        from cache_conversao import DIRETORIO_PADRAO
+        diretorio_cache = args.cache or DIRETORIO_PADRAO
 
-    if not os.path.exists(input_csv):
-        print(f"Erro: arquivo '{input_csv}' não encontrado.")
-        sys.exit(1)
+    if os.path.isdir(input_csv) or not os.path.exists(input_csv):
+        import lote
+        entradas = lote.listar_entradas(input_csv)
+        if not entradas:
+            print(f"Erro: arquivo '{input_csv}' não encontrado.")
+            sys.exit(1)
+        if args.anterior or args.snapshot or args.banco is not None or args.parquet is not None or args.historico:
+            parser.error("--anterior, --snapshot, --banco, --parquet e --historico valem só para um arquivo por vez")
+
+        resultados, tempo_total = lote.converter_lote(
+            entradas,
+            args.saida_dir,
+            processos=args.processos,
+            tamanho_bloco=tamanho_bloco,
+            encoding=args.encoding,
+            perfil=args.perfil,
+            validar=not args.sem_validacao,
+            diretorio_cache=diretorio_cache,
+            tamanho_cache=args.cache_max_mb * 1024 * 1024,
+        )
+        lote.imprimir_tabela(resultados, tempo_total)
+        sys.exit(1 if any(r['erro'] for r in resultados) else 0)
 
     output_csv = "EstoqueFisico_Resumo_final.csv"
 
-    resumir_csv(input_csv, output_csv)
+    cache = None
+    if diretorio_cache is not None:
+        from cache_conversao import CacheConversao
+        cache = CacheConversao(diretorio_cache, args.cache_max_mb * 1024 * 1024)
+
+    indice_anterior = None
+    if args.anterior:
+        import delta_produtos
+        # carregado antes da conversão: o anterior pode ser o próprio arquivo de saída
+        indice_anterior = delta_produtos.carregar_indice(args.anterior)
+
+    carga = None
+    if args.banco is not None:
+        if not args.banco:
+            parser.error("--banco sem URL e DATABASE_URL não definido")
+        if args.workspace is None:
+            parser.error("--banco precisa de --workspace")
+        import carga_banco
+        try:
+            carga = carga_banco.CargaProdutos(
+                carga_banco.abrir_banco(args.banco),
+                args.workspace,
+                os.path.basename(input_csv),
+                args.lote_banco,
+            )
+        except Exception as e:
+            print(f"Erro ao abrir o banco: {e}")
+            sys.exit(1)
+
+    resumir_csv(
+        input_csv,
+        output_csv,
+        tamanho_bloco=tamanho_bloco,
+        encoding=args.encoding,
+        cache=cache,
+        perfil=args.perfil,
+        validar=not args.sem_validacao,
+        carga=carga,
+        motor=args.motor,
+    )
+
+    if indice_anterior is not None:
+        saida_delta, saida_removidos = delta_produtos.caminhos_delta(output_csv)
+        delta = delta_produtos.gerar_delta(output_csv, indice_anterior, saida_delta, saida_removidos)
+        print(
+            f"📁 Delta: {saida_delta} ({delta['novos']} novos, {delta['alterados']} alterados, "
+            f"{delta['inalterados']} inalterados)"
+        )
+        print(f"📁 Removidos: {saida_removidos} ({delta['removidos']} SKUs)")
+
+    if args.snapshot:
+        import delta_produtos
+        delta_produtos.salvar_snapshot(output_csv, args.snapshot)
+        print(f"📁 Snapshot: {args.snapshot}")
+
+    if args.parquet is not None or args.historico:
+        import snapshot_colunar
+        try:
+            if args.parquet is not None:
+                saida_parquet = args.parquet or os.path.splitext(output_csv)[0] + '.parquet'
+                linhas = snapshot_colunar.gravar_snapshot(output_csv, saida_parquet)
+                print(f"📁 Parquet: {saida_parquet} ({linhas} linhas)")
+            if args.historico:
+                particao = snapshot_colunar.acrescentar_historico(output_csv, args.historico)
+                print(f"📁 Histórico: {particao}")
+                if args.historico_dias is not None:
+                    removidas = snapshot_colunar.remover_anteriores(args.historico, args.historico_dias)
+                    if removidas:
+                        print(f"   {removidas} partições com mais de {args.historico_dias} dias removidas")
+        except Exception as e:
+            print(f"Ocorreu um erro ao gravar o snapshot colunar: {e}")
+            sys.exit(1)
@@ -0,0 +1,169 @@
+"""
+Snapshots colunares (Parquet) do resumo e histórico de estoque/preço.
+
+Uso:
+  python snapshot_colunar.py historico/ 7899790928662 7908153029110
+  python snapshot_colunar.py historico/ 7899790928662 --desde 2026-01-01
+"""
+
+import argparse
+import datetime
+import os
+import shutil
+import sys
+
+COLUNAS = ['sku', 'name', 'price', 'quantity', 'description']
+NOME_PARTE = 'parte.parquet'
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("para gravar Parquet instale o pyarrow (pip install pyarrow)")
+    return pa, pacsv, pq
+
+
+def _esquema(pa):
+    return pa.schema([
+        ('sku', pa.string()),
+        ('name', pa.string()),
+        ('price', pa.float64()),
+        ('quantity', pa.int64()),
+        ('description', pa.string()),
+    ])
+
+
+def gravar_snapshot(caminho_resumo, caminho_saida):
+    """
+    Regrava o resumo (.csv) em Parquet com tipos fixos, lote a lote (sem
+    carregar o arquivo inteiro), e devolve o número de linhas. A troca do
+    arquivo é atômica: quem estiver lendo o snapshot anterior não vê um
+    arquivo pela metade.
+    """
+    pa, pacsv, pq = _pyarrow()
+    import pyarrow.compute as pc
+
+    esquema = _esquema(pa)
+    opcoes = pacsv.ConvertOptions(
+        column_types=esquema,
+        include_columns=COLUNAS,
+        # só a descrição pode faltar; SKU e nome vazios continuam texto vazio
+        strings_can_be_null=False,
+        null_values=[''],
+    )
+
+    os.makedirs(os.path.dirname(os.path.abspath(caminho_saida)), exist_ok=True)
+    temporario = f"{caminho_saida}.{os.getpid()}.tmp"
+    linhas = 0
+    try:
+        leitor = pacsv.open_csv(caminho_resumo, convert_options=opcoes)
+        with pq.ParquetWriter(temporario, esquema, compression='zstd') as escritor:
+            for lote in leitor:
+                # descrição vazia vira nula, as demais strings ficam como estão
+                descricao = lote.column('description')
+                lote = lote.set_column(4, 'description', pc.if_else(pc.equal(descricao, ''), None, descricao))
+                escritor.write_batch(lote)
+                linhas += lote.num_rows
+        os.replace(temporario, caminho_saida)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    return linhas
+
+
+def carregar_snapshot(caminho, colunas=None):
+    """DataFrame de um snapshot gravado por gravar_snapshot."""
+    _, _, pq = _pyarrow()
+    return pq.read_table(caminho, columns=colunas).to_pandas()
+
+
+def acrescentar_historico(caminho_resumo, diretorio, data=None):
+    """
+    Grava o resumo como a partição do dia (<diretorio>/data=AAAA-MM-DD/) no
+    histórico. Uma nova execução no mesmo dia substitui a partição do dia;
+    as dos outros dias não são tocadas. Devolve o caminho da partição.
+    """
+    data = data or datetime.date.today()
+    particao = os.path.join(diretorio, f"data={data.isoformat()}")
+    os.makedirs(particao, exist_ok=True)
+    gravar_snapshot(caminho_resumo, os.path.join(particao, NOME_PARTE))
+    return particao
+
+
+def _particoes(diretorio):
+    for nome in os.listdir(diretorio):
+        if nome.startswith('data='):
+            try:
+                yield datetime.date.fromisoformat(nome[len('data='):]), os.path.join(diretorio, nome)
+            except ValueError:
+                continue
+
+
+def remover_anteriores(diretorio, manter_dias):
+    """Apaga as partições com mais de manter_dias dias; devolve quantas foram removidas."""
+    limite = datetime.date.today() - datetime.timedelta(days=manter_dias)
+    removidas = 0
+    for data, caminho in _particoes(diretorio):
+        if data < limite:
+            shutil.rmtree(caminho)
+            removidas += 1
+    return removidas
+
+
+def historico(diretorio, skus=None, desde=None, ate=None, colunas=('price', 'quantity')):
+    """
+    Preço e estoque por data, lidos do histórico. O filtro de datas descarta
+    partições inteiras e o de SKUs é aplicado na leitura de cada arquivo,
+    então só as colunas e linhas pedidas saem do disco.
+    """
+    pa, _, _ = _pyarrow()
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(
+        diretorio,
+        format='parquet',
+        partitioning=ds.partitioning(pa.schema([('data', pa.date32())]), flavor='hive'),
+    )
+    filtro = None
+    condicoes = []
+    if skus:
+        condicoes.append(ds.field('sku').isin(list(skus)))
+    if desde:
+        condicoes.append(ds.field('data') >= desde)
+    if ate:
+        condicoes.append(ds.field('data') <= ate)
+    for condicao in condicoes:
+        filtro = condicao if filtro is None else filtro & condicao
+
+    tabela = dataset.to_table(columns=['data', 'sku', *colunas], filter=filtro)
+    return tabela.to_pandas().sort_values(['sku', 'data'], kind='stable').reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Consulta o histórico de preço e estoque dos snapshots.")
+    parser.add_argument("diretorio", help="diretório do histórico (o mesmo de resumo_csv.py --historico)")
+    parser.add_argument("skus", nargs="*", help="SKUs a consultar (padrão: todos)")
+    parser.add_argument("--desde", type=datetime.date.fromisoformat, help="data inicial (AAAA-MM-DD)")
+    parser.add_argument("--ate", type=datetime.date.fromisoformat, help="data final (AAAA-MM-DD)")
+    parser.add_argument("-o", "--saida", help="grava o resultado em CSV em vez de imprimir")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.diretorio):
+        print(f"Erro: diretório '{args.diretorio}' não encontrado.")
+        sys.exit(1)
+
+    try:
+        df = historico(args.diretorio, args.skus, args.desde, args.ate)
+    except Exception as e:
+        print(f"Ocorreu um erro durante a consulta: {e}")
+        sys.exit(1)
+
+    if args.saida:
+        df.to_csv(args.saida, index=False, sep=',', encoding='utf-8', decimal='.')
+        print(f"📁 Saída: {args.saida} ({len(df)} linhas)")
+    else:
+        print(df.to_string(index=False))
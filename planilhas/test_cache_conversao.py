@@ -0,0 +1,51 @@
+"""
+CacheConversao com vários processos do lote na mesma chave.
+
+  python -m pytest planilhas/test_cache_conversao.py
+"""
+
+import os
+import threading
+
+from cache_conversao import CacheConversao
+
+CHAVE = 'a' * 40
+
+
+def test_restaurar_durante_guardar_nunca_devolve_arquivo_pela_metade(tmp_path):
+    cache = CacheConversao(str(tmp_path / 'cache'))
+    conteudo = b'sku,name,price,quantity,description\n' + b'1,X,1.0,1,\n' * 200_000
+    origem = tmp_path / 'saida.csv'
+    origem.write_bytes(conteudo)
+    cache.guardar(CHAVE, str(origem), {'linhas': 200_000})
+
+    # outro processo convertendo o mesmo conteúdo grava a mesma chave de novo
+    parar = threading.Event()
+
+    def regravar():
+        while not parar.is_set():
+            cache.guardar(CHAVE, str(origem), {'linhas': 200_000})
+
+    gravador = threading.Thread(target=regravar)
+    gravador.start()
+    try:
+        for i in range(30):
+            destino = tmp_path / f'restaurada{i}.csv'
+            if cache.restaurar(CHAVE, str(destino)) is not None:
+                assert destino.read_bytes() == conteudo
+    finally:
+        parar.set()
+        gravador.join()
+
+    assert not [n for n in os.listdir(cache.diretorio) if n.endswith('.tmp')]
+
+
+def test_entrada_removida_no_meio_e_miss(tmp_path):
+    cache = CacheConversao(str(tmp_path / 'cache'))
+    origem = tmp_path / 'saida.csv'
+    origem.write_text('sku,name,price,quantity,description\n1,X,1.0,1,\n')
+    cache.guardar(CHAVE, str(origem), {'linhas': 1}, anexos={'rejeitados': str(origem)})
+
+    # o LRU de outro processo apagou o anexo depois do resumo ter sido lido
+    os.remove(cache._caminho_anexo(CHAVE, 'rejeitados'))
+    assert cache.restaurar(CHAVE, str(tmp_path / 'r.csv'), anexos={'rejeitados': str(tmp_path / 'rej.csv')}) is None
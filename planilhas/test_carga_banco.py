@@ -0,0 +1,107 @@
+"""
+Carga direta no banco contra o mesmo esquema do servidor (as migrações do
+drizzle aplicadas num SQLite temporário): as linhas gravadas têm que ser as
+que o products.uploadCsv gravaria para o mesmo CSV.
+
+  python -m pytest planilhas/test_carga_banco.py
+"""
+
+import json
+import os
+import sqlite3
+
+import pytest
+
+import carga_banco
+
+DRIZZLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'drizzle')
+WORKSPACE = 7
+
+
+@pytest.fixture
+def banco(tmp_path):
+    caminho = tmp_path / 'banco.db'
+    conexao = sqlite3.connect(caminho)
+    with open(os.path.join(DRIZZLE, 'meta', '_journal.json'), encoding='utf-8') as f:
+        migracoes = [entrada['tag'] for entrada in json.load(f)['entries']]
+    for tag in migracoes:
+        with open(os.path.join(DRIZZLE, f'{tag}.sql'), encoding='utf-8') as f:
+            for comando in f.read().split('--> statement-breakpoint'):
+                if comando.strip():
+                    conexao.execute(comando)
+    conexao.commit()
+    conexao.close()
+    # pelo mesmo caminho do --banco (DATABASE_URL=file:...)
+    conexao = carga_banco.abrir_banco(f'file:{caminho}')
+    yield conexao
+    conexao.close()
+
+
+def _carregar(conexao, tmp_path, conteudo, nome='resumo.csv'):
+    caminho = tmp_path / nome
+    caminho.write_text(conteudo, encoding='utf-8')
+    carga = carga_banco.CargaProdutos(conexao, WORKSPACE, nome, tamanho_lote=2)
+    carga_banco.carregar_resumo(caminho, carga)
+    return carga.concluir()
+
+
+def _produtos(conexao):
+    return {
+        sku: (name, price, quantity, description, upload_id)
+        for sku, name, price, quantity, description, upload_id in conexao.execute(
+            "SELECT sku, name, price, quantity, description, uploadId FROM products WHERE workspaceId = ?",
+            (WORKSPACE,),
+        )
+    }
+
+
+def test_mesmas_linhas_do_upload_web(banco, tmp_path):
+    resultado = _carregar(banco, tmp_path, (
+        "sku,name,price,quantity,description\n"
+        "1,ALOE VERA,29.05,1,NATURE\n"
+        "2,ESTOQUE NEGATIVO,10.0,-3,\n"
+        "3,MEIO CENTAVO,0.015,0,\n"
+        "4,ARREDONDA,2.675,5,\n"
+        "5,SEM QUANTIDADE,1.005,,\n"
+        ",SEM SKU,1.0,1,\n"
+        "6,,1.0,1,\n"
+        "7,SEM PRECO,,1,\n"
+    ))
+
+    # valores esperados: parsePriceToCents (Math.round(preço * 100)) e
+    # parseQuantity (Math.max(quantidade, 0)) do server/routers.ts
+    upload = resultado['upload_id']
+    assert _produtos(banco) == {
+        '1': ('ALOE VERA', 2905, 1, 'NATURE', upload),
+        '2': ('ESTOQUE NEGATIVO', 1000, 0, None, upload),
+        '3': ('MEIO CENTAVO', 2, 0, None, upload),
+        '4': ('ARREDONDA', 268, 5, None, upload),
+        '5': ('SEM QUANTIDADE', 100, 0, None, upload),
+    }
+    assert resultado['erros'] == [
+        "Linha 7: SKU obrigatório.",
+        "Linha 8: Nome obrigatório.",
+        "Linha 9: Preço inválido.",
+    ]
+    assert banco.execute(
+        "SELECT status, rowCount FROM product_uploads WHERE id = ?", (upload,)
+    ).fetchone() == ('completed', 5)
+
+
+def test_upsert_por_workspace_e_sku(banco, tmp_path):
+    _carregar(banco, tmp_path, "sku,name,price,quantity,description\n1,ANTIGO,1.0,1,\n2,FICA,2.0,2,\n", 'a.csv')
+    # SKU repetido no mesmo arquivo: vale a última linha, como no bulkUpsertProducts
+    segundo = _carregar(
+        banco, tmp_path, "sku,name,price,quantity,description\n1,NOVO,3.0,3,X\n1,MAIS NOVO,4.0,4,Y\n", 'b.csv'
+    )
+
+    produtos = _produtos(banco)
+    assert produtos['1'] == ('MAIS NOVO', 400, 4, 'Y', segundo['upload_id'])
+    assert produtos['2'][:3] == ('FICA', 200, 2)
+    assert banco.execute("SELECT COUNT(*) FROM products").fetchone() == (2,)
+
+
+def test_sem_linha_valida_falha_o_upload(banco, tmp_path):
+    with pytest.raises(ValueError, match="Linha 2: SKU obrigatório."):
+        _carregar(banco, tmp_path, "sku,name,price,quantity,description\n,X,1.0,1,\n")
+    assert banco.execute("SELECT status FROM product_uploads").fetchone() == ('failed',)
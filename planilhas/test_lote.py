@@ -0,0 +1,48 @@
+"""
+Nomes das saídas do lote: duas entradas nunca gravam o mesmo arquivo.
+
+  python -m pytest planilhas/test_lote.py
+"""
+
+import os
+
+import pandas as pd
+
+import lote
+
+
+def test_csv_e_xlsx_de_mesmo_nome_na_mesma_pasta(tmp_path):
+    pd.DataFrame({'sku': ['111'], 'name': ['DO CSV'], 'quantity': [1], 'price': ['1,00']}).to_csv(
+        tmp_path / 'estoque.csv', sep=';', index=False
+    )
+    pd.DataFrame({'sku': ['222'], 'name': ['DO XLSX'], 'quantity': [2], 'price': ['2,00']}).to_excel(
+        tmp_path / 'estoque.xlsx', index=False
+    )
+    entradas = lote.listar_entradas(str(tmp_path))
+    saida = tmp_path / 'resumos'
+
+    nomes = lote.nomes_saida(entradas, str(saida))
+    assert [os.path.basename(n) for n in nomes] == [
+        'estoque_csv_Resumo_final.csv', 'estoque_xlsx_Resumo_final.csv'
+    ]
+
+    resultados, _ = lote.converter_lote(entradas, str(saida), processos=2)
+    assert [r['erro'] for r in resultados] == [None, None]
+    assert pd.read_csv(nomes[0], dtype=str)['name'].tolist() == ['DO CSV']
+    assert pd.read_csv(nomes[1], dtype=str)['name'].tolist() == ['DO XLSX']
+
+
+def test_nomes_nunca_repetem():
+    entradas = [
+        'a/x.csv', 'b/x.csv', 'c/a/x.csv',   # mesma pasta "a" em lugares diferentes
+        'a/x.xlsx', 'a/x_xlsx.csv',          # nome natural igual ao de outra com extensão
+        'y.csv', 'Y.CSV',                     # só a caixa muda
+    ]
+    nomes = [os.path.basename(n).casefold() for n in lote.nomes_saida(entradas, 'resumos')]
+    assert len(set(nomes)) == len(entradas)
+
+
+def test_uma_entrada_com_os_vizinhos_tem_o_nome_do_lote():
+    pasta = ['p/a.csv', 'p/a.xlsx', 'p/b.csv']
+    assert lote.nomes_saida(['p/a.xlsx'], 'r', vizinhos=pasta) == [lote.nomes_saida(pasta, 'r')[1]]
+    assert lote.nomes_saida(['p/b.csv'], 'r', vizinhos=pasta) == [os.path.join('r', 'b_Resumo_final.csv')]
@@ -0,0 +1,46 @@
+"""
+Os três caminhos do conversor (arquivo inteiro, streaming e leve) geram a
+mesma saída e as mesmas estatísticas.
+
+  python -m pytest planilhas/test_resumo_csv.py
+"""
+
+import pytest
+
+import resumo_csv
+
+# blocos de 2 linhas: um só com números limpos, outros com células que o
+# parser de float do pandas aceitaria e o normalizar_numeros não
+SUJO = """sku;name;quantity;price
+1;LIMPO;1;29,05
+2;LIMPO;2;10
+3;SUBLINHADO;1_000;1_000
+4;GRANDE;1234567890123456789012;1234567890123456789012
+5;INFINITO;inf;inf
+6;MILHAR;1.234;1.234,56
+7;ESPACOS; 5 ; 2,5 
+8;VAZIO;;
+9;TEXTO;abc;abc
+10;NEGATIVO;-3;-1,5
+11;EXPOENTE;1e3;1e3
+12;NAN;nan;NaN
+"""
+
+
+def _converter(tmp_path, nome, **opcoes):
+    entrada = tmp_path / 'sujo.csv'
+    entrada.write_text(SUJO, encoding='utf-8')
+    saida = tmp_path / f'{nome}.csv'
+    resumo = resumo_csv.converter_arquivo(str(entrada), str(saida), validar=False, **opcoes)
+    resumo.pop('motor')
+    return saida.read_text(encoding='utf-8'), resumo
+
+
+@pytest.mark.parametrize('opcoes', [
+    {'motor': 'pandas', 'tamanho_bloco': 2},
+    {'motor': 'pandas', 'tamanho_bloco': 3},
+    {'motor': 'leve'},
+])
+def test_mesma_saida_e_estatisticas(tmp_path, opcoes):
+    inteiro = _converter(tmp_path, 'inteiro', motor='pandas')
+    assert _converter(tmp_path, 'outro', **opcoes) == inteiro
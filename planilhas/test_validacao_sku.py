@@ -0,0 +1,117 @@
+"""
+Validação de SKU: o ValidadorSku (blocos, numpy) e o ValidadorSkuLinhas
+(linha a linha, biblioteca padrão) rejeitam as mesmas linhas.
+
+  python -m pytest planilhas/test_validacao_sku.py
+"""
+
+import random
+
+import numpy as np
+import pandas as pd
+
+import resumo_csv
+from validacao_sku import ValidadorSku, ValidadorSkuLinhas, caminho_rejeitados
+
+GTIN_OK = '4006381333931'
+GTIN_ERRADO = '4006381333932'
+
+
+def _validar(validador, skus, primeira_linha):
+    df = pd.DataFrame({'sku': skus, 'name': [f'produto {i}' for i in range(len(skus))]})
+    linhas = np.arange(primeira_linha, primeira_linha + len(skus))
+    aceitas, rejeitadas = validador.validar(df, linhas)
+    return aceitas.tolist(), [
+        (r.linha, r.motivo, None if pd.isna(r.primeira_linha) else r.primeira_linha)
+        for r in rejeitadas.itertuples()
+    ]
+
+
+def test_repetido_no_mesmo_bloco():
+    aceitas, rejeitadas = _validar(ValidadorSku(), ['A1', GTIN_OK, ' A1 ', 'B2'], 2)
+    assert aceitas == [True, True, False, True]
+    assert rejeitadas == [(4, 'duplicado', 2)]
+
+
+def test_repetido_em_outro_bloco():
+    validador = ValidadorSku()
+    _validar(validador, ['A1', GTIN_OK], 2)
+    aceitas, rejeitadas = _validar(validador, ['C3', GTIN_OK, 'A1'], 4)
+    assert aceitas == [True, False, False]
+    assert rejeitadas == [(5, 'duplicado', 3), (6, 'duplicado', 2)]
+    assert validador.estatisticas == {'sku_vazio': 0, 'gtin_invalido': 0, 'duplicado': 2}
+
+
+def test_digito_verificador_errado_e_vazio():
+    aceitas, rejeitadas = _validar(ValidadorSku(), [GTIN_ERRADO, '', None, '12345'], 2)
+    assert aceitas == [False, False, False, True]
+    assert rejeitadas == [(2, 'gtin_invalido', None), (3, 'sku_vazio', None), (4, 'sku_vazio', None)]
+
+
+def _skus_sujos(n, semente=7):
+    rng = random.Random(semente)
+    opcoes = [
+        lambda: f"SKU{rng.randint(0, n // 3)}",
+        lambda: f" SKU{rng.randint(0, n // 3)} ",
+        lambda: rng.choice([GTIN_OK, GTIN_ERRADO, '96385074', '96385075', '036000291452']),
+        lambda: rng.choice(['', '   ']),
+        lambda: str(rng.randint(10 ** 12, 10 ** 13 - 1)),
+    ]
+    return [rng.choice(opcoes)() for _ in range(n)]
+
+
+def test_blocos_e_linha_a_linha_concordam():
+    skus = _skus_sujos(2000)
+
+    linha_a_linha = ValidadorSkuLinhas()
+    esperado = []
+    for linha, sku in enumerate(skus, start=2):
+        rejeicao = linha_a_linha.validar(sku, linha)
+        if rejeicao is not None:
+            esperado.append((linha, *rejeicao))
+
+    em_blocos = ValidadorSku()
+    obtido = []
+    inicio = 0
+    for tamanho in [1, 7, 300, 2, 1000, 690]:
+        obtido += _validar(em_blocos, skus[inicio:inicio + tamanho], inicio + 2)[1]
+        inicio += tamanho
+    assert inicio == len(skus)
+
+    assert obtido == esperado
+    assert em_blocos.estatisticas == linha_a_linha.estatisticas
+
+
+def test_motores_pandas_e_leve_rejeitam_as_mesmas_linhas(tmp_path):
+    skus = _skus_sujos(500)
+    entrada = tmp_path / 'entrada.csv'
+    pd.DataFrame({
+        'sku': skus, 'name': [f'P{i}' for i in range(len(skus))], 'quantity': 1, 'price': '1,00',
+    }).to_csv(entrada, sep=';', index=False)
+
+    saidas = {}
+    for motor, bloco in [('pandas', 37), ('leve', None)]:
+        saida = tmp_path / f'{motor}.csv'
+        resumo = resumo_csv.converter_arquivo(str(entrada), str(saida), tamanho_bloco=bloco, motor=motor)
+        with open(caminho_rejeitados(str(saida)), encoding='utf-8') as f:
+            saidas[motor] = (saida.read_text(encoding='utf-8'), f.read(), resumo['rejeitados'])
+
+    assert saidas['pandas'] == saidas['leve']
+    assert sum(saidas['leve'][2].values()) > 0
+
+
+def test_colisao_de_hash_nao_rejeita_sku_diferente(monkeypatch):
+    # B e D com o mesmo hash de A
+    original = pd.util.hash_array
+
+    def hash_colidindo(valores, categorize=True):
+        trocados = np.array([{'B': 'A', 'D': 'A'}.get(v, v) for v in valores], dtype=object)
+        return original(trocados, categorize=categorize)
+
+    monkeypatch.setattr(pd.util, 'hash_array', hash_colidindo)
+    validador = ValidadorSku()
+    assert _validar(validador, ['A', 'B', 'C', 'B'], 2) == ([True, True, True, False], [(5, 'duplicado', 3)])
+    assert _validar(validador, ['B', 'A', 'D', 'C'], 6) == (
+        [False, False, True, False], [(6, 'duplicado', 3), (7, 'duplicado', 2), (9, 'duplicado', 4)]
+    )
+    assert _validar(validador, ['D', 'A'], 10) == ([False, False], [(10, 'duplicado', 8), (11, 'duplicado', 2)])
@@ -0,0 +1,64 @@
+"""
+VigiaPasta em modo polling, passo a passo (sem o laço do rodar()).
+
+  python -m pytest planilhas/test_vigia_pasta.py
+"""
+
+import os
+
+import pandas as pd
+
+from vigia_pasta import VigiaPasta
+
+
+def _entradas(pasta):
+    pd.DataFrame({'sku': ['111'], 'name': ['DO CSV'], 'quantity': [1], 'price': ['1,00']}).to_csv(
+        pasta / 'estoque.csv', sep=';', index=False
+    )
+    pd.DataFrame({'sku': ['222'], 'name': ['DO XLSX'], 'quantity': [2], 'price': ['2,00']}).to_excel(
+        pasta / 'estoque.xlsx', index=False
+    )
+
+
+def test_csv_e_xlsx_de_mesmo_nome_nao_se_sobrescrevem(tmp_path):
+    pasta, saida = tmp_path / 'entrada', tmp_path / 'resumos'
+    pasta.mkdir()
+    _entradas(pasta)
+    vigia = VigiaPasta(str(pasta), str(saida), estavel=0, polling=True)
+    os.makedirs(saida)
+
+    vigia._varrer()
+    vigia._converter_estaveis()
+
+    resumos = sorted(n for n in os.listdir(saida) if n.endswith('_Resumo_final.csv'))
+    assert resumos == ['estoque_csv_Resumo_final.csv', 'estoque_xlsx_Resumo_final.csv']
+    assert pd.read_csv(saida / 'estoque_csv_Resumo_final.csv', dtype=str)['name'].tolist() == ['DO CSV']
+    assert pd.read_csv(saida / 'estoque_xlsx_Resumo_final.csv', dtype=str)['name'].tolist() == ['DO XLSX']
+
+
+def test_saida_de_outra_entrada_nao_conta_como_convertida(tmp_path):
+    pasta, saida = tmp_path / 'entrada', tmp_path / 'resumos'
+    pasta.mkdir()
+    saida.mkdir()
+    _entradas(pasta)
+    # só o xlsx foi convertido (e depois das duas entradas)
+    (saida / 'estoque_xlsx_Resumo_final.csv').write_text('sku,name,price,quantity,description\n')
+    vigia = VigiaPasta(str(pasta), str(saida), polling=True)
+
+    assert vigia._ja_convertido(str(pasta / 'estoque.xlsx'))
+    assert not vigia._ja_convertido(str(pasta / 'estoque.csv'))
+
+
+def test_esquece_arquivos_que_sairam_da_pasta(tmp_path):
+    pasta, saida = tmp_path / 'entrada', tmp_path / 'resumos'
+    pasta.mkdir()
+    saida.mkdir()
+    _entradas(pasta)
+    vigia = VigiaPasta(str(pasta), str(saida), estavel=0, polling=True)
+    vigia._varrer()
+    vigia._converter_estaveis()
+    assert len(vigia.processados) == 2
+
+    os.remove(pasta / 'estoque.csv')
+    vigia._varrer()
+    assert list(vigia.processados) == [str(pasta / 'estoque.xlsx')]
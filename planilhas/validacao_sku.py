@@ -0,0 +1,161 @@
+import os
+
+# tamanhos de GTIN; SKUs só com dígitos e outro tamanho são códigos internos
+TAMANHOS_GTIN = (8, 12, 13, 14)
+
+# pesos do dígito verificador para o código alinhado à direita em 14 posições
+# (o dígito logo antes do verificador tem peso 3); zeros à esquerda não mudam a soma
+PESOS_GTIN = (3, 1) * 6 + (3,)
+
+MOTIVOS = ('sku_vazio', 'gtin_invalido', 'duplicado')
+COLUNAS_REJEITADOS = ['linha', 'motivo', 'sku', 'name', 'primeira_linha']
+
+
+def caminho_rejeitados(output_file):
+    base, _ = os.path.splitext(output_file)
+    return f"{base}_rejeitados.csv"
+
+
+def gtin_valido(skus):
+    """
+    Confere o dígito verificador de todos os SKUs que têm cara de GTIN (só
+    dígitos, 8/12/13/14 posições) de uma vez. SKUs que não são GTIN ficam
+    True: quem decide se o SKU existe é a validação de vazio/duplicado.
+    """
+    import numpy as np
+
+    skus = skus.fillna('').astype(str)
+    eh_gtin = skus.str.fullmatch(r'[0-9]+').fillna(False).to_numpy(dtype=bool, copy=True)
+    eh_gtin &= np.isin(skus.str.len().to_numpy(), TAMANHOS_GTIN)
+
+    valido = np.ones(len(skus), dtype=bool)
+    if eh_gtin.any():
+        # todos com 14 posições: os bytes viram uma matriz n x 14 de dígitos
+        codigos = skus[eh_gtin].str.pad(14, fillchar='0').to_numpy(dtype='S14')
+        digitos = (codigos.view(np.uint8).reshape(-1, 14) - ord('0')).astype(np.int64)
+        soma = digitos[:, :13] @ np.array(PESOS_GTIN)
+        valido[eh_gtin] = (10 - soma % 10) % 10 == digitos[:, 13]
+    return valido
+
+
+def gtin_ok(sku):
+    """gtin_valido para um SKU só (já sem espaços), sem numpy."""
+    if len(sku) not in TAMANHOS_GTIN or not (sku.isascii() and sku.isdigit()):
+        return True
+    soma = sum(int(d) * p for d, p in zip(sku.zfill(14), PESOS_GTIN))
+    return (10 - soma % 10) % 10 == int(sku[-1])
+
+
+class ValidadorSku:
+    """
+    Valida os SKUs da saída bloco a bloco: vazio, dígito de GTIN errado e
+    SKU repetido no arquivo.
+
+    Os SKUs já vistos ficam num vetor ordenado de hashes de 64 bits, com a
+    linha da primeira ocorrência e o próprio SKU ao lado; cada bloco custa
+    uma busca binária vetorizada e uma inserção. O hash só acha o candidato:
+    a repetição é confirmada comparando o SKU, e SKUs diferentes com o mesmo
+    hash (raríssimo) são resolvidos num dicionário exato, como no
+    ValidadorSkuLinhas. Vale a primeira ocorrência: no streaming as linhas
+    anteriores já foram gravadas.
+    """
+
+    def __init__(self):
+        import numpy as np
+
+        self.hashes = np.empty(0, dtype=np.uint64)
+        self.linhas = np.empty(0, dtype=np.int64)
+        self.skus = np.empty(0, dtype=object)
+        self.colisoes = {}   # sku -> primeira linha, para SKUs cujo hash já era de outro SKU
+        self.estatisticas = dict.fromkeys(MOTIVOS, 0)
+
+    def validar(self, df_resumo, linhas):
+        """
+        Recebe um bloco da saída e o número da linha de cada registro no
+        arquivo de entrada. Retorna a máscara das linhas aceitas e um
+        DataFrame com as rejeitadas (linha, motivo, sku, name, primeira_linha).
+        """
+        import numpy as np
+        import pandas as pd
+
+        # o upload web compara o SKU sem espaços nas pontas
+        skus = df_resumo['sku'].astype('string').str.strip().fillna('')
+        linhas = np.asarray(linhas, dtype=np.int64)
+
+        vazio = (skus == '').to_numpy(dtype=bool)
+        gtin_errado = ~gtin_valido(skus) & ~vazio
+
+        valores = skus.to_numpy(dtype=object)
+        hashes = pd.util.hash_array(valores, categorize=False)
+        unicos, primeiro, inverso = np.unique(hashes, return_index=True, return_inverse=True)
+        primeira_linha = linhas[primeiro][inverso]
+
+        # já visto em blocos anteriores?
+        anterior = np.zeros(len(unicos), dtype=bool)
+        linha_anterior = np.zeros(len(unicos), dtype=np.int64)
+        sku_anterior = np.full(len(unicos), None, dtype=object)
+        if len(self.hashes):
+            posicao = np.minimum(np.searchsorted(self.hashes, unicos), len(self.hashes) - 1)
+            anterior = self.hashes[posicao] == unicos
+            linha_anterior = self.linhas[posicao]
+            sku_anterior = self.skus[posicao]
+        primeira_linha = np.where(anterior[inverso], linha_anterior[inverso], primeira_linha)
+
+        # só quem bateu num hash (do bloco ou já visto) é comparado pelo SKU;
+        # hash igual com SKU diferente é colisão, resolvida pelo valor exato
+        candidatos = np.flatnonzero((primeiro[inverso] != np.arange(len(valores))) | anterior[inverso])
+        grupo = inverso[candidatos]
+        referencia = np.where(anterior[grupo], sku_anterior[grupo], valores[primeiro[grupo]])
+        for i in candidatos[valores[candidatos] != referencia]:
+            primeira_linha[i] = self.colisoes.setdefault(valores[i], linhas[i])
+
+        repetido = (primeira_linha != linhas) & ~vazio & ~gtin_errado
+
+        # os novos entram no vetor ordenado (unicos já vem ordenado do np.unique)
+        novos = ~anterior
+        posicao = np.searchsorted(self.hashes, unicos[novos])
+        self.hashes = np.insert(self.hashes, posicao, unicos[novos])
+        self.linhas = np.insert(self.linhas, posicao, linhas[primeiro][novos])
+        self.skus = np.insert(self.skus, posicao, valores[primeiro][novos])
+
+        rejeitada = vazio | gtin_errado | repetido
+        motivo = np.select([vazio, gtin_errado], ['sku_vazio', 'gtin_invalido'], 'duplicado')
+        for m in MOTIVOS:
+            self.estatisticas[m] += int((rejeitada & (motivo == m)).sum())
+
+        rejeitadas = pd.DataFrame({
+            'linha': linhas[rejeitada],
+            'motivo': motivo[rejeitada],
+            'sku': df_resumo['sku'][rejeitada].to_numpy(),
+            'name': df_resumo['name'][rejeitada].to_numpy(),
+            'primeira_linha': pd.array(np.where(repetido, primeira_linha, -1)[rejeitada], dtype='Int64'),
+        })
+        rejeitadas.loc[rejeitadas['primeira_linha'] < 0, 'primeira_linha'] = pd.NA
+        return ~rejeitada, rejeitadas
+
+
+class ValidadorSkuLinhas:
+    """
+    Os mesmos critérios do ValidadorSku, linha a linha e só com a biblioteca
+    padrão, para o caminho leve do resumo_csv (arquivos pequenos, em que
+    subir o numpy/pandas custa mais que a validação).
+    """
+
+    def __init__(self):
+        self.primeiras = {}
+        self.estatisticas = dict.fromkeys(MOTIVOS, 0)
+
+    def validar(self, sku, linha):
+        """Retorna None se o SKU é aceito, senão (motivo, primeira_linha ou None)."""
+        sku = (sku or '').strip()
+        primeira = self.primeiras.setdefault(sku, linha)
+        if not sku:
+            motivo = 'sku_vazio'
+        elif not gtin_ok(sku):
+            motivo = 'gtin_invalido'
+        elif primeira != linha:
+            motivo = 'duplicado'
+        else:
+            return None
+        self.estatisticas[motivo] += 1
+        return motivo, primeira if motivo == 'duplicado' else None
@@ -0,0 +1,304 @@
+"""
+Vigia uma pasta e converte cada exportação assim que ela termina de chegar.
+
+Fica rodando: o Python e o pandas sobem uma vez só, e cada arquivo novo ou
+alterado na pasta vira <entrada>_Resumo_final.csv em --saida-dir. No Linux
+usa inotify; em outros sistemas, ou em pastas de rede onde o inotify não
+vê as gravações de outras máquinas (--polling), compara tamanho e mtime a
+cada --intervalo segundos.
+
+Uso:
+  python vigia_pasta.py /srv/exportacoes --saida-dir /srv/resumos
+  python vigia_pasta.py /mnt/lojas --polling --intervalo 5 --cache
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+import resumo_csv
+from lote import EXTENSOES_ENTRADA, eh_saida, nomes_saida
+
+# flags do inotify (linux/inotify.h)
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+EVENTOS = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+CABECALHO_EVENTO = struct.Struct('iIII')
+
+ESTAVEL_PADRAO = 2.0
+INTERVALO_PADRAO = 2.0
+
+
+def _agora():
+    return time.strftime('%H:%M:%S')
+
+
+def eh_entrada(nome):
+    # arquivos de trava do Excel (~$x.xlsx), ocultos e temporários de cópia ficam de fora
+    return (
+        nome.lower().endswith(EXTENSOES_ENTRADA)
+        and not eh_saida(nome)
+        and not nome.startswith(('~$', '.'))
+    )
+
+
+def _assinatura(caminho):
+    try:
+        estado = os.stat(caminho)
+    except OSError:
+        return None
+    return estado.st_size, estado.st_mtime_ns
+
+
+class Inotify:
+    """inotify via ctypes, sem dependência externa. Só Linux."""
+
+    def __init__(self, diretorio):
+        nome_libc = ctypes.util.find_library('c')
+        if not sys.platform.startswith('linux') or not nome_libc:
+            raise OSError("inotify só existe no Linux")
+        libc = ctypes.CDLL(nome_libc, use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falhou")
+        if libc.inotify_add_watch(self.fd, os.fsencode(diretorio), EVENTOS) < 0:
+            erro = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(erro, f"inotify_add_watch falhou em '{diretorio}'")
+
+    def esperar(self, timeout):
+        """
+        Espera até `timeout` segundos e devolve os nomes alterados, ou None se
+        a fila do kernel estourou (aí é preciso olhar a pasta inteira).
+        """
+        prontos, _, _ = select.select([self.fd], [], [], timeout)
+        if not prontos:
+            return set()
+
+        nomes = set()
+        try:
+            dados = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return nomes
+        posicao = 0
+        while posicao < len(dados):
+            _, mascara, _, tamanho = CABECALHO_EVENTO.unpack_from(dados, posicao)
+            posicao += CABECALHO_EVENTO.size
+            if mascara & IN_Q_OVERFLOW:
+                return None
+            nome = dados[posicao:posicao + tamanho].rstrip(b'\0')
+            posicao += tamanho
+            if nome:
+                nomes.add(os.fsdecode(nome))
+        return nomes
+
+    def fechar(self):
+        os.close(self.fd)
+
+
+class VigiaPasta:
+    """
+    Debounce e conversão. Um arquivo só é convertido depois de ficar
+    `estavel` segundos com o mesmo tamanho e mtime (cópias pela rede e o
+    Excel gravam em vários pedaços); uma assinatura já convertida não é
+    convertida de novo, e uma que falhou só é tentada outra vez se o
+    arquivo mudar.
+    """
+
+    def __init__(self, diretorio, diretorio_saida, estavel=ESTAVEL_PADRAO, intervalo=INTERVALO_PADRAO,
+                 polling=False, opcoes=None):
+        self.diretorio = diretorio
+        self.diretorio_saida = diretorio_saida
+        self.estavel = estavel
+        self.intervalo = intervalo
+        self.opcoes = opcoes or {}
+        self.pendentes = {}      # caminho -> (assinatura, visto desde)
+        self.processados = {}    # caminho -> assinatura convertida (ou que falhou)
+
+        self.inotify = None
+        if not polling:
+            try:
+                self.inotify = Inotify(diretorio)
+            except OSError as e:
+                print(f"[{_agora()}] inotify indisponível ({e}); usando polling a cada {intervalo:g} s")
+
+    def _observar(self, caminho):
+        assinatura = _assinatura(caminho)
+        if assinatura is None:
+            # removido ou movido para fora da pasta
+            self.pendentes.pop(caminho, None)
+            self.processados.pop(caminho, None)
+            return
+        if self.processados.get(caminho) == assinatura:
+            self.pendentes.pop(caminho, None)
+            return
+        anterior = self.pendentes.get(caminho)
+        if anterior is None or anterior[0] != assinatura:
+            self.pendentes[caminho] = (assinatura, time.monotonic())
+
+    def _entradas(self):
+        with os.scandir(self.diretorio) as entradas:
+            return [e.path for e in entradas if eh_entrada(e.name) and e.is_file()]
+
+    def _varrer(self):
+        caminhos = self._entradas()
+        for caminho in caminhos:
+            self._observar(caminho)
+        # arquivos que saíram da pasta não ficam na memória do vigia
+        existentes = set(caminhos)
+        for caminho in [c for c in self.processados if c not in existentes]:
+            del self.processados[caminho]
+
+    def _saida(self, caminho):
+        # com os outros arquivos da pasta: a.csv e a.xlsx não gravam a mesma saída
+        return nomes_saida([caminho], self.diretorio_saida, vizinhos=self._entradas())[0]
+
+    def _ja_convertido(self, caminho):
+        # na partida, uma saída mais nova que a entrada conta como convertida
+        saida = self._saida(caminho)
+        try:
+            return os.stat(saida).st_mtime_ns >= os.stat(caminho).st_mtime_ns
+        except OSError:
+            return False
+
+    def _converter(self, caminho, assinatura):
+        saida = self._saida(caminho)
+        self.processados[caminho] = assinatura
+        inicio = time.perf_counter()
+        try:
+            resumo = resumo_csv.converter_arquivo(caminho, saida, **self.opcoes)
+        except Exception as e:
+            print(f"[{_agora()}] ✖ {os.path.basename(caminho)}: {e}")
+            return
+        origem = 'cache' if resumo.get('cache') else resumo['perfil']
+        print(
+            f"[{_agora()}] ✔ {os.path.basename(caminho)} -> {saida} "
+            f"({resumo['linhas']} linhas, {origem}, {time.perf_counter() - inicio:.2f} s)"
+        )
+
+    def _converter_estaveis(self):
+        agora = time.monotonic()
+        for caminho, (assinatura, desde) in list(self.pendentes.items()):
+            if agora - desde < self.estavel:
+                continue
+            atual = _assinatura(caminho)
+            if atual != assinatura:
+                # mudou sem evento (pasta de rede): recomeça a contar
+                self._observar(caminho)
+                continue
+            del self.pendentes[caminho]
+            self._converter(caminho, assinatura)
+
+    def _proxima_espera(self):
+        if not self.pendentes:
+            return self.intervalo if self.inotify is None else None
+        agora = time.monotonic()
+        restante = min(desde + self.estavel - agora for _, desde in self.pendentes.values())
+        espera = max(restante, 0.05)
+        return espera if self.inotify is not None else min(espera, self.intervalo)
+
+    def rodar(self):
+        os.makedirs(self.diretorio_saida, exist_ok=True)
+        modo = 'inotify' if self.inotify is not None else f'polling ({self.intervalo:g} s)'
+        print(f"[{_agora()}] vigiando {self.diretorio} ({modo}), saídas em {self.diretorio_saida}")
+
+        # o que já estava na pasta e ainda não tem saída atualizada
+        self._varrer()
+        for caminho in list(self.pendentes):
+            if self._ja_convertido(caminho):
+                self.processados[caminho] = self.pendentes.pop(caminho)[0]
+
+        try:
+            while True:
+                self._converter_estaveis()
+                espera = self._proxima_espera()
+                if self.inotify is None:
+                    time.sleep(espera)
+                    self._varrer()
+                    continue
+
+                nomes = self.inotify.esperar(espera)
+                if nomes is None:
+                    self._varrer()
+                    continue
+                for nome in nomes:
+                    if eh_entrada(nome):
+                        self._observar(os.path.join(self.diretorio, nome))
+        finally:
+            if self.inotify is not None:
+                self.inotify.fechar()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Converte automaticamente as exportações que chegam numa pasta.")
+    parser.add_argument("diretorio", help="pasta onde as lojas deixam as exportações")
+    parser.add_argument(
+        "--saida-dir",
+        default="resumos",
+        help="diretório dos arquivos <entrada>_Resumo_final.csv (padrão: resumos)",
+    )
+    parser.add_argument(
+        "--estavel",
+        type=float,
+        default=ESTAVEL_PADRAO,
+        help=f"segundos sem mudança antes de converter (padrão: {ESTAVEL_PADRAO:g})",
+    )
+    parser.add_argument(
+        "--polling",
+        action="store_true",
+        help="não usa inotify (pastas de rede gravadas por outras máquinas)",
+    )
+    parser.add_argument(
+        "--intervalo",
+        type=float,
+        default=INTERVALO_PADRAO,
+        help=f"polling: segundos entre verificações (padrão: {INTERVALO_PADRAO:g})",
+    )
+    parser.add_argument("--perfil", choices=list(resumo_csv.PERFIS), help="layout da entrada (padrão: detectado)")
+    parser.add_argument("--encoding", help="força o encoding de entrada (padrão: detectado)")
+    parser.add_argument("--sem-validacao", action="store_true", help="não rejeita SKUs inválidos ou repetidos")
+    parser.add_argument(
+        "--cache",
+        nargs="?",
+        const="",
+        help="reaproveita a saída se a entrada não mudou (diretório opcional)",
+    )
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.diretorio):
+        print(f"Erro: diretório '{args.diretorio}' não encontrado.")
+        sys.exit(1)
+
+    opcoes = {
+        'encoding': args.encoding,
+        'perfil': args.perfil,
+        'validar': not args.sem_validacao,
+        # sempre em blocos: a memória do processo não cresce com o maior arquivo já visto
+        'tamanho_bloco': resumo_csv.TAMANHO_BLOCO_PADRAO,
+    }
+    if args.cache is not None:
+        from cache_conversao import CacheConversao, DIRETORIO_PADRAO
+        opcoes['cache'] = CacheConversao(args.cache or DIRETORIO_PADRAO)
+
+    vigia = VigiaPasta(
+        args.diretorio,
+        args.saida_dir,
+        estavel=args.estavel,
+        intervalo=args.intervalo,
+        polling=args.polling,
+        opcoes=opcoes,
+    )
+    try:
+        vigia.rodar()
+    except KeyboardInterrupt:
+        print(f"\n[{_agora()}] encerrado")
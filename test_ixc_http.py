@@ -0,0 +1,165 @@
+"""
+Os motores HTTP e híbrido contra a Central do Assinante local
+(ixc_portal_local), sem acessar o portal de verdade.
+
+  python -m pytest test_ixc_http.py
+"""
+
+import http.client
+
+import pytest
+
+import ixc_http
+from ixc_metricas import Metricas
+from ixc_portal_local import PortalLocal, gerar_assinantes
+
+
+def _esperado(assinante):
+    # o mesmo critério do ixc_benchmark: tudo o que não está pago
+    return sorted((f['id'], f['valor'], f['vencimento']) for f in assinante['faturas'] if f['status'] != 'paga')
+
+
+def _obtido(faturas):
+    return sorted((f['id'], f['valor'], f['vencimento']) for f in faturas)
+
+
+def _automacao(motor, portal, cpf, senha=None, **opcoes):
+    senha = senha if senha is not None else portal.assinantes[cpf]['senha']
+    return ixc_http.criar_automacao(motor, cpf, senha, base_url=portal.base_url, metricas=Metricas(log=None), **opcoes)
+
+
+class SeleniumFalso:
+    """Faz o papel do CentralAssinanteAutomacao (não há Chrome no teste)."""
+
+    criados = []
+
+    def __init__(self, cpf, senha, sessoes=None, **_):
+        self.cpf = cpf
+        self.sessoes = sessoes
+        self.tempos = {}
+        self.motivo_falha_login = None
+        self.logins = 0
+        SeleniumFalso.criados.append(self)
+
+    def fazer_login(self):
+        self.logins += 1
+        return True
+
+    def buscar_faturas_em_aberto(self):
+        return [{'id': 'selenium', 'valor': None, 'vencimento': None, 'status': None, 'texto': ''}]
+
+    def encerrar(self):
+        pass
+
+
+@pytest.fixture
+def selenium_falso(monkeypatch):
+    SeleniumFalso.criados = []
+    monkeypatch.setattr(ixc_http, 'CentralAssinanteAutomacao', SeleniumFalso)
+    return SeleniumFalso.criados
+
+
+@pytest.mark.parametrize('motor', ['http', 'auto'])
+def test_faturas_em_aberto(motor, selenium_falso):
+    with PortalLocal(gerar_assinantes(6)) as portal:
+        for cpf, assinante in portal.assinantes.items():
+            automacao = _automacao(motor, portal, cpf)
+            try:
+                assert automacao.fazer_login()
+                assert _obtido(automacao.buscar_faturas_em_aberto()) == _esperado(assinante)
+            finally:
+                automacao.encerrar()
+    # tudo pelo HTTP: o navegador nem subiu
+    assert selenium_falso == []
+
+
+@pytest.mark.parametrize('motor', ['http', 'auto'])
+def test_senha_errada(motor, selenium_falso):
+    with PortalLocal(gerar_assinantes(1)) as portal:
+        automacao = _automacao(motor, portal, '10000000000', senha='errada')
+        assert automacao.fazer_login() is False
+        assert automacao.motivo_falha_login == 'credenciais'
+        automacao.encerrar()
+    assert selenium_falso == []
+
+
+class PortalSemMensagem(PortalLocal):
+    """Volta para o login sem dizer por quê."""
+
+    def _pagina_login(self, req, erro=''):
+        super()._pagina_login(req)
+
+
+def test_volta_ao_login_sem_mensagem_nao_reenvia_a_senha(selenium_falso):
+    with PortalSemMensagem(gerar_assinantes(1)) as portal:
+        automacao = _automacao('auto', portal, '10000000000', senha='errada')
+        assert automacao.fazer_login() is False
+        assert automacao.motivo_falha_login == 'credenciais'
+        automacao.encerrar()
+    # a senha recusada não vai de novo pelo navegador
+    assert selenium_falso == []
+
+
+def test_js_passa_para_o_navegador(selenium_falso):
+    with PortalLocal(gerar_assinantes(6), js=True) as portal:
+        cpf = next(c for c, a in portal.assinantes.items() if a['faturas'])
+
+        so_http = _automacao('http', portal, cpf)
+        assert so_http.fazer_login()
+        with pytest.raises(ixc_http.PaginaNaoSuportada):
+            so_http.buscar_faturas_em_aberto()
+        so_http.encerrar()
+
+        auto = _automacao('auto', portal, cpf)
+        assert auto.fazer_login()
+        assert auto.motor == 'http'
+        assert [f['id'] for f in auto.buscar_faturas_em_aberto()] == ['selenium']
+        assert auto.motor == 'selenium'
+        auto.encerrar()
+
+    # o navegador recebe a sessão aberta por HTTP (e só a restaura)
+    navegador, = selenium_falso
+    assert navegador.sessoes.obter(cpf, portal.assinantes[cpf]['senha'])
+    assert navegador.logins == 1
+
+
+class ConexaoDerrubada:
+    """Aceita a requisição e cai antes da resposta, como um keep-alive expirado."""
+
+    def __init__(self, enviadas):
+        self.enviadas = enviadas
+
+    def request(self, metodo, caminho, body=None, headers=None):
+        self.enviadas.append(metodo)
+
+    def getresponse(self):
+        raise http.client.RemoteDisconnected("Remote end closed connection without response")
+
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize('metodo, enviadas', [('GET', ['GET', 'GET']), ('POST', ['POST'])])
+def test_so_reenvia_metodo_idempotente(monkeypatch, metodo, enviadas):
+    conexoes = ixc_http.ConexoesHttp(metricas=Metricas(log=None))
+    registro = []
+    obtidas = iter([(ConexaoDerrubada(registro), True), (ConexaoDerrubada(registro), False)])
+    monkeypatch.setattr(conexoes, '_obter', lambda esquema, host: next(obtidas))
+
+    with pytest.raises(http.client.RemoteDisconnected):
+        conexoes.requisitar(metodo, 'http://127.0.0.1/central_assinante_web/login', corpo=b'senha=x')
+    assert registro == enviadas
+
+
+def test_situacao_desconhecida_fica_com_o_vencimento():
+    html = """<table>
+      <thead><tr><th>Fatura</th><th>Vencimento</th><th>Valor</th><th>Situação</th></tr></thead>
+      <tr><td>501</td><td>10/01/2000</td><td>R$ 10,00</td><td>Cancelada</td></tr>
+      <tr><td>502</td><td>10/01/2999</td><td>R$ 20,00</td><td>Renegociada</td></tr>
+      <tr><td>503</td><td>10/01/2000</td><td>R$ 30,00</td><td>Paga</td></tr>
+    </table>"""
+    registros = ixc_http.extrair_faturas(ixc_http.analisar_html(html))
+    assert {r['id']: r['status'] for r in registros} == {'501': None, '502': None, '503': 'paga'}
+
+    faturas = ixc_http.faturas_em_aberto(registros)
+    assert {f['id']: f['status'] for f in faturas} == {'501': 'vencida', '502': 'em_aberto'}
@@ -0,0 +1,40 @@
+"""
+PoolNavegadores com um criar_driver de mentira (sem Chrome).
+
+  python -m pytest test_ixc_pool.py
+"""
+
+import ixc_pool
+
+
+class DriverFalso:
+    window_handles = ['janela']
+
+    def get(self, url):
+        pass
+
+    def execute_script(self, *args):
+        return 'complete'
+
+    def quit(self):
+        pass
+
+
+def test_vaga_volta_depois_de_falha_ao_subir(monkeypatch):
+    tentativas = []
+
+    def criar_driver(headless):
+        tentativas.append(headless)
+        if len(tentativas) < 3:
+            raise RuntimeError("Chrome não encontrado")
+        return DriverFalso()
+
+    monkeypatch.setattr(ixc_pool, 'criar_driver', criar_driver)
+    monkeypatch.setattr(ixc_pool, 'ESPERA_REINICIO', 0.01)
+
+    with ixc_pool.PoolNavegadores(tamanho=1, url_aquecimento=None) as pool:
+        driver = pool.obter(timeout=5)
+        assert isinstance(driver, DriverFalso)
+        assert pool.estatisticas['falhas_inicio'] == 2
+        assert pool.estatisticas['iniciados'] == 1
+        pool.devolver(driver)
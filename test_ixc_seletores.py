@@ -0,0 +1,55 @@
+"""
+CacheSeletores: o ranking vai para o disco sem uma gravação por procura.
+
+  python -m pytest test_ixc_seletores.py
+"""
+
+import json
+
+import ixc_seletores
+from ixc_seletores import CacheSeletores
+
+CSS_A = ('css selector', '#a')
+CSS_B = ('css selector', '#b')
+
+
+def _gravado(caminho):
+    with open(caminho, encoding='utf-8') as f:
+        return json.load(f)['login']
+
+
+def test_grava_na_troca_e_adia_os_contadores(tmp_path, monkeypatch):
+    caminho = tmp_path / 'seletores.json'
+    cache = CacheSeletores(str(caminho))
+    gravacoes = []
+    salvar = cache._salvar
+    monkeypatch.setattr(cache, '_salvar', lambda: (gravacoes.append(1), salvar()))
+
+    # primeiro vencedor: o ranking mudou, grava na hora
+    cache.registrar('login', [CSS_A, CSS_B], CSS_A)
+    assert len(gravacoes) == 1
+    # o mesmo vencedor de novo: só contadores, nada no disco
+    for _ in range(50):
+        cache.registrar('login', cache.ordenar('login', [CSS_A, CSS_B]), CSS_A)
+    assert len(gravacoes) == 1
+    assert _gravado(caminho)['acertos'] == 1
+
+    # o portal mudou: o outro seletor venceu, grava na hora
+    cache.registrar('login', [CSS_A, CSS_B], CSS_B)
+    assert len(gravacoes) == 2
+    assert _gravado(caminho)['ultimo'] == ixc_seletores.chave(CSS_B)
+    assert (_gravado(caminho)['acertos'], _gravado(caminho)['trocas']) == (51, 1)
+
+    cache.registrar('login', [CSS_B, CSS_A], CSS_B)
+    ixc_seletores._salvar_pendentes()   # o que o atexit chama
+    assert _gravado(caminho)['acertos'] == 52
+    assert CacheSeletores(str(caminho)).ordenar('login', [CSS_A, CSS_B]) == [CSS_B, CSS_A]
+
+
+def test_contadores_vao_para_o_disco_depois_do_intervalo(tmp_path, monkeypatch):
+    caminho = tmp_path / 'seletores.json'
+    cache = CacheSeletores(str(caminho))
+    cache.registrar('login', [CSS_A], CSS_A)
+    monkeypatch.setattr(ixc_seletores, 'INTERVALO_SALVAR', 0)
+    cache.registrar('login', [CSS_A], CSS_A)
+    assert _gravado(caminho)['acertos'] == 2
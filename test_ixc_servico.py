@@ -0,0 +1,175 @@
+"""
+ServicoIxc com a consulta ao portal trocada por uma função de mentira.
+
+  python -m pytest test_ixc_servico.py
+"""
+
+import asyncio
+import threading
+
+from ixc_cache import CacheFaturas
+from ixc_metricas import Metricas
+import ixc_servico
+from ixc_servico import ServicoIxc
+
+CPF = '12345678901'
+
+
+class PortalFalso:
+    """Faz o papel de ServicoIxc.executar: conta as consultas e segura as que pedirem."""
+
+    def __init__(self):
+        self.chamadas = []
+        self.liberar = threading.Event()
+        self.liberar.set()
+        self.faturas = [{'id': '1'}]
+
+    def __call__(self, tipo, cpf, senha):
+        self.chamadas.append(tipo)
+        if tipo == 'desbloqueio':
+            self.faturas = []
+            return {'status': 'ok', 'desbloqueado': True, 'motor': 'falso'}
+        faturas = self.faturas
+        self.liberar.wait(5)
+        return {'status': 'ok', 'faturas': faturas, 'motor': 'falso'}
+
+
+def _servico(portal, **opcoes):
+    servico = ServicoIxc(metricas=Metricas(log=None), **opcoes)
+    servico.executar = portal
+    return servico
+
+
+async def _esperar_chamadas(portal, n, limite=5):
+    for _ in range(int(limite / 0.01)):
+        if len(portal.chamadas) >= n:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"{len(portal.chamadas)} consulta(s) ao portal, esperava {n}")
+
+
+def test_consulta_de_antes_do_desbloqueio_nao_volta_ao_cache():
+    portal = PortalFalso()
+
+    async def cenario():
+        servico = _servico(portal, trabalhadores=2, cache=CacheFaturas())
+        await servico.iniciar()
+        try:
+            portal.liberar.clear()
+            consulta = asyncio.create_task(servico.pedir('faturas', CPF, 'senha'))
+            await _esperar_chamadas(portal, 1)
+            # o desbloqueio termina enquanto a consulta ainda lê as faturas de antes
+            assert (await servico.pedir('desbloqueio', CPF, 'senha'))[1]['desbloqueado']
+            # quem pergunta agora não pega carona na consulta antiga
+            depois = asyncio.create_task(servico.pedir('faturas', CPF, 'senha'))
+            await _esperar_chamadas(portal, 3)
+            portal.liberar.set()
+            assert (await consulta)[1]['faturas'] == [{'id': '1'}]
+            assert (await depois)[1]['faturas'] == []
+            return await servico.pedir('faturas', CPF, 'senha'), servico.cache.estatisticas
+        finally:
+            await servico.parar()
+
+    (status, corpo), estatisticas = asyncio.run(cenario())
+    assert (status, corpo['faturas'], corpo['cache']) == (200, [], True)
+    assert estatisticas['obsoletos'] == 1
+
+
+def test_quem_espera_consulta_igual_respeita_o_proprio_prazo():
+    portal = PortalFalso()
+
+    async def cenario():
+        servico = _servico(portal, trabalhadores=1, cache=CacheFaturas())
+        await servico.iniciar()
+        try:
+            portal.liberar.clear()
+            primeira = asyncio.create_task(servico.pedir('faturas', CPF, 'senha', timeout=5))
+            await _esperar_chamadas(portal, 1)
+            agrupada = await servico.pedir('faturas', CPF, 'senha', timeout=0.1)
+            portal.liberar.set()
+            return agrupada, await primeira
+        finally:
+            await servico.parar()
+
+    (status, corpo), (status_primeira, _) = asyncio.run(cenario())
+    assert (status, corpo['status']) == (504, 'tempo_esgotado')
+    assert status_primeira == 200
+    assert portal.chamadas == ['faturas']
+
+
+def test_fila_cheia_responde_503():
+    portal = PortalFalso()
+
+    async def cenario():
+        servico = _servico(portal, trabalhadores=1, fila=1)
+        await servico.iniciar()
+        try:
+            portal.liberar.clear()
+            em_execucao = asyncio.create_task(servico.pedir('faturas', CPF, 'senha'))
+            await _esperar_chamadas(portal, 1)
+            na_fila = asyncio.create_task(servico.pedir('faturas', '10987654321', 'senha'))
+            await asyncio.sleep(0.05)
+            recusado = await servico.pedir('faturas', '11111111111', 'senha')
+            portal.liberar.set()
+            return recusado, await em_execucao, await na_fila, servico.estatisticas
+        finally:
+            await servico.parar()
+
+    (status, corpo), primeiro, segundo, estatisticas = asyncio.run(cenario())
+    assert (status, corpo['status']) == (503, 'ocupado')
+    assert (primeiro[0], segundo[0]) == (200, 200)
+    assert estatisticas['recusados_fila_cheia'] == 1
+    assert b"Retry-After: 5" in ixc_servico._resposta(status, corpo, False)
+
+
+def test_prazo_esgotado_na_consulta_e_na_fila_responde_504():
+    portal = PortalFalso()
+
+    async def cenario():
+        servico = _servico(portal, trabalhadores=1)
+        await servico.iniciar()
+        try:
+            portal.liberar.clear()
+            loop = asyncio.get_running_loop()
+            inicio = loop.time()
+            em_execucao = asyncio.create_task(servico.pedir('faturas', CPF, 'senha', timeout=0.3))
+            await _esperar_chamadas(portal, 1)
+            # o único trabalhador está preso: este nem sai da fila, e responde no prazo
+            na_fila = await servico.pedir('faturas', '10987654321', 'senha', timeout=0.1)
+            esperou = loop.time() - inicio
+            consulta = await em_execucao
+            portal.liberar.set()
+            await asyncio.sleep(0.05)
+            return na_fila, esperou, consulta, servico.estatisticas
+        finally:
+            await servico.parar()
+
+    (status, corpo), esperou, (status_consulta, corpo_consulta), estatisticas = asyncio.run(cenario())
+    assert (status, corpo['erro']) == (504, "prazo acabou na fila")
+    assert esperou < 0.3
+    assert (status_consulta, corpo_consulta['erro']) == (504, "prazo acabou durante a consulta")
+    assert estatisticas['expirados'] == 2
+    assert portal.chamadas == ['faturas']
+
+
+def test_pedidos_iguais_viram_uma_consulta():
+    portal = PortalFalso()
+
+    async def cenario():
+        servico = _servico(portal, trabalhadores=2, cache=CacheFaturas())
+        await servico.iniciar()
+        try:
+            portal.liberar.clear()
+            pedidos = [asyncio.create_task(servico.pedir('faturas', CPF, 'senha')) for _ in range(3)]
+            # outra senha não pega carona: pode ser de outra pessoa
+            outra_senha = asyncio.create_task(servico.pedir('faturas', CPF, 'outra'))
+            await _esperar_chamadas(portal, 2)
+            portal.liberar.set()
+            return await asyncio.gather(*pedidos, outra_senha), servico.estatisticas
+        finally:
+            await servico.parar()
+
+    respostas, estatisticas = asyncio.run(cenario())
+    assert [status for status, _ in respostas] == [200] * 4
+    assert portal.chamadas == ['faturas', 'faturas']
+    assert estatisticas['agrupados'] == 2